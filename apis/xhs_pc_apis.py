@@ -1,18 +1,116 @@
 # encoding: utf-8
+import functools
+import inspect
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 import urllib
 import requests
 from xhs_utils.xhs_util import splice_str, generate_request_params, generate_x_b3_traceid, get_common_headers
+from xhs_utils.proxy_pool import send_request
+from xhs_utils.cookie_util import get_account_key
+from xhs_utils.url_util import parse_note_url
+from xhs_utils.single_flight import default_single_flight
+from xhs_utils.capability_cache import default_capability_cache
+from xhs_utils.response_cache import CacheMissError
 from loguru import logger
 
+
+def coalesced(func):
+    """
+        幂等查询接口的请求合并：按 (接口, 规范化的参数, 账号) 合并同时在途的相同调用，并短时间缓存成功的结果，
+        多个任务同时请求同一篇笔记或同一个用户时只签名和请求一次。XHS_Apis.single_flight 为 None 时不合并
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.single_flight is None:
+            return func(self, *args, **kwargs)
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        params = dict(arguments.arguments)
+        params.pop('self')
+        params.pop('proxies', None)
+        account_key = get_account_key(params.pop('cookies_str', ''))
+        key = (func.__name__, json.dumps(params, ensure_ascii=False, sort_keys=True, default=str), account_key)
+        return self.single_flight.do(key, lambda: func(self, *args, **kwargs))
+
+    return wrapper
+
+
 """
     获小红书的api
     :param cookies_str: 你的cookies
 """
 class XHS_Apis():
-    def __init__(self):
+    USER_POSTED_APIS = ("/api/sns/web/v2/user_posted", "/api/sns/web/v1/user_posted")
+
+    def __init__(self, single_flight=default_single_flight(), response_cache=None, capability_cache=default_capability_cache()):
+        """
+            :param single_flight: 相同请求合并使用的 SingleFlight，默认进程内共享；传 None 关闭合并
+            :param response_cache: 可选的 ResponseCache，接口响应的磁盘缓存
+            :param capability_cache: 记录各账号可用接口变体的 CapabilityCache，默认进程内共享；传 None 时每次都按默认顺序尝试
+        """
         self.base_url = "https://edith.xiaohongshu.com"
+        self.single_flight = single_flight
+        self.response_cache = response_cache
+        self.capability_cache = capability_cache
+
+    def _request(self, method: str, api: str, proxies=None, **kwargs):
+        """
+            所有 edith 接口请求的统一出口
+            :param proxies: requests 风格的代理字典，或 ProxyPool 代理池
+        """
+        if self.response_cache is None or kwargs.get('stream'):
+            return send_request(method, self.base_url + api, proxies=proxies, **kwargs)
+        return self.response_cache.fetch(
+            method, api, kwargs.get('data'), lambda: send_request(method, self.base_url + api, proxies=proxies, **kwargs)
+        )
+
+    def _fetch_pages(self, fetch_page, items_key: str, require_num: int, page_size: int, max_workers: int = 1, rate_limiter=None):
+        """
+            按页码翻页的接口（搜索等）的统一取数：每轮并发请求 max_workers 个连续页码，结果按页码顺序合并，
+            遇到 has_more 为 False 或没有数据的页即停止，凑够 require_num 条后截断。max_workers 为 1 时即逐页顺序请求
+            :param fetch_page: fetch_page(page) -> (success, msg, res_json)
+            :param items_key: res_json["data"] 中数据列表的键名
+            :param page_size: 每页条数，用于估算还需要请求几页
+            :param rate_limiter: 可选的频率限制器，每个请求前调用 wait()，所有线程共用
+        """
+        def fetch(page):
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            return fetch_page(page)
+
+        success, msg = True, 'success'
+        item_list = []
+        page = 1
+        max_workers = max(int(max_workers), 1)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while len(item_list) < require_num:
+                    pages_left = -(-(require_num - len(item_list)) // page_size)
+                    pages = list(range(page, page + min(max_workers, pages_left)))
+                    finished = False
+                    for success, msg, res_json in executor.map(fetch, pages):
+                        if not success:
+                            raise Exception(msg)
+                        if not res_json["data"].get(items_key):
+                            finished = True
+                            break
+                        item_list.extend(res_json["data"][items_key])
+                        if not res_json["data"].get("has_more"):
+                            finished = True
+                            break
+                    if finished:
+                        break
+                    page += len(pages)
+        except Exception as e:
+            success = False
+            msg = str(e)
+        if len(item_list) > require_num:
+            item_list = item_list[:require_num]
+        return success, msg, item_list
 
     def get_homefeed_all_channel(self, cookies_str: str, proxies: dict = None):
         """
@@ -23,7 +121,7 @@ class XHS_Apis():
         try:
             api = "/api/sns/web/v1/homefeed/category"
             headers, cookies, data = generate_request_params(cookies_str, api)
-            response = requests.get(self.base_url + api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -63,7 +161,7 @@ class XHS_Apis():
                 "need_filter_image": False
             }
             headers, cookies, trans_data = generate_request_params(cookies_str, api, data)
-            response = requests.post(self.base_url + api, headers=headers, data=trans_data, cookies=cookies, proxies=proxies)
+            response = self._request('POST', api, headers=headers, data=trans_data, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -102,6 +200,7 @@ class XHS_Apis():
             note_list = note_list[:require_num]
         return success, msg, note_list
 
+    @coalesced
     def get_user_info(self, user_id: str, cookies_str: str, proxies: dict = None):
         """
             获取用户的信息
@@ -117,7 +216,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -135,7 +234,7 @@ class XHS_Apis():
         try:
             api = f"/api/sns/web/v1/user/selfinfo"
             headers, cookies, data = generate_request_params(cookies_str, api)
-            response = requests.get(self.base_url + api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -154,7 +253,7 @@ class XHS_Apis():
         try:
             api = f"/api/sns/web/v2/user/me"
             headers, cookies, data = generate_request_params(cookies_str, api)
-            response = requests.get(self.base_url + api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -162,6 +261,7 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
+    @coalesced
     def get_user_note_info(self, user_id: str, cursor: str, cookies_str: str, xsec_token='', xsec_source='', proxies: dict = None):
         """
             获取用户指定位置的笔记
@@ -181,15 +281,26 @@ class XHS_Apis():
                 "xsec_source": xsec_source,
             }
 
-            # 先尝试 v2 接口，再回退到 v1
+            # 默认先尝试 v2 接口，再回退到 v1；该账号最近一次可用的接口记录在 capability_cache 中，优先使用
             last_status = None
             last_preview = None
+            account_key = get_account_key(cookies_str)
+            preferred = None
+            if self.capability_cache is not None:
+                preferred = self.capability_cache.get(account_key, "user_posted_api")
+            apis = sorted(self.USER_POSTED_APIS, key=lambda api: api != preferred)
 
-            for api in ["/api/sns/web/v2/user_posted", "/api/sns/web/v1/user_posted"]:
+            for idx, api in enumerate(apis):
                 splice_api = splice_str(api, params)
                 # 生成签名时仅使用路径，不带查询参数，尽量贴近浏览器行为
                 headers, cookies, data = generate_request_params(cookies_str, api)
-                response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+                try:
+                    response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
+                except CacheMissError as e:
+                    # 仅缓存模式下该变体未命中，继续尝试另一个接口变体
+                    success = False
+                    msg = str(e)
+                    continue
                 last_status = response.status_code
 
                 try:
@@ -223,22 +334,24 @@ class XHS_Apis():
                     last_preview = res_json
 
                 if success:
-                    if api.endswith("/v2/user_posted"):
+                    if api != preferred:
+                        if self.capability_cache is not None:
+                            self.capability_cache.set(account_key, "user_posted_api", api)
                         logger.info(
-                            f"get_user_note_info 使用 v2 接口成功: user_id={user_id}, cursor={cursor}, "
+                            f"get_user_note_info 使用 {api} 成功: user_id={user_id}, cursor={cursor}, "
                             f"status={response.status_code}"
                         )
                     return success, msg, res_json
 
-                # v2 失败再试 v1，其它情况直接跳出循环
-                if api.endswith("/v2/user_posted"):
+                # 第一个接口失败再试另一个，其它情况直接跳出循环
+                if idx == 0:
                     logger.warning(
-                        f"get_user_note_info v2 接口返回失败，将尝试回退到 v1: "
+                        f"get_user_note_info {api} 返回失败，将尝试回退到 {apis[1]}: "
                         f"user_id={user_id}, cursor={cursor}, status={response.status_code}, msg={msg}, preview={last_preview}"
                     )
                     continue
                 else:
-                    # v1 也失败，结束循环
+                    # 两个接口都失败，结束循环
                     break
 
             # 走到这里说明 v2/v1 都失败了
@@ -254,15 +367,18 @@ class XHS_Apis():
         return success, msg, res_json
 
 
-    def get_user_all_notes(self, user_url: str, cookies_str: str, proxies: dict = None):
+    def get_user_all_notes(self, user_url: str, cookies_str: str, proxies: dict = None, checkpoint=None, seen_index=None):
         """
            获取用户所有笔记
            :param user_url: 用户主页的完整链接（建议直接从浏览器复制）
            :param cookies_str: 你的cookies
+           :param checkpoint: 可选的 CursorCheckpoint，定期保存 cursor，失败后再次调用时从断点继续
+           :param seen_index: 可选的 SeenNoteIndex，增量模式：某一页的笔记全部已知时停止翻页
            返回用户的所有笔记
         """
         cursor = ""
         note_list = []
+        user_id = ""
         success = True
         msg = ""
         try:
@@ -297,10 +413,19 @@ class XHS_Apis():
 
             xsec_token = kv_dist.get("xsec_token", "")
             xsec_source = kv_dist.get("xsec_source", "pc_user")
+            # 该账号此前 origin_source 失败、回退为 pc_user 成功过时，有效期内直接使用 pc_user
+            account_key = get_account_key(cookies_str)
+            source_capability = f"user_posted_source:{xsec_source}"
+            if self.capability_cache is not None and xsec_source != "pc_user":
+                xsec_source = self.capability_cache.get(account_key, source_capability) or xsec_source
+            cached_source = xsec_source != kv_dist.get("xsec_source", "pc_user")
 
             if not xsec_token:
                 logger.warning(f"user_url 中缺少 xsec_token，将使用空 token 调用接口: {user_url}")
 
+            if checkpoint is not None:
+                cursor, note_list = checkpoint.load("user_posted", user_id)
+
             while True:
                 success, msg, res_json = self.get_user_note_info(
                     user_id, cursor, cookies_str, xsec_token, xsec_source, proxies
@@ -324,6 +449,8 @@ class XHS_Apis():
                         success, msg, res_json = self.get_user_note_info(
                             user_id, cursor, cookies_str, xsec_token, xsec_source, proxies
                         )
+                        if success and self.capability_cache is not None:
+                            self.capability_cache.set(account_key, source_capability, xsec_source)
                         if not success:
                             logger.error(
                                 f"get_user_note_info 回退为 pc_user 仍然失败: user_id={user_id}, cursor={cursor}, "
@@ -331,6 +458,9 @@ class XHS_Apis():
                             )
                             break
 
+                    if not success and cached_source:
+                        # 缓存的 xsec_source 也失效了，下次重新从原始的 xsec_source 开始尝试
+                        self.capability_cache.forget(account_key, source_capability)
                     if not success and not fallback_used:
                         logger.error(
                             f"get_user_note_info 调用失败: user_id={user_id}, cursor={cursor}, "
@@ -351,6 +481,14 @@ class XHS_Apis():
 
                 note_list.extend(notes)
 
+                if seen_index is not None and notes:
+                    page_ids = [note.get("note_id") for note in notes]
+                    if len(seen_index.known(page_ids)) == len(set(page_ids)):
+                        logger.info(
+                            f"用户 {user_id} 增量爬取结束：本页笔记均已爬取过，累计 {len(note_list)} 条笔记"
+                        )
+                        break
+
                 if "cursor" in data:
                     cursor = str(data["cursor"])
                 else:
@@ -359,6 +497,9 @@ class XHS_Apis():
                     )
                     break
 
+                if checkpoint is not None:
+                    checkpoint.step("user_posted", user_id, cursor, note_list)
+
                 if len(notes) == 0 or not data.get("has_more", False):
                     logger.info(
                         f"用户 {user_id} 全集爬取结束：has_more=False 或本次无新笔记，累计 {len(note_list)} 条笔记"
@@ -368,6 +509,8 @@ class XHS_Apis():
             success = False
             msg = str(e)
             logger.error(f"get_user_all_notes 执行异常: url={user_url}, error={e}")
+        if checkpoint is not None and user_id:
+            checkpoint.finish("user_posted", user_id, success, cursor, note_list)
         return success, msg, note_list
 
     def get_user_like_note_info(self, user_id: str, cursor: str, cookies_str: str, xsec_token='', xsec_source='', proxies: dict = None):
@@ -391,7 +534,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -454,7 +597,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -496,6 +639,7 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, note_list
 
+    @coalesced
     def get_note_info(self, url: str, cookies_str: str, proxies: dict = None):
         """
             获取笔记的详细
@@ -506,15 +650,7 @@ class XHS_Apis():
         """
         res_json = None
         try:
-            urlParse = urllib.parse.urlparse(url)
-            note_id = urlParse.path.split("/")[-1]
-
-            kv_dist = {}
-            if urlParse.query:
-                for kv in urlParse.query.split("&"):
-                    if "=" in kv:
-                        key, value = kv.split("=", 1)
-                        kv_dist[key] = value
+            note_id, kv_dist = parse_note_url(url)
 
             api = f"/api/sns/web/v1/feed"
             data = {
@@ -534,7 +670,7 @@ class XHS_Apis():
                 data["xsec_token"] = kv_dist["xsec_token"]
 
             headers, cookies, data = generate_request_params(cookies_str, api, data)
-            response = requests.post(self.base_url + api, headers=headers, data=data, cookies=cookies, proxies=proxies)
+            response = self._request('POST', api, headers=headers, data=data, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -543,6 +679,7 @@ class XHS_Apis():
         return success, msg, res_json
 
 
+    @coalesced
     def get_search_keyword(self, word: str, cookies_str: str, proxies: dict = None):
         """
             获取搜索关键词
@@ -558,7 +695,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -566,6 +703,7 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
+    @coalesced
     def search_note(self, query: str, cookies_str: str, page=1, sort_type_choice=0, note_type=0, note_time=0, note_range=0, pos_distance=0, geo="", proxies: dict = None):
         """
             获取搜索笔记的结果
@@ -665,7 +803,7 @@ class XHS_Apis():
                 ]
             }
             headers, cookies, data = generate_request_params(cookies_str, api, data)
-            response = requests.post(self.base_url + api, headers=headers, data=data.encode('utf-8'), cookies=cookies, proxies=proxies)
+            response = self._request('POST', api, headers=headers, data=data.encode('utf-8'), cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -673,7 +811,7 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def search_some_note(self, query: str, require_num: int, cookies_str: str, sort_type_choice=0, note_type=0, note_time=0, note_range=0, pos_distance=0, geo="", proxies: dict = None):
+    def search_some_note(self, query: str, require_num: int, cookies_str: str, sort_type_choice=0, note_type=0, note_time=0, note_range=0, pos_distance=0, geo="", proxies: dict = None, max_workers: int = 1, rate_limiter=None):
         """
             指定数量搜索笔记，设置排序方式和笔记类型和笔记数量
             :param query 搜索的关键词
@@ -685,28 +823,14 @@ class XHS_Apis():
             :param note_range 笔记范围 0 不限, 1 已看过, 2 未看过, 3 已关注
             :param pos_distance 位置距离 0 不限, 1 同城, 2 附近 指定这个必须要指定 geo
             :param geo: 定位信息 经纬度
+            :param max_workers: 同时请求的页数，大于 1 时每轮并发请求多个连续页码
+            :param rate_limiter: 可选的频率限制器，每个请求前调用 wait()
             返回搜索的结果
         """
-        page = 1
-        note_list = []
-        try:
-            while True:
-                success, msg, res_json = self.search_note(query, cookies_str, page, sort_type_choice, note_type, note_time, note_range, pos_distance, geo, proxies)
-                if not success:
-                    raise Exception(msg)
-                if "items" not in res_json["data"]:
-                    break
-                notes = res_json["data"]["items"]
-                note_list.extend(notes)
-                page += 1
-                if len(note_list) >= require_num or not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        if len(note_list) > require_num:
-            note_list = note_list[:require_num]
-        return success, msg, note_list
+        return self._fetch_pages(
+            lambda page: self.search_note(query, cookies_str, page, sort_type_choice, note_type, note_time, note_range, pos_distance, geo, proxies),
+            "items", require_num, 20, max_workers, rate_limiter,
+        )
 
     def search_user(self, query: str, cookies_str: str, page=1, proxies: dict = None):
         """
@@ -730,7 +854,7 @@ class XHS_Apis():
                 }
             }
             headers, cookies, data = generate_request_params(cookies_str, api, data)
-            response = requests.post(self.base_url + api, headers=headers, data=data.encode('utf-8'), cookies=cookies, proxies=proxies)
+            response = self._request('POST', api, headers=headers, data=data.encode('utf-8'), cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -738,35 +862,22 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def search_some_user(self, query: str, require_num: int, cookies_str: str, proxies: dict = None):
+    def search_some_user(self, query: str, require_num: int, cookies_str: str, proxies: dict = None, max_workers: int = 1, rate_limiter=None):
         """
             指定数量搜索用户
             :param query 搜索的关键词
             :param require_num 搜索的数量
             :param cookies_str 你的cookies
+            :param max_workers: 同时请求的页数，大于 1 时每轮并发请求多个连续页码
+            :param rate_limiter: 可选的频率限制器，每个请求前调用 wait()
             返回搜索的结果
         """
-        page = 1
-        user_list = []
-        try:
-            while True:
-                success, msg, res_json = self.search_user(query, cookies_str, page, proxies)
-                if not success:
-                    raise Exception(msg)
-                if "users" not in res_json["data"]:
-                    break
-                users = res_json["data"]["users"]
-                user_list.extend(users)
-                page += 1
-                if len(user_list) >= require_num or not res_json["data"]["has_more"]:
-                    break
-        except Exception as e:
-            success = False
-            msg = str(e)
-        if len(user_list) > require_num:
-            user_list = user_list[:require_num]
-        return success, msg, user_list
+        return self._fetch_pages(
+            lambda page: self.search_user(query, cookies_str, page, proxies),
+            "users", require_num, 15, max_workers, rate_limiter,
+        )
 
+    @coalesced
     def get_note_out_comment(self, note_id: str, cursor: str, xsec_token: str, cookies_str: str, proxies: dict = None):
         """
             获取指定位置的笔记一级评论
@@ -787,7 +898,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -795,17 +906,27 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def get_note_all_out_comment(self, note_id: str, xsec_token: str, cookies_str: str, proxies: dict = None):
+    def get_note_all_out_comment(self, note_id: str, xsec_token: str, cookies_str: str, proxies: dict = None, checkpoint=None, budget=None, rate_limiter=None):
         """
             获取笔记的全部一级评论
             :param note_id 笔记的id
             :param cookies_str 你的cookies
+            :param rate_limiter 可选的频率限制器，每翻一页前调用 wait()
+            :param checkpoint 可选的 CursorCheckpoint，定期保存 cursor，失败后再次调用时从断点继续
+            :param budget 可选的 CommentBudget，一级评论数、请求次数或时间用尽时提前结束（视为成功）
             返回笔记的全部一级评论
         """
+        success, msg = True, 'success'
         cursor = ''
         note_out_comment_list = []
+        if checkpoint is not None:
+            cursor, note_out_comment_list = checkpoint.load("comment_page", note_id)
         try:
             while True:
+                if budget is not None and not budget.take_request():
+                    break
+                if rate_limiter is not None:
+                    rate_limiter.wait()
                 success, msg, res_json = self.get_note_out_comment(note_id, cursor, xsec_token, cookies_str, proxies)
                 if not success:
                     raise Exception(msg)
@@ -814,12 +935,20 @@ class XHS_Apis():
                     cursor = str(res_json["data"]["cursor"])
                 else:
                     break
+                if budget is not None:
+                    comments = [comment for comment in comments if budget.take_top()]
                 note_out_comment_list.extend(comments)
+                if checkpoint is not None:
+                    checkpoint.step("comment_page", note_id, cursor, note_out_comment_list)
                 if len(note_out_comment_list) == 0 or not res_json["data"]["has_more"]:
                     break
+                if budget is not None and budget.top_full():
+                    break
         except Exception as e:
             success = False
             msg = str(e)
+        if checkpoint is not None:
+            checkpoint.finish("comment_page", note_id, success, cursor, note_out_comment_list)
         return success, msg, note_out_comment_list
 
     def get_note_inner_comment(self, comment: dict, cursor: str, xsec_token: str, cookies_str: str, proxies: dict = None):
@@ -844,7 +973,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -852,19 +981,31 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def get_note_all_inner_comment(self, comment: dict, xsec_token: str, cookies_str: str, proxies: dict = None):
+    def get_note_all_inner_comment(self, comment: dict, xsec_token: str, cookies_str: str, proxies: dict = None, rate_limiter=None, budget=None):
         """
             获取笔记的全部二级评论
             :param comment 笔记的一级评论
             :param cookies_str 你的cookies
+            :param rate_limiter 可选的频率限制器，每翻一页前调用 wait()
+            :param budget 可选的 CommentBudget，回复数、请求次数或时间用尽时提前结束（视为成功）
             返回笔记的全部二级评论
         """
+        success, msg = True, 'success'
         try:
+            if budget is not None and budget.max_replies:
+                del comment['sub_comments'][budget.max_replies:]
             if not comment['sub_comment_has_more']:
                 return True, 'success', comment
             cursor = comment['sub_comment_cursor']
             inner_comment_list = []
             while True:
+                if budget is not None:
+                    if not budget.replies_allowed(len(comment['sub_comments']) + len(inner_comment_list)):
+                        break
+                    if not budget.take_request():
+                        break
+                if rate_limiter is not None:
+                    rate_limiter.wait()
                 success, msg, res_json = self.get_note_inner_comment(comment, cursor, xsec_token, cookies_str, proxies)
                 if not success:
                     raise Exception(msg)
@@ -876,17 +1017,22 @@ class XHS_Apis():
                 inner_comment_list.extend(comments)
                 if not res_json["data"]["has_more"]:
                     break
+            if budget is not None and budget.max_replies:
+                del inner_comment_list[max(budget.max_replies - len(comment['sub_comments']), 0):]
             comment['sub_comments'].extend(inner_comment_list)
         except Exception as e:
             success = False
             msg = str(e)
         return success, msg, comment
 
-    def get_note_all_comment(self, url: str, cookies_str: str, proxies: dict = None):
+    def get_note_all_comment(self, url: str, cookies_str: str, proxies: dict = None, max_workers: int = 1, rate_limiter=None, budget=None):
         """
             获取一篇文章的所有评论
             :param note_id: 你想要获取的笔记的id
             :param cookies_str: 你的cookies
+            :param max_workers: 并发获取二级评论的线程数，每个一级评论的翻页仍按 cursor 顺序进行
+            :param rate_limiter: 可选的频率限制器，一级评论和二级评论的每一页请求前都调用 wait()，所有线程共用
+            :param budget: 可选的 CommentBudget，只取前 N 条一级评论、每条前 M 条回复，并限制请求次数和耗时
             返回一篇文章的所有评论
         """
         out_comment_list = []
@@ -895,18 +1041,99 @@ class XHS_Apis():
             note_id = urlParse.path.split("/")[-1]
             kvs = urlParse.query.split('&')
             kvDist = {kv.split('=')[0]: kv.split('=')[1] for kv in kvs}
-            success, msg, out_comment_list = self.get_note_all_out_comment(note_id, kvDist['xsec_token'], cookies_str, proxies)
+            success, msg, out_comment_list = self.get_note_all_out_comment(note_id, kvDist['xsec_token'], cookies_str, proxies, budget=budget, rate_limiter=rate_limiter)
+            if not success:
+                raise Exception(msg)
+            # 只有还有更多二级评论的一级评论需要翻页，结果直接写回各自的 sub_comments；
+            # 有回复数上限时每条一级评论都要经过一次截断
+            if budget is not None and budget.max_replies:
+                pending = out_comment_list
+            else:
+                pending = [comment for comment in out_comment_list if comment.get('sub_comment_has_more')]
+            with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as executor:
+                futures = [
+                    executor.submit(self.get_note_all_inner_comment, comment, kvDist['xsec_token'], cookies_str, proxies, rate_limiter, budget)
+                    for comment in pending
+                ]
+                for future in futures:
+                    inner_success, inner_msg, new_comment = future.result()
+                    if not inner_success and success:
+                        success, msg = inner_success, inner_msg
             if not success:
                 raise Exception(msg)
-            for comment in out_comment_list:
-                success, msg, new_comment = self.get_note_all_inner_comment(comment, kvDist['xsec_token'], cookies_str, proxies)
-                if not success:
-                    raise Exception(msg)
         except Exception as e:
             success = False
             msg = str(e)
         return success, msg, out_comment_list
 
+    def iter_note_inner_comment(self, comment: dict, xsec_token: str, cookies_str: str, proxies: dict = None, rate_limiter=None, budget=None, yielded: int = 0):
+        """
+            逐页获取一条一级评论剩余的二级评论，以生成器的形式逐条返回
+            :param comment 笔记的一级评论
+            :param cookies_str 你的cookies
+            :param budget 可选的 CommentBudget，回复数、请求次数或时间用尽时停止
+            :param yielded 这条一级评论已经返回过的回复数（一级评论自带的 sub_comments）
+            接口失败时抛出异常
+        """
+        if not comment.get('sub_comment_has_more'):
+            return
+        cursor = comment['sub_comment_cursor']
+        while True:
+            if budget is not None and (not budget.replies_allowed(yielded) or not budget.take_request()):
+                return
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = self.get_note_inner_comment(comment, cursor, xsec_token, cookies_str, proxies)
+            if not success:
+                raise Exception(msg)
+            for sub_comment in res_json["data"]["comments"]:
+                if budget is not None and not budget.replies_allowed(yielded):
+                    return
+                yield sub_comment
+                yielded += 1
+            if 'cursor' not in res_json["data"]:
+                break
+            cursor = str(res_json["data"]["cursor"])
+            if not res_json["data"]["has_more"]:
+                break
+
+    def iter_note_comments(self, url: str, cookies_str: str, proxies: dict = None, rate_limiter=None, budget=None):
+        """
+            逐页获取一篇笔记的全部评论，以生成器的形式按 一级评论 -> 其二级评论 的顺序逐条返回，
+            不在内存中保留整篇笔记的评论，适合评论量很大的笔记
+            :param url: 笔记的url
+            :param cookies_str: 你的cookies
+            :param rate_limiter: 可选的频率限制器，每翻一页前调用 wait()
+            :param budget: 可选的 CommentBudget，只取前 N 条一级评论、每条前 M 条回复，并限制请求次数和耗时
+            接口失败时抛出异常
+        """
+        note_id, kv_dist = parse_note_url(url)
+        xsec_token = kv_dist.get('xsec_token', '')
+        cursor = ''
+        while True:
+            if budget is not None and not budget.take_request():
+                return
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = self.get_note_out_comment(note_id, cursor, xsec_token, cookies_str, proxies)
+            if not success:
+                raise Exception(msg)
+            data = res_json["data"]
+            for comment in data["comments"]:
+                if budget is not None and not budget.take_top():
+                    return
+                yield comment
+                sub_comments = comment.get('sub_comments') or []
+                if budget is not None and budget.max_replies:
+                    sub_comments = sub_comments[:budget.max_replies]
+                yield from sub_comments
+                yield from self.iter_note_inner_comment(comment, xsec_token, cookies_str, proxies, rate_limiter, budget, len(sub_comments))
+            if 'cursor' not in data:
+                break
+            cursor = str(data["cursor"])
+            if not data["has_more"]:
+                break
+
     def get_unread_message(self, cookies_str: str, proxies: dict = None):
         """
             获取未读消息
@@ -917,7 +1144,7 @@ class XHS_Apis():
         try:
             api = "/api/sns/web/unread_count"
             headers, cookies, data = generate_request_params(cookies_str, api)
-            response = requests.get(self.base_url + api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -941,7 +1168,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -949,14 +1176,18 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def get_all_metions(self, cookies_str: str, proxies: dict = None):
+    def get_all_metions(self, cookies_str: str, proxies: dict = None, checkpoint=None):
         """
             获取全部的评论和@提醒
             :param cookies_str: 你的cookies
+            :param checkpoint: 可选的 CursorCheckpoint，定期保存 cursor，失败后再次调用时从断点继续
             返回全部的评论和@提醒
         """
         cursor = ''
         metions_list = []
+        account_key = get_account_key(cookies_str)
+        if checkpoint is not None:
+            cursor, metions_list = checkpoint.load("mentions", account_key)
         try:
             while True:
                 success, msg, res_json = self.get_metions(cursor, cookies_str, proxies)
@@ -968,11 +1199,15 @@ class XHS_Apis():
                 else:
                     break
                 metions_list.extend(metions)
+                if checkpoint is not None:
+                    checkpoint.step("mentions", account_key, cursor, metions_list)
                 if not res_json["data"]["has_more"]:
                     break
         except Exception as e:
             success = False
             msg = str(e)
+        if checkpoint is not None:
+            checkpoint.finish("mentions", account_key, success, cursor, metions_list)
         return success, msg, metions_list
 
     def get_likesAndcollects(self, cursor: str, cookies_str: str, proxies: dict = None):
@@ -991,7 +1226,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -999,14 +1234,18 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def get_all_likesAndcollects(self, cookies_str: str, proxies: dict = None):
+    def get_all_likesAndcollects(self, cookies_str: str, proxies: dict = None, checkpoint=None):
         """
             获取全部的赞和收藏
             :param cookies_str: 你的cookies
+            :param checkpoint: 可选的 CursorCheckpoint，定期保存 cursor，失败后再次调用时从断点继续
             返回全部的赞和收藏
         """
         cursor = ''
         likesAndcollects_list = []
+        account_key = get_account_key(cookies_str)
+        if checkpoint is not None:
+            cursor, likesAndcollects_list = checkpoint.load("likes", account_key)
         try:
             while True:
                 success, msg, res_json = self.get_likesAndcollects(cursor, cookies_str, proxies)
@@ -1018,11 +1257,15 @@ class XHS_Apis():
                 else:
                     break
                 likesAndcollects_list.extend(likesAndcollects)
+                if checkpoint is not None:
+                    checkpoint.step("likes", account_key, cursor, likesAndcollects_list)
                 if not res_json["data"]["has_more"]:
                     break
         except Exception as e:
             success = False
             msg = str(e)
+        if checkpoint is not None:
+            checkpoint.finish("likes", account_key, success, cursor, likesAndcollects_list)
         return success, msg, likesAndcollects_list
 
     def get_new_connections(self, cursor: str, cookies_str: str, proxies: dict = None):
@@ -1041,7 +1284,7 @@ class XHS_Apis():
             }
             splice_api = splice_str(api, params)
             headers, cookies, data = generate_request_params(cookies_str, splice_api)
-            response = requests.get(self.base_url + splice_api, headers=headers, cookies=cookies, proxies=proxies)
+            response = self._request('GET', splice_api, headers=headers, cookies=cookies, proxies=proxies)
             res_json = response.json()
             success, msg = res_json["success"], res_json["msg"]
         except Exception as e:
@@ -1049,14 +1292,18 @@ class XHS_Apis():
             msg = str(e)
         return success, msg, res_json
 
-    def get_all_new_connections(self, cookies_str: str, proxies: dict = None):
+    def get_all_new_connections(self, cookies_str: str, proxies: dict = None, checkpoint=None):
         """
             获取全部的新增关注
             :param cookies_str: 你的cookies
+            :param checkpoint: 可选的 CursorCheckpoint，定期保存 cursor，失败后再次调用时从断点继续
             返回全部的新增关注
         """
         cursor = ''
         connections_list = []
+        account_key = get_account_key(cookies_str)
+        if checkpoint is not None:
+            cursor, connections_list = checkpoint.load("connections", account_key)
         try:
             while True:
                 success, msg, res_json = self.get_new_connections(cursor, cookies_str, proxies)
@@ -1068,11 +1315,15 @@ class XHS_Apis():
                 else:
                     break
                 connections_list.extend(connections)
+                if checkpoint is not None:
+                    checkpoint.step("connections", account_key, cursor, connections_list)
                 if not res_json["data"]["has_more"]:
                     break
         except Exception as e:
             success = False
             msg = str(e)
+        if checkpoint is not None:
+            checkpoint.finish("connections", account_key, success, cursor, connections_list)
         return success, msg, connections_list
 
     @staticmethod
@@ -1,8 +1,13 @@
 import threading
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, Iterable, Optional
 
 from gui_app.rate_limiter import RateLimiter
 from main import Data_Spider
+from xhs_utils.comment_util import CommentBudget
+from xhs_utils.dedup import open_note_deduper
+from xhs_utils.frontier import open_frontier
+from xhs_utils.profile_cache import ProfileCache
+from xhs_utils.snapshot_store import SnapshotStore
 
 
 class SpiderController:
@@ -13,12 +18,16 @@ class SpiderController:
         self.spider = Data_Spider()
         self._worker: Optional[threading.Thread] = None
 
+    def set_cookie_pool(self, cookie_pool) -> None:
+        """Route every request of running and future tasks through a shared CookiePool."""
+        self.spider.set_cookie_pool(cookie_pool)
+
     def is_busy(self) -> bool:
         return self._worker is not None and self._worker.is_alive()
 
     def run_notes_task(
         self,
-        note_urls: List[str],
+        note_urls: Iterable[str],
         cookies: str,
         base_paths: Dict[str, str],
         save_choice: str,
@@ -26,21 +35,33 @@ class SpiderController:
         proxies: Optional[Dict[str, str]] = None,
         rate_limiter: Optional[RateLimiter] = None,
         max_notes: Optional[int] = None,
+        resume: bool = False,
+        enrich_author: bool = False,
     ) -> bool:
-        return self._start_task(
-            '批量笔记任务',
-            lambda: self.spider.spider_some_note(
-                note_urls,
-                cookies,
-                base_paths,
-                save_choice,
-                excel_name,
-                proxies,
-                rate_limiter,
-                self.log_callback,
-                max_notes=max_notes,
-            ),
-        )
+        def notes_task() -> None:
+            profile_cache = ProfileCache(self.spider.xhs_apis) if enrich_author else None
+            frontier = open_frontier(f'notes:{excel_name}', resume)
+            try:
+                self.spider.spider_some_note(
+                    note_urls,
+                    cookies,
+                    base_paths,
+                    save_choice,
+                    excel_name,
+                    proxies,
+                    rate_limiter,
+                    self.log_callback,
+                    max_notes=max_notes,
+                    frontier=frontier,
+                    deduper=open_note_deduper(),
+                    profile_cache=profile_cache,
+                )
+            finally:
+                frontier.close()
+                if profile_cache is not None:
+                    profile_cache.close()
+
+        return self._start_task('批量笔记任务', notes_task)
 
     def run_user_task(
         self,
@@ -53,22 +74,26 @@ class SpiderController:
         rate_limiter: Optional[RateLimiter] = None,
         scroll_times: Optional[int] = None,
         max_notes: Optional[int] = None,
+        resume: bool = False,
     ) -> bool:
-        return self._start_task(
-            '用户全集任务 (Selenium 模式)',
-            lambda: self.spider.spider_user_all_note_selenium(
-                user_url,
-                cookies,
-                base_paths,
-                save_choice,
-                excel_name,
-                proxies,
-                rate_limiter,
-                self.log_callback,
-                max_notes=max_notes,
-                max_scroll_times=scroll_times,
-            ),
-        )
+        def user_task() -> None:
+            with open_frontier(f'user:{user_url.split("?")[0]}', resume) as frontier:
+                self.spider.spider_user_all_note_selenium(
+                    user_url,
+                    cookies,
+                    base_paths,
+                    save_choice,
+                    excel_name,
+                    proxies,
+                    rate_limiter,
+                    self.log_callback,
+                    max_notes=max_notes,
+                    max_scroll_times=scroll_times,
+                    frontier=frontier,
+                    deduper=open_note_deduper(),
+                )
+
+        return self._start_task('用户全集任务 (Selenium 模式)', user_task)
 
     def run_search_task(
         self,
@@ -86,29 +111,97 @@ class SpiderController:
         proxies: Optional[Dict[str, str]] = None,
         rate_limiter: Optional[RateLimiter] = None,
         max_notes: Optional[int] = None,
+        resume: bool = False,
+        max_workers: int = 1,
+        deep_search: bool = False,
+        snapshot: bool = False,
+        deep_max_workers: int = 4,
     ) -> bool:
         effective_num = query_num
         if max_notes and max_notes > 0:
             effective_num = min(query_num, max_notes)
 
+        if deep_search:
+            def deep_search_task() -> None:
+                snapshot_store = SnapshotStore() if snapshot else None
+                frontier = open_frontier(f'search:{query}', resume)
+                try:
+                    self.spider.spider_deep_search_note(
+                        query,
+                        effective_num,
+                        cookies,
+                        base_paths,
+                        save_choice,
+                        pos_distance=pos_distance,
+                        geo=geo,
+                        proxies=proxies,
+                        rate_limiter=rate_limiter,
+                        progress_callback=self.log_callback,
+                        frontier=frontier,
+                        deduper=open_note_deduper(),
+                        max_workers=max(int(deep_max_workers), 1),
+                        snapshot_store=snapshot_store,
+                    )
+                finally:
+                    frontier.close()
+                    if snapshot_store is not None:
+                        snapshot_store.close()
+
+            return self._start_task('深度搜索任务', deep_search_task)
+
+        def search_task() -> None:
+            snapshot_store = SnapshotStore() if snapshot else None
+            frontier = open_frontier(f'search:{query}', resume)
+            try:
+                self.spider.spider_some_search_note(
+                    query,
+                    effective_num,
+                    cookies,
+                    base_paths,
+                    save_choice,
+                    sort_type,
+                    note_type,
+                    note_time,
+                    note_range,
+                    pos_distance,
+                    geo,
+                    excel_name='',
+                    proxies=proxies,
+                    rate_limiter=rate_limiter,
+                    progress_callback=self.log_callback,
+                    frontier=frontier,
+                    deduper=open_note_deduper(),
+                    max_workers=max_workers,
+                    snapshot_store=snapshot_store,
+                )
+            finally:
+                frontier.close()
+                if snapshot_store is not None:
+                    snapshot_store.close()
+
+        return self._start_task('搜索任务', search_task)
+
+    def run_comments_task(
+        self,
+        note_url: str,
+        cookies: str,
+        base_paths: Dict[str, str],
+        excel_name: str = '',
+        proxies: Optional[Dict[str, str]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        budget: Optional[CommentBudget] = None,
+    ) -> bool:
         return self._start_task(
-            '搜索任务',
-            lambda: self.spider.spider_some_search_note(
-                query,
-                effective_num,
+            '评论导出任务',
+            lambda: self.spider.spider_note_comments(
+                note_url,
                 cookies,
                 base_paths,
-                save_choice,
-                sort_type,
-                note_type,
-                note_time,
-                note_range,
-                pos_distance,
-                geo,
-                excel_name='',
+                excel_name,
                 proxies=proxies,
                 rate_limiter=rate_limiter,
                 progress_callback=self.log_callback,
+                budget=budget,
             ),
         )
 
@@ -1,10 +1,11 @@
 from collections import deque
+import threading
 import time
 from typing import Deque, Optional
 
 
 class RateLimiter:
-    """Simple rate limiter to control API call frequency."""
+    """Simple rate limiter to control API call frequency. Safe to share between worker threads."""
 
     def __init__(self, max_per_window: Optional[int], window_seconds: int = 600, min_interval: float = 0.0) -> None:
         self.max_per_window = max_per_window if max_per_window and max_per_window > 0 else None
@@ -12,8 +13,14 @@ class RateLimiter:
         self.min_interval = max(min_interval, 0.0)
         self._call_times: Deque[float] = deque()
         self._last_call: float = 0.0
+        self._lock = threading.Lock()
 
     def wait(self) -> None:
+        # Callers queue up on the lock so concurrent workers are spaced like serial ones.
+        with self._lock:
+            self._wait_locked()
+
+    def _wait_locked(self) -> None:
         now = time.time()
         # enforce minimum interval
         if self.min_interval > 0 and self._last_call > 0:
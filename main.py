@@ -1,14 +1,40 @@
+import itertools
 import json
 import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
 from loguru import logger
 from apis.xhs_pc_apis import XHS_Apis
 from xhs_utils.common_util import init
-from xhs_utils.data_util import handle_note_info, download_note, save_to_xlsx
+from xhs_utils.data_util import handle_note_info, handle_comment_info, handle_user_info, download_note, download_user, norm_str, XlsxStreamWriter
+from xhs_utils.frontier import PENDING, FETCHED, MEDIA_DONE
+from xhs_utils.url_util import parse_note_url, parse_user_id
+from xhs_utils.comment_util import BatchCommentCrawler
+from xhs_utils.search_util import deep_search_note, geo_sweep_search_note, expand_keyword_notes
+from xhs_utils.homefeed_util import sample_homefeed
+from xhs_utils.snapshot_store import snapshot_entries
+from xhs_utils.watchlist import KeywordWatcher
+from xhs_utils.notification_sync import sync_notifications
+from xhs_utils.profile_cache import enrich_note_author
 
 
 class Data_Spider():
-    def __init__(self):
+    def __init__(self, cookie_pool=None):
         self.xhs_apis = XHS_Apis()
+        self.cookie_pool = cookie_pool
+
+    def set_cookie_pool(self, cookie_pool):
+        """
+        设置 Cookies 池，运行中的任务会在下一次请求时切换到池中当前可用的 Cookies
+        """
+        self.cookie_pool = cookie_pool
+
+    def _resolve_cookies(self, cookies_str: str) -> str:
+        if self.cookie_pool is not None:
+            return self.cookie_pool.get()
+        return cookies_str
 
     @staticmethod
     def _apply_rate_limit(rate_limiter):
@@ -31,6 +57,7 @@ class Data_Spider():
         :return:
         """
         note_info = None
+        cookies_str = self._resolve_cookies(cookies_str)
         try:
             self._apply_rate_limit(rate_limiter)
             success, msg, res_json = self.xhs_apis.get_note_info(note_url, cookies_str, proxies)
@@ -49,70 +76,221 @@ class Data_Spider():
         except Exception as e:
             success = False
             msg = e
+        if self.cookie_pool is not None:
+            if success:
+                self.cookie_pool.report_success(cookies_str)
+            else:
+                self.cookie_pool.report_failure(cookies_str, msg)
         logger.info(f'爬取笔记信息 {note_url}: {success}, msg: {msg}')
         return success, msg, note_info
 
-    def spider_some_note(self, notes: list, cookies_str: str, base_path: dict, save_choice: str, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, max_notes: int | None = None):
+    def spider_user(self, user: str, cookies_str: str, proxies=None, rate_limiter=None):
+        """
+        爬取一个用户的主页信息
+        :param user: user_id 或用户主页链接
+        :param cookies_str:
+        :return: success, msg, user_info（handle_user_info 的结果）
+        """
+        user_info = None
+        user_id = parse_user_id(user)
+        cookies_str = self._resolve_cookies(cookies_str)
+        try:
+            self._apply_rate_limit(rate_limiter)
+            success, msg, res_json = self.xhs_apis.get_user_info(user_id, cookies_str, proxies)
+            if success:
+                data = (res_json or {}).get('data') or {}
+                if not data.get('basic_info'):
+                    success = False
+                    msg = "用户信息为空，可能用户不存在或权限受限"
+                else:
+                    user_info = handle_user_info(data, user_id)
+        except Exception as e:
+            success = False
+            msg = e
+        if self.cookie_pool is not None:
+            if success:
+                self.cookie_pool.report_success(cookies_str)
+            else:
+                self.cookie_pool.report_failure(cookies_str, msg)
+        logger.info(f'爬取用户信息 {user_id}: {success}, msg: {msg}')
+        return success, msg, user_info
+
+    def spider_some_user(self, users: Iterable[str], cookies_str: str, base_path: dict, save_choice: str = 'excel', excel_name: str = 'users', proxies=None, rate_limiter=None, progress_callback=None, max_workers: int = 4, max_users: int | None = None):
+        """
+        批量爬取用户主页信息：users 按需读取，最多 max_workers 个请求并发进行（共用 rate_limiter），
+        结果按输入顺序经 handle_user_info 处理后流式写入 Excel 和/或用户目录下的 detail.txt
+        :param users: user_id 或用户主页链接的可迭代对象，可以是惰性读取的大文件
+        :param save_choice: excel 只写 Excel，detail 只保存用户目录，all 两者都保存
+        :return: 成功的用户数量, success, msg
+        """
+        if max_users and max_users > 0:
+            users = itertools.islice(users, max_users)
+        writer = None
+        if save_choice in ('all', 'excel'):
+            file_path = os.path.abspath(os.path.join(base_path['excel'], f'{excel_name}.xlsx'))
+            writer = XlsxStreamWriter(file_path, type='user')
+        count = 0
+        success, msg = True, ''
+        window = deque()
+        seen = set()
+
+        def user_ids():
+            for user in users:
+                user_id = parse_user_id(user)
+                if user_id and user_id not in seen:
+                    seen.add(user_id)
+                    yield user_id
+
+        user_iter = user_ids()
+        try:
+            with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as executor:
+                # 只保持有限个请求在途，既能并发又按输入顺序输出，内存占用不随用户数量增长
+                for idx in itertools.count(1):
+                    while len(window) < max(int(max_workers), 1) * 2:
+                        user_id = next(user_iter, None)
+                        if user_id is None:
+                            break
+                        window.append((user_id, executor.submit(self.spider_user, user_id, cookies_str, proxies, rate_limiter)))
+                    if not window:
+                        break
+                    user_id, future = window.popleft()
+                    user_success, user_msg, user_info = future.result()
+                    if not user_success or user_info is None:
+                        self._emit_progress(progress_callback, f"[{idx}] 用户 {user_id} 获取失败: {user_msg}")
+                        continue
+                    count += 1
+                    self._emit_progress(progress_callback, f"[{idx}] {user_info['nickname']}")
+                    if writer is not None:
+                        writer.append(user_info)
+                    if save_choice in ('all', 'detail'):
+                        download_user(user_info, base_path['media'])
+        except Exception as e:
+            success = False
+            msg = e
+        finally:
+            if writer is not None:
+                writer.close()
+        logger.info(f'批量爬取用户信息: {count} 个用户, {success}, msg: {msg}')
+        return count, success, msg
+
+    def spider_some_note(self, notes: Iterable[str], cookies_str: str, base_path: dict, save_choice: str, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, max_notes: int | None = None, frontier=None, seen_index=None, deduper=None, refresh_scheduler=None, profile_cache=None):
         """
         爬取一些笔记的信息
-        :param notes:
+        笔记逐条流式处理：获取详情后立即下载媒体并写入 Excel，notes 可以是列表，也可以是惰性读取的大文件迭代器
+        :param notes: 笔记链接的列表或迭代器
         :param cookies_str:
         :param base_path:
+        :param max_notes: 最多请求成功的笔记数，去重跳过和断点续爬复用的笔记不计入
+        :param frontier: 可选的 CrawlFrontier，记录每条笔记的进度，已完成的笔记直接跳过
+        :param seen_index: 可选的 SeenNoteIndex，成功获取详情后记录 last_fetched
+        :param deduper: 可选的 NoteDeduper，按 note_id 丢弃重复的链接，在请求之前省掉重复工作
+        :param refresh_scheduler: 可选的 EngagementRefreshScheduler，成功获取详情的笔记登记到互动数据刷新队列
+        :param profile_cache: 可选的 ProfileCache，为每篇笔记补充作者的关注数、粉丝数、获赞和收藏数，同一作者只请求一次
         :return:
         """
         if (save_choice == 'all' or save_choice == 'excel') and excel_name == '':
             raise ValueError('excel_name 不能为空')
-        if max_notes and max_notes > 0:
-            notes = notes[:max_notes]
-        note_list = []
-        total = len(notes)
-        for idx, note_url in enumerate(notes, start=1):
-            success, msg, note_info = self.spider_note(note_url, cookies_str, proxies, rate_limiter)
-            title = None
-            if note_info is not None:
-                title = note_info.get('title', '无标题') or '无标题'
-            display_title = title or '无标题'
-            if note_info is not None and success:
-                note_list.append(note_info)
-                self._emit_progress(progress_callback, f"[{idx}/{total}] {display_title}")
-            else:
-                self._emit_progress(progress_callback, f"[{idx}/{total}] 下载失败: {msg}")
-        for note_info in note_list:
-            if save_choice == 'all' or 'media' in save_choice:
-                download_note(note_info, base_path['media'], save_choice)
+        total = len(notes) if hasattr(notes, '__len__') else None
+        # max_notes 只统计本次实际请求成功的笔记，去重跳过和断点续爬直接复用的笔记不占名额
+        limit = max_notes if max_notes and max_notes > 0 else None
+        fetched = 0
+        need_media = save_choice == 'all' or 'media' in save_choice
+        writer = None
         if save_choice == 'all' or save_choice == 'excel':
             file_path = os.path.abspath(os.path.join(base_path['excel'], f'{excel_name}.xlsx'))
-            save_to_xlsx(note_list, file_path)
+            writer = XlsxStreamWriter(file_path, type='note_author' if profile_cache is not None else 'note')
+        try:
+            for idx, note_url in enumerate(notes, start=1):
+                if limit is not None and fetched >= limit:
+                    break
+                position = f"[{idx}/{total}]" if total is not None else f"[{idx}]"
+                state, saved_info = (None, None)
+                if frontier is not None:
+                    frontier.add([note_url])
+                    state, saved_info = frontier.get(note_url)
+                # 断点续爬中已有记录的笔记交给 frontier 处理，其余笔记在请求前先去重
+                if deduper is not None and state in (None, PENDING) and not deduper.admit(note_url):
+                    self._emit_progress(progress_callback, f"{position} 重复笔记，已跳过")
+                    continue
+                if state in (FETCHED, MEDIA_DONE) and saved_info is not None:
+                    success, msg, note_info = True, '断点续爬，跳过请求', saved_info
+                else:
+                    success, msg, note_info = self.spider_note(note_url, cookies_str, proxies, rate_limiter)
+                    if note_info is not None and success:
+                        fetched += 1
+                    if frontier is not None:
+                        if note_info is not None and success:
+                            frontier.mark_fetched(note_url, note_info)
+                        else:
+                            frontier.mark_failed(note_url, msg)
+                    if seen_index is not None and note_info is not None and success:
+                        seen_index.mark_fetched(note_info['note_id'])
+                    if deduper is not None and note_info is not None and success:
+                        deduper.mark_done(note_url)
+                    if refresh_scheduler is not None and note_info is not None and success:
+                        refresh_scheduler.track(note_url, note_info)
+                if note_info is None or not success:
+                    self._emit_progress(progress_callback, f"{position} 下载失败: {msg}")
+                    continue
+                display_title = note_info.get('title', '无标题') or '无标题'
+                self._emit_progress(progress_callback, f"{position} {display_title}")
+                if profile_cache is not None:
+                    enrich_note_author(note_info, profile_cache, self._resolve_cookies(cookies_str), proxies, rate_limiter)
+                if need_media and state != MEDIA_DONE:
+                    try:
+                        download_note(note_info, base_path['media'], save_choice, proxies)
+                        if frontier is not None:
+                            frontier.mark_media_done(note_url)
+                    except Exception as e:
+                        # 单条笔记的媒体下载失败不影响后续笔记，frontier 中仍为 fetched，续爬时会重新下载
+                        logger.error(f'下载笔记媒体失败 {note_url}: {e}')
+                        self._emit_progress(progress_callback, f"{position} 媒体下载失败: {e}")
+                if writer is not None:
+                    writer.append(note_info)
+        finally:
+            if writer is not None:
+                writer.close()
+            if deduper is not None:
+                deduper.save()
 
 
-    def spider_user_all_note(self, user_url: str, cookies_str: str, base_path: dict, save_choice: str, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None):
+    def spider_user_all_note(self, user_url: str, cookies_str: str, base_path: dict, save_choice: str, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, frontier=None, checkpoint=None, seen_index=None, deduper=None):
         """
         爬取一个用户的所有笔记
         :param user_url:
         :param cookies_str:
         :param base_path:
+        :param checkpoint: 可选的 CursorCheckpoint，翻页中断后从最后保存的 cursor 继续
+        :param seen_index: 可选的 SeenNoteIndex，增量模式：翻到整页已知的笔记即停止，只爬取新笔记
         :return:
         """
         note_list = []
         try:
             self._apply_rate_limit(rate_limiter)
-            success, msg, all_note_info = self.xhs_apis.get_user_all_notes(user_url, cookies_str, proxies)
+            success, msg, all_note_info = self.xhs_apis.get_user_all_notes(user_url, self._resolve_cookies(cookies_str), proxies, checkpoint, seen_index)
             if success:
                 logger.info(f'用户 {user_url} 作品数量: {len(all_note_info)}')
+                if seen_index is not None:
+                    known = seen_index.known(note['note_id'] for note in all_note_info)
+                    all_note_info = [note for note in all_note_info if note['note_id'] not in known]
+                    logger.info(f'用户 {user_url} 增量模式新笔记数量: {len(all_note_info)}')
                 for simple_note_info in all_note_info:
                     note_url = f"https://www.xiaohongshu.com/explore/{simple_note_info['note_id']}?xsec_token={simple_note_info['xsec_token']}"
                     note_list.append(note_url)
             if save_choice == 'all' or save_choice == 'excel':
                 excel_name = user_url.split('/')[-1].split('?')[0]
+                if seen_index is not None:
+                    # 增量模式只有新笔记，写入带时间戳的单独文件，不覆盖之前完整导出的 Excel
+                    excel_name = f"{excel_name}_incremental_{time.strftime('%Y%m%d_%H%M%S')}"
             self._emit_progress(progress_callback, f"用户任务共 {len(note_list)} 条，开始下载…")
-            self.spider_some_note(note_list, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback)
+            self.spider_some_note(note_list, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, frontier=frontier, seen_index=seen_index, deduper=deduper)
         except Exception as e:
             success = False
             msg = e
         logger.info(f'爬取用户所有视频 {user_url}: {success}, msg: {msg}')
         return note_list, success, msg
 
-    def spider_user_all_note_selenium(self, user_url: str, cookies_str: str, base_path: dict, save_choice: str, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, max_notes: int | None = None, max_scroll_times: int | None = None):
+    def spider_user_all_note_selenium(self, user_url: str, cookies_str: str, base_path: dict, save_choice: str, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, max_notes: int | None = None, max_scroll_times: int | None = None, frontier=None, deduper=None):
         """
         使用 Selenium 爬取一个用户的所有笔记，仅影响用户采集模块，其他模块仍走原有 API 方案。
         该模式下直接解析页面 HTML 获取笔记信息，不再依赖 /feed 接口；为降低风险，不下载视频文件。
@@ -131,7 +309,7 @@ class Data_Spider():
             self._apply_rate_limit(rate_limiter)
             all_urls = get_user_note_links_with_selenium(
                 user_url,
-                cookies_str,
+                self._resolve_cookies(cookies_str),
                 max_scroll_times=max_scroll_times or 0,
                 proxies=proxies,
             )
@@ -165,6 +343,8 @@ class Data_Spider():
                     rate_limiter,
                     progress_callback,
                     max_notes=max_notes,
+                    frontier=frontier,
+                    deduper=deduper,
                 )
         except Exception as e:
             success = False
@@ -173,7 +353,7 @@ class Data_Spider():
         logger.info(f'Selenium 爬取用户所有笔记 (URL 模式) {user_url}: {success}, msg: {msg}')
         return note_urls, success, msg
 
-    def spider_some_search_note(self, query: str, require_num: int, cookies_str: str, base_path: dict, save_choice: str, sort_type_choice=0, note_type=0, note_time=0, note_range=0, pos_distance=0, geo: dict = None,  excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None):
+    def spider_some_search_note(self, query: str, require_num: int, cookies_str: str, base_path: dict, save_choice: str, sort_type_choice=0, note_type=0, note_time=0, note_range=0, pos_distance=0, geo: dict = None,  excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, frontier=None, deduper=None, max_workers: int = 1, snapshot_store=None):
         """
             指定数量搜索笔记，设置排序方式和笔记类型和笔记数量
             :param query 搜索的关键词
@@ -185,28 +365,307 @@ class Data_Spider():
             :param note_time 笔记时间 0 不限, 1 一天内, 2 一周内天, 3 半年内
             :param note_range 笔记范围 0 不限, 1 已看过, 2 未看过, 3 已关注
             :param pos_distance 位置距离 0 不限, 1 同城, 2 附近 指定这个必须要指定 geo
+            :param max_workers 同时请求的搜索结果页数
+            :param snapshot_store 可选的 SnapshotStore，按关键词与筛选条件保存本次搜索结果的快照
             返回搜索的结果
         """
         note_list = []
         try:
-            self._apply_rate_limit(rate_limiter)
-            success, msg, notes = self.xhs_apis.search_some_note(query, require_num, cookies_str, sort_type_choice, note_type, note_time, note_range, pos_distance, geo, proxies)
+            success, msg, notes = self.xhs_apis.search_some_note(query, require_num, self._resolve_cookies(cookies_str), sort_type_choice, note_type, note_time, note_range, pos_distance, geo, proxies, max_workers=max_workers, rate_limiter=rate_limiter)
             if success:
                 notes = list(filter(lambda x: x['model_type'] == "note", notes))
                 logger.info(f'搜索关键词 {query} 笔记数量: {len(notes)}')
+                if snapshot_store is not None:
+                    snapshot_params = {
+                        'query': query, 'sort_type_choice': sort_type_choice, 'note_type': note_type, 'note_time': note_time,
+                        'note_range': note_range, 'pos_distance': pos_distance, 'geo': geo or '',
+                    }
+                    snapshot_store.record('search', snapshot_params, snapshot_entries(notes))
                 for note in notes:
                     note_url = f"https://www.xiaohongshu.com/explore/{note['id']}?xsec_token={note['xsec_token']}"
                     note_list.append(note_url)
             if save_choice == 'all' or save_choice == 'excel':
                 excel_name = query
             self._emit_progress(progress_callback, f"搜索结果共 {len(note_list)} 条，开始下载…")
-            self.spider_some_note(note_list, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback)
+            self.spider_some_note(note_list, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, frontier=frontier, deduper=deduper)
         except Exception as e:
             success = False
             msg = e
         logger.info(f'搜索关键词 {query} 笔记: {success}, msg: {msg}')
         return note_list, success, msg
 
+    def spider_deep_search_note(self, query: str, require_num: int, cookies_str: str, base_path: dict, save_choice: str, combos=None, pos_distance=0, geo: dict = None, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, frontier=None, deduper=None, max_workers: int = 4, snapshot_store=None):
+        """
+            深度搜索笔记：同一关键词在多组筛选条件下并发搜索，按笔记 id 合并去重后下载，召回远多于单次搜索
+            :param query 搜索的关键词
+            :param require_num 需要的笔记数量
+            :param combos 筛选条件组合，默认按全部排序方式与发布时间组合，见 xhs_utils.search_util.build_search_combos
+            :param max_workers 同时进行的筛选条件组合数
+            :param snapshot_store 可选的 SnapshotStore，按关键词与筛选条件组合保存合并去重后的结果快照
+            返回搜索的结果
+        """
+        note_list = []
+        try:
+            success, msg, notes = deep_search_note(
+                self.xhs_apis, query, require_num, self._resolve_cookies(cookies_str), combos,
+                max_workers=max_workers, pos_distance=pos_distance, geo=geo or "", proxies=proxies, rate_limiter=rate_limiter,
+            )
+            if success and snapshot_store is not None:
+                snapshot_params = {'query': query, 'deep': True, 'combos': combos or 'default', 'pos_distance': pos_distance, 'geo': geo or ''}
+                snapshot_store.record('search', snapshot_params, snapshot_entries(notes))
+            for note in notes:
+                note_list.append(f"https://www.xiaohongshu.com/explore/{note['id']}?xsec_token={note['xsec_token']}")
+            if save_choice == 'all' or save_choice == 'excel':
+                excel_name = excel_name or query
+            self._emit_progress(progress_callback, f"深度搜索结果共 {len(note_list)} 条，开始下载…")
+            self.spider_some_note(note_list, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, frontier=frontier, deduper=deduper)
+        except Exception as e:
+            success = False
+            msg = e
+        logger.info(f'深度搜索关键词 {query} 笔记: {success}, msg: {msg}')
+        return note_list, success, msg
+
+    def spider_geo_sweep_note(self, query: str, bbox, cookies_str: str, base_path: dict, save_choice: str, rows: int = 4, cols: int = 4, max_depth: int = 2, require_num: int = 0, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, frontier=None, deduper=None, max_workers: int = 4):
+        """
+            区域网格搜索笔记：把经纬度范围切成网格，在各格子中心并发执行“附近”搜索，笔记密集处自动细分，去重后下载
+            :param query 搜索的关键词
+            :param bbox 经纬度范围 (min_lat, min_lng, max_lat, max_lng)
+            :param rows, cols 初始网格的行数与列数
+            :param max_depth 笔记密集的格子最多四等分的层数
+            :param require_num 需要的笔记数量，0 表示不限
+            返回搜索的结果
+        """
+        note_list = []
+        try:
+            success, msg, notes = geo_sweep_search_note(
+                self.xhs_apis, query, self._resolve_cookies(cookies_str), bbox, rows, cols, max_depth,
+                require_num=require_num, max_workers=max_workers, proxies=proxies, rate_limiter=rate_limiter,
+            )
+            for note in notes:
+                note_list.append(f"https://www.xiaohongshu.com/explore/{note['id']}?xsec_token={note['xsec_token']}")
+            if save_choice == 'all' or save_choice == 'excel':
+                excel_name = excel_name or f'{query}_geo'
+            self._emit_progress(progress_callback, f"区域搜索结果共 {len(note_list)} 条，开始下载…")
+            self.spider_some_note(note_list, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, frontier=frontier, deduper=deduper)
+        except Exception as e:
+            success = False
+            msg = e
+        logger.info(f'区域搜索关键词 {query} 笔记: {success}, msg: {msg}')
+        return note_list, success, msg
+
+    def spider_keyword_expansion_note(self, seeds: Iterable[str], cookies_str: str, base_path: dict, save_choice: str, max_depth: int = 2, max_terms: int = 50, require_num: int = 0, excel_name: str = 'keyword_expansion', proxies=None, rate_limiter=None, progress_callback=None, frontier=None, deduper=None, max_workers: int = 4):
+        """
+            关键词扩展爬取：从种子词出发逐层获取联想词并搜索，新发现的笔记边搜索边进入下载流程
+            :param seeds 种子关键词
+            :param max_depth 联想的最大层数
+            :param max_terms 最多搜索的关键词数量
+            :param require_num 需要的笔记数量，0 表示不限
+            返回搜索到的笔记数量
+        """
+        count = 0
+        success = True
+        msg = ''
+        terms = set()
+
+        def note_urls():
+            nonlocal count
+            for term, note in expand_keyword_notes(
+                self.xhs_apis, seeds, self._resolve_cookies(cookies_str), max_depth, max_terms, require_num,
+                max_workers=max_workers, proxies=proxies, rate_limiter=rate_limiter,
+            ):
+                count += 1
+                if term not in terms:
+                    terms.add(term)
+                    self._emit_progress(progress_callback, f"关键词 {term} 有新笔记")
+                yield f"https://www.xiaohongshu.com/explore/{note['id']}?xsec_token={note['xsec_token']}"
+
+        try:
+            self.spider_some_note(note_urls(), cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, frontier=frontier, deduper=deduper)
+        except Exception as e:
+            success = False
+            msg = e
+        logger.info(f'关键词扩展爬取: {count} 篇笔记，{len(terms)} 个关键词有新笔记，{success}, msg: {msg}')
+        return count, success, msg
+
+    def spider_homefeed_note(self, cookies_str: str, base_path: dict, save_choice: str, per_channel: int = 100, channels=None, excel_name: str = 'homefeed', proxies=None, rate_limiter=None, progress_callback=None, frontier=None, deduper=None, max_workers: int = 8, snapshot_store=None):
+        """
+            主页推荐采样：多个频道并发翻页，跨频道去重后边获取边进入下载流程
+            :param per_channel 每个频道获取的笔记数量
+            :param channels 需要采样的频道 id，默认全部频道
+            :param snapshot_store 可选的 SnapshotStore，保存各频道的推荐快照
+            返回采样到的笔记数量
+        """
+        count = 0
+        success = True
+        msg = ''
+
+        def note_urls():
+            nonlocal count
+            for channel, note in sample_homefeed(
+                self.xhs_apis, self._resolve_cookies(cookies_str), per_channel, channels,
+                max_workers=max_workers, proxies=proxies, rate_limiter=rate_limiter, snapshot_store=snapshot_store,
+            ):
+                count += 1
+                yield f"https://www.xiaohongshu.com/explore/{note['id']}?xsec_token={note['xsec_token']}"
+
+        try:
+            self.spider_some_note(note_urls(), cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, frontier=frontier, deduper=deduper)
+        except Exception as e:
+            success = False
+            msg = e
+        logger.info(f'主页推荐采样: {count} 篇笔记，{success}, msg: {msg}')
+        return count, success, msg
+
+    def refresh_engagement(self, refresh_scheduler, cookies_str: str, budget: int = 100, proxies=None, rate_limiter=None, progress_callback=None, max_workers: int = 4):
+        """
+        刷新已爬取笔记的互动数据：从刷新队列中取出最多 budget 篇到期的笔记并发重新获取详情，
+        只保存发生变化的计数，并按变化速度安排各笔记的下次刷新
+        :param refresh_scheduler: EngagementRefreshScheduler
+        :param budget: 本轮最多刷新的笔记数
+        :return: 刷新的笔记数, 计数有变化的笔记数
+        """
+        due = refresh_scheduler.pop_due(budget)
+        self._emit_progress(progress_callback, f"本轮需要刷新 {len(due)} 篇笔记（共跟踪 {len(refresh_scheduler)} 篇）")
+        changed_count = 0
+
+        def refresh(item):
+            note_id, note_url = item
+            success, msg, note_info = self.spider_note(note_url, cookies_str, proxies, rate_limiter)
+            if not success or note_info is None:
+                refresh_scheduler.record_failure(note_id)
+                return note_id, None
+            return note_id, refresh_scheduler.record(note_id, note_info)
+
+        with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as executor:
+            for idx, (note_id, changed) in enumerate(executor.map(refresh, due), start=1):
+                if changed:
+                    changed_count += 1
+                    self._emit_progress(progress_callback, f"[{idx}/{len(due)}] {note_id} 计数变化: {changed}")
+                elif changed is None:
+                    self._emit_progress(progress_callback, f"[{idx}/{len(due)}] {note_id} 刷新失败，稍后重试")
+        logger.info(f'互动数据刷新: {len(due)} 篇笔记，{changed_count} 篇有变化')
+        return len(due), changed_count
+
+    def build_keyword_watcher(self, watchlist, cookies_str: str, base_path: dict, save_choice: str, seen_index, proxies=None, rate_limiter=None, progress_callback=None, jitter: float = 0.2):
+        """
+        创建关键词监控：各关键词按“最新”排序定期搜索，遇到已见过的笔记即停止翻页，
+        新笔记交给 spider_some_note 获取详情并下载，每次检查的结果写入 <关键词>_<时间>.xlsx
+        :param watchlist: [{'query': 关键词, 'interval': 间隔秒数}]，见 xhs_utils.watchlist.parse_watchlist
+        :param seen_index: SeenNoteIndex，详情获取成功的笔记才登记为已见过，获取失败的笔记之后会重试
+        （seen_index 本身按 note_id 精确去重并跨运行保存，不再使用 NoteDeduper，否则同一次运行中重试的笔记会被当作重复丢弃）
+        :return: KeywordWatcher，调用 run() 开始监控，stop() 停止
+        """
+        def on_new_notes(query, notes):
+            note_urls = [f"https://www.xiaohongshu.com/explore/{note['id']}?xsec_token={note['xsec_token']}" for note in notes]
+            self._emit_progress(progress_callback, f"关键词 {query} 发现 {len(note_urls)} 篇新笔记，开始下载…")
+            excel_name = f"{norm_str(query)}_{time.strftime('%Y%m%d_%H%M%S')}"
+            self.spider_some_note(note_urls, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress_callback, seen_index=seen_index)
+
+        return KeywordWatcher(
+            self.xhs_apis, watchlist, cookies_str, seen_index, on_new_notes, jitter=jitter, proxies=proxies, rate_limiter=rate_limiter,
+            cookie_pool=self.cookie_pool,
+        )
+
+    def spider_notifications(self, store, cookies_str: str, types=None, proxies=None, rate_limiter=None, progress_callback=None, checkpoint=None):
+        """
+        增量同步当前账号的评论和@、赞和收藏、新增关注通知，只获取上次同步之后的新通知并保存到本地
+        :param store: NotificationStore
+        :param types: 需要同步的类型，默认 mentions / likes / connections
+        :param checkpoint: 可选的 CursorCheckpoint，翻页中断后从最后保存的 cursor 继续
+        :return: {类型: (success, msg, 新增条数)}
+        """
+        result = sync_notifications(self.xhs_apis, self._resolve_cookies(cookies_str), store, types, proxies, rate_limiter, checkpoint=checkpoint)
+        summary = '，'.join(f"{type} 新增 {added} 条" if success else f"{type} 失败: {msg}" for type, (success, msg, added) in result.items())
+        self._emit_progress(progress_callback, f"通知同步完成：{summary}")
+        return result
+
+    def spider_note_comments(self, note_url: str, cookies_str: str, base_path: dict, excel_name: str = '', proxies=None, rate_limiter=None, progress_callback=None, budget=None):
+        """
+        导出一篇笔记的全部评论（一级评论及二级评论）
+        评论逐页获取，经 handle_comment_info 处理后直接写入 Excel，内存占用不随评论数量增长
+        :param note_url: 笔记链接（需带 xsec_token）
+        :param cookies_str:
+        :param base_path:
+        :param excel_name: Excel 文件名，默认为 <note_id>_comments
+        :param budget: 可选的 CommentBudget，只导出前 N 条一级评论、每条前 M 条回复，并限制请求次数和耗时
+        :return: 导出的评论数量, success, msg
+        """
+        count = 0
+        success = True
+        msg = ''
+        note_id, _ = parse_note_url(note_url)
+        if not excel_name:
+            excel_name = f'{note_id}_comments'
+        file_path = os.path.abspath(os.path.join(base_path['excel'], f'{excel_name}.xlsx'))
+        writer = XlsxStreamWriter(file_path, type='comment')
+        try:
+            comments = self.xhs_apis.iter_note_comments(note_url, self._resolve_cookies(cookies_str), proxies, rate_limiter, budget)
+            for comment in comments:
+                comment['note_url'] = note_url
+                try:
+                    comment_info = handle_comment_info(comment)
+                except Exception as e:
+                    logger.warning(f'评论解析失败 {comment.get("id")}: {e}')
+                    continue
+                writer.append(comment_info)
+                count += 1
+                if count % 100 == 0:
+                    self._emit_progress(progress_callback, f"笔记 {note_id} 已导出 {count} 条评论")
+        except Exception as e:
+            success = False
+            msg = e
+        finally:
+            writer.close()
+        self._emit_progress(progress_callback, f"笔记 {note_id} 评论导出完成，共 {count} 条")
+        logger.info(f'导出笔记评论 {note_url}: {success}, msg: {msg}')
+        return count, success, msg
+
+    def spider_some_note_comments(self, notes: Iterable[str], cookies_str: str, base_path: dict, excel_name: str = 'comments', proxies=None, rate_limiter=None, progress_callback=None, max_workers: int = 8, budget=None, checkpoint=None):
+        """
+        批量导出多篇笔记的评论，多篇笔记的评论翻页交错并发进行，每篇笔记完成后立即写入同一个 Excel
+        :param notes: 笔记链接的可迭代对象（需带 xsec_token），按需读取
+        :param max_workers: 全局同时进行的请求数
+        :param budget: 可选的 CommentBudget，对每篇笔记分别生效
+        :param checkpoint: 可选的 CursorCheckpoint，保存每篇笔记的翻页进度
+        :return: 导出的评论数量, success, msg
+        """
+        count = 0
+        success = True
+        msg = ''
+        file_path = os.path.abspath(os.path.join(base_path['excel'], f'{excel_name}.xlsx'))
+        writer = XlsxStreamWriter(file_path, type='comment')
+
+        def on_note_done(note_url, note_success, note_msg, comments):
+            nonlocal count
+            if not note_success:
+                self._emit_progress(progress_callback, f"笔记 {note_url} 评论爬取失败: {note_msg}")
+            for comment in comments:
+                for item in [comment] + (comment.get('sub_comments') or []):
+                    item['note_url'] = note_url
+                    try:
+                        writer.append(handle_comment_info(item))
+                    except Exception as e:
+                        logger.warning(f'评论解析失败 {item.get("id")}: {e}')
+                        continue
+                    count += 1
+            self._emit_progress(progress_callback, f"笔记 {parse_note_url(note_url)[0]} 评论完成，累计导出 {count} 条")
+
+        try:
+            crawler = BatchCommentCrawler(
+                self.xhs_apis, self._resolve_cookies(cookies_str), proxies, rate_limiter,
+                max_workers=max_workers, checkpoint=checkpoint, budget=budget,
+            )
+            stats = crawler.run(notes, on_note_done)
+            msg = f"笔记 {stats['notes']} 篇（失败 {stats['failed']} 篇），请求 {stats['requests']} 次"
+        except Exception as e:
+            success = False
+            msg = e
+        finally:
+            writer.close()
+        self._emit_progress(progress_callback, f"批量评论导出完成，共 {count} 条，{msg}")
+        logger.info(f'批量导出笔记评论: {success}, msg: {msg}')
+        return count, success, msg
+
 if __name__ == '__main__':
     """
         此文件为爬虫的入口文件，可以直接运行。
@@ -214,9 +673,31 @@ if __name__ == '__main__':
         并询问你使用哪种模式：批量笔记 / 用户全集 (Selenium) / 搜索下载。
         apis/xhs_pc_apis.py 为爬虫的 api 文件，包含小红书的全部数据接口。
         apis/xhs_creator_apis.py 为小红书创作者中心的 api 文件。
+        使用 --resume 启动时，各模式会从上次中断的位置继续，已完成的笔记不会重复爬取。
     """
+    import argparse
     from gui_app.config_manager import ConfigManager
     from gui_app.rate_limiter import RateLimiter
+    from xhs_utils.common_util import load_cookies_list
+    from xhs_utils.cookie_pool import CookiePool
+    from xhs_utils.proxy_pool import build_proxies
+    from xhs_utils.frontier import open_frontier
+    from xhs_utils.seen_index import SeenNoteIndex
+    from xhs_utils.dedup import open_note_deduper
+    from xhs_utils.input_util import iter_note_urls, iter_note_urls_from_text, iter_user_ids, iter_user_ids_from_text
+    from xhs_utils.comment_util import CommentBudget
+    from xhs_utils.checkpoint import CursorCheckpoint
+    from xhs_utils.snapshot_store import SnapshotStore
+    from xhs_utils.refresh_scheduler import EngagementRefreshScheduler
+    from xhs_utils.watchlist import parse_watchlist
+    from xhs_utils.notification_sync import NotificationStore
+    from xhs_utils.profile_cache import ProfileCache
+    from xhs_utils.response_cache import ResponseCache
+
+    parser = argparse.ArgumentParser(description='Spider_XHS 命令行入口')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的位置继续爬取')
+    parser.add_argument('--input', default='', help='输入文件（txt/csv/jsonl），- 表示从标准输入读取：模式 1、6、10 为笔记链接，模式 13 为用户 id 或主页链接')
+    args = parser.parse_args()
 
     config_manager = ConfigManager()
     cookies_str, base_path = config_manager.reload()
@@ -226,9 +707,8 @@ if __name__ == '__main__':
 
     settings = config_manager.load_gui_settings()
 
-    # 全局代理
-    proxy_raw = (settings.get('proxy') or '').strip()
-    proxies = {'http': proxy_raw, 'https': proxy_raw} if proxy_raw else None
+    # 全局代理：多个代理（逗号/空白分隔）时启用代理池
+    proxies = build_proxies(settings.get('proxy') or '')
 
     # 全局频率限制
     max_per_window = int(settings.get('max_per_window', 0) or 0)
@@ -244,25 +724,80 @@ if __name__ == '__main__':
     max_notes_cfg = int(settings.get('max_notes', 0) or 0)
     max_notes = max_notes_cfg if max_notes_cfg > 0 else None
 
+    # 笔记去重：始终在单次运行内去重，dedup_across_runs 为 true 时跨运行跳过已处理过的笔记
+    dedup_across_runs = bool(settings.get('dedup_across_runs', False))
+
+    # 榜单快照：snapshot_enabled 为 true 时保存每次搜索和主页采样的结果快照（只记录与上一次的差异）
+    snapshot_store = SnapshotStore() if settings.get('snapshot_enabled') else None
+
     data_spider = Data_Spider()
 
+    # 接口响应缓存：response_cache_enabled 为 true 时启用，response_cache_only 为 true 时只读缓存、不发送请求（离线重新处理）
+    if settings.get('response_cache_enabled') or settings.get('response_cache_only'):
+        try:
+            cache_mb = float(settings.get('response_cache_max_mb', 512) or 512)
+        except (TypeError, ValueError):
+            cache_mb = 512.0
+        data_spider.xhs_apis.response_cache = ResponseCache(
+            max_bytes=int(cache_mb * 1024 * 1024), cache_only=bool(settings.get('response_cache_only')),
+        )
+
+    # 多账号 Cookies：.env 中配置了 COOKIES_1、COOKIES_2 ... 时启用后台健康探测与热切换
+    cookies_list = load_cookies_list()
+    if len(cookies_list) > 1:
+        try:
+            probe_interval = float(settings.get('cookie_probe_interval', 300) or 300)
+        except Exception:
+            probe_interval = 300.0
+        cookie_pool = CookiePool(cookies_list, data_spider.xhs_apis, probe_interval=probe_interval, proxies=proxies)
+        cookie_pool.start()
+        data_spider.set_cookie_pool(cookie_pool)
+        print(f"已启用 Cookies 池，共 {len(cookies_list)} 个账号。")
+
     def progress(msg: str) -> None:
         try:
             print(msg)
         except Exception:
             pass
 
+    def build_profile_cache():
+        # enrich_author 为 true 时为笔记补充作者数据，author_cache_hours 内同一作者只请求一次
+        if not settings.get('enrich_author'):
+            return None
+        try:
+            ttl_hours = float(settings.get('author_cache_hours', 24) or 24)
+        except (TypeError, ValueError):
+            ttl_hours = 24.0
+        return ProfileCache(data_spider.xhs_apis, ttl=ttl_hours * 3600)
+
     def run_batch_notes() -> None:
+        # 优先流式读取 --input 或 note_urls_file 指定的大文件（txt/csv/jsonl，- 表示标准输入）
+        source = args.input or (settings.get('note_urls_file') or '').strip()
         raw = settings.get('note_urls', '').strip()
-        if not raw:
-            print("GUI 配置中没有批量笔记链接，请在 gui_settings.json 或 GUI 中先配置。")
+        if source:
+            note_urls = iter_note_urls(source)
+        elif raw:
+            note_urls = iter_note_urls_from_text(raw)
+        else:
+            print("GUI 配置中没有批量笔记链接，请在 gui_settings.json 或 GUI 中先配置，或使用 --input 指定链接文件。")
             return
-        note_urls = [line.strip() for line in raw.splitlines() if line.strip()]
         save_choice = settings.get('note_save_choice', 'all') or 'all'
         excel_name = settings.get('note_excel_name', 'notes') or 'notes'
-        data_spider.spider_some_note(
-            note_urls, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress, max_notes=max_notes
-        )
+        refresh_scheduler = EngagementRefreshScheduler() if settings.get('refresh_track_notes') else None
+        profile_cache = build_profile_cache()
+        try:
+            with open_frontier(f'notes:{excel_name}', args.resume) as frontier:
+                data_spider.spider_some_note(
+                    note_urls, cookies_str, base_path, save_choice, excel_name, proxies, rate_limiter, progress, max_notes=max_notes, frontier=frontier,
+                    deduper=open_note_deduper(dedup_across_runs),
+                    refresh_scheduler=refresh_scheduler,
+                    profile_cache=profile_cache,
+                )
+        finally:
+            if refresh_scheduler is not None:
+                refresh_scheduler.close()
+            if profile_cache is not None:
+                profile_cache.close()
 
     def run_user_all_selenium() -> None:
         user_url = (settings.get('user_url') or '').strip()
@@ -274,18 +809,48 @@ if __name__ == '__main__':
         save_choice = settings.get('user_save_choice', 'all') or 'all'
         excel_name = settings.get('user_excel_name', '') or ''
         scroll_times = int(settings.get('user_scroll_times', 0) or 0)
-        data_spider.spider_user_all_note_selenium(
-            user_url,
-            cookies_str,
-            base_path,
-            save_choice,
-            excel_name,
-            proxies,
-            rate_limiter,
-            progress,
-            max_notes=max_notes,
-            max_scroll_times=scroll_times or None,
-        )
+        with open_frontier(f'user:{user_url.split("?")[0]}', args.resume) as frontier:
+            data_spider.spider_user_all_note_selenium(
+                user_url,
+                cookies_str,
+                base_path,
+                save_choice,
+                excel_name,
+                proxies,
+                rate_limiter,
+                progress,
+                max_notes=max_notes,
+                max_scroll_times=scroll_times or None,
+                frontier=frontier,
+                deduper=open_note_deduper(dedup_across_runs),
+            )
+
+    def run_user_incremental() -> None:
+        raw = (settings.get('monitor_user_urls') or '').strip()
+        if not raw:
+            print("GUI 配置中没有监控用户列表，请在 gui_settings.json 的 monitor_user_urls 中每行填写一个用户主页 URL。")
+            return
+        user_urls = [line.strip() for line in raw.splitlines() if line.strip()]
+        save_choice = settings.get('user_save_choice', 'all') or 'all'
+        seen_index = SeenNoteIndex()
+        checkpoint = CursorCheckpoint()
+        try:
+            for idx, user_url in enumerate(user_urls, start=1):
+                progress(f"[{idx}/{len(user_urls)}] 增量更新用户 {user_url}")
+                data_spider.spider_user_all_note(
+                    user_url,
+                    cookies_str,
+                    base_path,
+                    save_choice,
+                    proxies=proxies,
+                    rate_limiter=rate_limiter,
+                    progress_callback=progress,
+                    checkpoint=checkpoint,
+                    seen_index=seen_index,
+                    deduper=open_note_deduper(dedup_across_runs),
+                )
+        finally:
+            checkpoint.close()
 
     def run_search() -> None:
         query = (settings.get('search_query') or '').strip()
@@ -335,38 +900,367 @@ if __name__ == '__main__':
                 print("GUI 配置中的 Geo 坐标无效，将忽略 Geo。")
                 geo = None
 
-        data_spider.spider_some_search_note(
-            query,
-            query_num,
+        try:
+            search_max_workers = int(settings.get('search_max_workers', 1) or 1)
+        except (TypeError, ValueError):
+            search_max_workers = 1
+        # 深度搜索中每组筛选条件各占一个线程，并发组合数与单次搜索的并发页数分开设置
+        try:
+            search_deep_max_workers = int(settings.get('search_deep_max_workers', 4) or 4)
+        except (TypeError, ValueError):
+            search_deep_max_workers = 4
+
+        with open_frontier(f'search:{query}', args.resume) as frontier:
+            if settings.get('search_deep'):
+                # 深度搜索：忽略单一的排序/类型/时间设置，按 search_deep_combos（默认全部排序 × 发布时间）并发搜索
+                data_spider.spider_deep_search_note(
+                    query,
+                    query_num,
+                    cookies_str,
+                    base_path,
+                    save_choice,
+                    combos=settings.get('search_deep_combos') or None,
+                    pos_distance=pos_distance,
+                    geo=geo,
+                    proxies=proxies,
+                    rate_limiter=rate_limiter,
+                    progress_callback=progress,
+                    frontier=frontier,
+                    deduper=open_note_deduper(dedup_across_runs),
+                    max_workers=search_deep_max_workers,
+                    snapshot_store=snapshot_store,
+                )
+                return
+            data_spider.spider_some_search_note(
+                query,
+                query_num,
+                cookies_str,
+                base_path,
+                save_choice,
+                sort_type_choice,
+                note_type,
+                note_time,
+                note_range,
+                pos_distance,
+                geo=geo,
+                proxies=proxies,
+                rate_limiter=rate_limiter,
+                progress_callback=progress,
+                frontier=frontier,
+                deduper=open_note_deduper(dedup_across_runs),
+                max_workers=search_max_workers,
+                snapshot_store=snapshot_store,
+            )
+
+    def run_geo_sweep() -> None:
+        query = (settings.get('search_query') or '').strip()
+        if not query:
+            query = input("请输入搜索关键词: ").strip()
+        raw_bbox = (settings.get('search_geo_bbox') or '').strip()
+        if not raw_bbox:
+            raw_bbox = input("请输入经纬度范围 min_lat,min_lng,max_lat,max_lng: ").strip()
+        try:
+            bbox = tuple(float(value) for value in raw_bbox.replace('，', ',').split(','))
+            if len(bbox) != 4:
+                raise ValueError(raw_bbox)
+        except ValueError:
+            print("经纬度范围格式无效，应为 min_lat,min_lng,max_lat,max_lng。")
+            return
+        if not query:
+            print("搜索关键词为空，已取消。")
+            return
+        try:
+            grid = int(settings.get('search_geo_grid', 4) or 4)
+            max_depth = int(settings.get('search_geo_max_depth', 2) or 0)
+        except (TypeError, ValueError):
+            grid, max_depth = 4, 2
+        save_choice = settings.get('search_save_choice', 'all') or 'all'
+        with open_frontier(f'geo:{query}:{raw_bbox}', args.resume) as frontier:
+            data_spider.spider_geo_sweep_note(
+                query,
+                bbox,
+                cookies_str,
+                base_path,
+                save_choice,
+                rows=grid,
+                cols=grid,
+                max_depth=max_depth,
+                require_num=max_notes or 0,
+                proxies=proxies,
+                rate_limiter=rate_limiter,
+                progress_callback=progress,
+                frontier=frontier,
+                deduper=open_note_deduper(dedup_across_runs),
+            )
+
+    def run_keyword_expansion() -> None:
+        raw = (settings.get('expand_seed_keywords') or settings.get('search_query') or '').strip()
+        if not raw:
+            raw = input("请输入种子关键词（多个用逗号分隔）: ").strip()
+        seeds = [word.strip() for word in raw.replace('，', ',').replace('\n', ',').split(',') if word.strip()]
+        if not seeds:
+            print("种子关键词为空，已取消。")
+            return
+        try:
+            max_depth = int(settings.get('expand_max_depth', 2) or 0)
+            max_terms = int(settings.get('expand_max_terms', 50) or 50)
+        except (TypeError, ValueError):
+            max_depth, max_terms = 2, 50
+        save_choice = settings.get('search_save_choice', 'all') or 'all'
+        with open_frontier(f'expand:{",".join(seeds)}', args.resume) as frontier:
+            data_spider.spider_keyword_expansion_note(
+                seeds,
+                cookies_str,
+                base_path,
+                save_choice,
+                max_depth=max_depth,
+                max_terms=max_terms,
+                require_num=max_notes or 0,
+                excel_name=f'{seeds[0]}_expansion',
+                proxies=proxies,
+                rate_limiter=rate_limiter,
+                progress_callback=progress,
+                frontier=frontier,
+                deduper=open_note_deduper(dedup_across_runs),
+            )
+
+    def run_homefeed_sample() -> None:
+        raw = (settings.get('homefeed_channels') or '').strip()
+        channels = [channel.strip() for channel in raw.replace('，', ',').split(',') if channel.strip()] or None
+        try:
+            per_channel = int(settings.get('homefeed_per_channel', 100) or 100)
+        except (TypeError, ValueError):
+            per_channel = 100
+        if max_notes is not None:
+            per_channel = min(per_channel, max_notes)
+        save_choice = settings.get('homefeed_save_choice', 'excel') or 'excel'
+        with open_frontier('homefeed', args.resume) as frontier:
+            data_spider.spider_homefeed_note(
+                cookies_str,
+                base_path,
+                save_choice,
+                per_channel=per_channel,
+                channels=channels,
+                proxies=proxies,
+                rate_limiter=rate_limiter,
+                progress_callback=progress,
+                frontier=frontier,
+                deduper=open_note_deduper(dedup_across_runs),
+                snapshot_store=snapshot_store,
+            )
+
+    def run_engagement_refresh() -> None:
+        try:
+            budget = int(settings.get('refresh_budget', 100) or 100)
+        except (TypeError, ValueError):
+            budget = 100
+        refresh_scheduler = EngagementRefreshScheduler()
+        try:
+            # 可通过 --input 或 refresh_note_urls_file 登记需要跟踪的笔记，批量笔记模式也会自动登记
+            source = args.input or (settings.get('refresh_note_urls_file') or '').strip()
+            if source:
+                for note_url in iter_note_urls(source):
+                    refresh_scheduler.track(note_url)
+            data_spider.refresh_engagement(
+                refresh_scheduler,
+                cookies_str,
+                budget=budget,
+                proxies=proxies,
+                rate_limiter=rate_limiter,
+                progress_callback=progress,
+            )
+        finally:
+            refresh_scheduler.close()
+
+    def run_keyword_watch() -> None:
+        try:
+            interval = float(settings.get('watch_interval_minutes', 60) or 60) * 60
+            jitter = float(settings.get('watch_jitter', 0.2))
+        except (TypeError, ValueError):
+            interval, jitter = 3600, 0.2
+        watchlist = parse_watchlist(settings.get('watch_queries') or '', interval)
+        if not watchlist:
+            print("没有配置监控关键词，请在 gui_settings.json 的 watch_queries 中每行填写一个关键词（可写成 关键词|间隔分钟）。")
+            return
+        save_choice = settings.get('search_save_choice', 'all') or 'all'
+        watcher = data_spider.build_keyword_watcher(
+            watchlist,
             cookies_str,
             base_path,
             save_choice,
-            sort_type_choice,
-            note_type,
-            note_time,
-            note_range,
-            pos_distance,
-            geo=geo,
+            SeenNoteIndex(),
             proxies=proxies,
             rate_limiter=rate_limiter,
             progress_callback=progress,
+            jitter=jitter,
         )
+        print(f"开始监控 {len(watchlist)} 个关键词，按 Ctrl+C 停止。")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.stop()
+            print("已停止关键词监控。")
 
-    while True:
-        print("\n请选择运行模式：")
-        print("1. 批量笔记 (使用 GUI 配置的笔记链接)")
-        print("2. 用户全集 (Selenium 模式，使用 GUI 配置的用户 URL)")
-        print("3. 搜索下载 (使用 GUI 配置的搜索条件)")
-        print("0. 退出")
-        choice = input("输入序号并回车: ").strip()
-
-        if choice == '1':
-            run_batch_notes()
-        elif choice == '2':
-            run_user_all_selenium()
-        elif choice == '3':
-            run_search()
-        elif choice in ('0', 'q', 'Q'):
-            break
+    def run_notification_sync() -> None:
+        store = NotificationStore()
+        checkpoint = CursorCheckpoint()
+        try:
+            poll_minutes = float(settings.get('notification_poll_minutes', 0) or 0)
+        except (TypeError, ValueError):
+            poll_minutes = 0
+        try:
+            while True:
+                data_spider.spider_notifications(
+                    store, cookies_str, proxies=proxies, rate_limiter=rate_limiter, progress_callback=progress, checkpoint=checkpoint,
+                )
+                if poll_minutes <= 0:
+                    break
+                time.sleep(poll_minutes * 60)
+        except KeyboardInterrupt:
+            print("已停止通知同步。")
+        finally:
+            store.close()
+            checkpoint.close()
+
+    def run_batch_users() -> None:
+        # 用户来源：--input / user_ids_file / user_ids，每行一个 user_id 或用户主页链接
+        source = args.input or (settings.get('user_ids_file') or '').strip()
+        raw = (settings.get('user_ids') or '').strip()
+        if source:
+            users = iter_user_ids(source)
+        elif raw:
+            users = iter_user_ids_from_text(raw)
         else:
-            print("无效选择，请重新输入。")
+            print("没有配置需要爬取的用户，请设置 user_ids / user_ids_file 或使用 --input 指定文件。")
+            return
+        try:
+            max_workers = int(settings.get('user_max_workers', 4))
+        except (TypeError, ValueError):
+            max_workers = 4
+        data_spider.spider_some_user(
+            users,
+            cookies_str,
+            base_path,
+            settings.get('user_info_save_choice', 'excel') or 'excel',
+            settings.get('user_info_excel_name', 'users') or 'users',
+            proxies,
+            rate_limiter,
+            progress,
+            max_workers=max_workers,
+        )
+
+    def build_comment_budget():
+        limits = (
+            settings.get('comment_max_top', 0),
+            settings.get('comment_max_replies', 0),
+            settings.get('comment_max_requests', 0),
+            settings.get('comment_deadline_seconds', 0),
+        )
+        if not any(limits):
+            return None
+        return CommentBudget(*limits)
+
+    def run_note_comments() -> None:
+        note_url = (settings.get('comment_note_url') or '').strip()
+        if not note_url:
+            note_url = input("请输入笔记 URL (需带 xsec_token): ").strip()
+        if not note_url:
+            print("笔记 URL 为空，已取消。")
+            return
+        excel_name = settings.get('comment_excel_name', '') or ''
+        data_spider.spider_note_comments(
+            note_url,
+            cookies_str,
+            base_path,
+            excel_name,
+            proxies=proxies,
+            rate_limiter=rate_limiter,
+            progress_callback=progress,
+            budget=build_comment_budget(),
+        )
+
+    def run_batch_comments() -> None:
+        # 笔记链接来源与模式 1 相同：--input / comment_note_urls_file / comment_note_urls
+        source = args.input or (settings.get('comment_note_urls_file') or '').strip()
+        raw = settings.get('comment_note_urls', '').strip()
+        if source:
+            note_urls = iter_note_urls(source)
+        elif raw:
+            note_urls = iter_note_urls_from_text(raw)
+        else:
+            print("没有配置需要导出评论的笔记链接，请设置 comment_note_urls 或使用 --input 指定链接文件。")
+            return
+        excel_name = settings.get('comment_excel_name', '') or 'comments'
+        try:
+            max_workers = int(settings.get('comment_max_workers', 8))
+        except (TypeError, ValueError):
+            max_workers = 8
+        checkpoint = CursorCheckpoint()
+        try:
+            data_spider.spider_some_note_comments(
+                note_urls,
+                cookies_str,
+                base_path,
+                excel_name,
+                proxies=proxies,
+                rate_limiter=rate_limiter,
+                progress_callback=progress,
+                max_workers=max_workers,
+                budget=build_comment_budget(),
+                checkpoint=checkpoint,
+            )
+        finally:
+            checkpoint.close()
+
+    try:
+        while True:
+            print("\n请选择运行模式：")
+            print("1. 批量笔记 (使用 GUI 配置的笔记链接)")
+            print("2. 用户全集 (Selenium 模式，使用 GUI 配置的用户 URL)")
+            print("3. 搜索下载 (使用 GUI 配置的搜索条件)")
+            print("4. 用户增量更新 (API 模式，只爬取 monitor_user_urls 中各用户的新笔记)")
+            print("5. 笔记评论导出 (一级及二级评论流式写入 Excel)")
+            print("6. 批量笔记评论导出 (多篇笔记交错并发翻页)")
+            print("7. 区域网格搜索 (在 search_geo_bbox 范围内逐格搜索附近笔记)")
+            print("8. 关键词扩展爬取 (从种子词出发按联想词逐层搜索)")
+            print("9. 主页推荐采样 (多个频道并发获取)")
+            print("10. 互动数据刷新 (按变化速度优先刷新已爬取笔记的点赞/收藏/评论数)")
+            print("11. 关键词监控 (定期搜索 watch_queries 中的关键词，只下载新笔记)")
+            print("12. 消息通知同步 (增量获取评论和@、赞和收藏、新增关注)")
+            print("13. 批量用户信息 (并发获取 user_ids 中各用户的主页信息)")
+            print("0. 退出")
+            choice = input("输入序号并回车: ").strip()
+
+            if choice == '1':
+                run_batch_notes()
+            elif choice == '2':
+                run_user_all_selenium()
+            elif choice == '3':
+                run_search()
+            elif choice == '4':
+                run_user_incremental()
+            elif choice == '5':
+                run_note_comments()
+            elif choice == '6':
+                run_batch_comments()
+            elif choice == '7':
+                run_geo_sweep()
+            elif choice == '8':
+                run_keyword_expansion()
+            elif choice == '9':
+                run_homefeed_sample()
+            elif choice == '10':
+                run_engagement_refresh()
+            elif choice == '11':
+                run_keyword_watch()
+            elif choice == '12':
+                run_notification_sync()
+            elif choice == '13':
+                run_batch_users()
+            elif choice in ('0', 'q', 'Q'):
+                break
+            else:
+                print("无效选择，请重新输入。")
+    finally:
+        if snapshot_store is not None:
+            snapshot_store.close()
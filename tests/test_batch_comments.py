@@ -0,0 +1,78 @@
+import threading
+
+from xhs_utils.comment_util import BatchCommentCrawler, CommentBudget
+
+
+def _url(n):
+    return f'https://www.xiaohongshu.com/explore/{n:024x}?xsec_token=t'
+
+
+class FakeCommentApis:
+    def __init__(self, pages=3, fail_note=None):
+        self.pages = pages
+        self.fail_note = fail_note
+        self.lock = threading.Lock()
+        self.out_requests = {}
+
+    def get_note_out_comment(self, note_id, cursor, xsec_token, cookies_str, proxies=None):
+        idx = int(cursor or 0)
+        with self.lock:
+            self.out_requests[note_id] = self.out_requests.get(note_id, 0) + 1
+        if note_id == self.fail_note and idx == 1:
+            return False, 'boom', None
+        comments = [{'id': f'{note_id}-{idx}-{i}', 'note_id': note_id, 'sub_comments': []} for i in range(10)]
+        return True, 'success', {'data': {'comments': comments, 'cursor': str(idx + 1), 'has_more': idx + 1 < self.pages}}
+
+    def get_note_inner_comment(self, comment, cursor, xsec_token, cookies_str, proxies=None):
+        return True, 'success', {'data': {'comments': [], 'has_more': False}}
+
+
+def test_active_notes_window_is_bounded():
+    pulled = []
+    done = []
+    window = []
+
+    def note_urls():
+        for n in range(1, 21):
+            pulled.append(n)
+            yield _url(n)
+
+    def on_note_done(note_url, success, msg, comments):
+        done.append(note_url)
+        window.append(len(pulled) - len(done))
+
+    crawler = BatchCommentCrawler(FakeCommentApis(), '', max_workers=4, max_active_notes=3)
+    stats = crawler.run(note_urls(), on_note_done)
+    assert stats['notes'] == 20 and stats['failed'] == 0
+    assert stats['comments'] == 20 * 30
+    # 读取新链接前已完成的笔记先出窗口，同时处理的笔记数不超过 max_active_notes
+    assert max(window) < 3
+    assert len(pulled) == 20
+
+
+def test_each_note_gets_a_fresh_budget():
+    results = {}
+
+    def on_note_done(note_url, success, msg, comments):
+        results[note_url] = comments
+
+    apis = FakeCommentApis(pages=5)
+    crawler = BatchCommentCrawler(apis, '', max_workers=2, budget=CommentBudget(max_top=15))
+    stats = crawler.run([_url(n) for n in range(1, 4)], on_note_done)
+    assert stats['requests'] == 6
+    assert all(len(comments) == 15 for comments in results.values())
+    assert sorted(apis.out_requests.values()) == [2, 2, 2]
+
+
+def test_failed_note_does_not_affect_others():
+    results = {}
+
+    def on_note_done(note_url, success, msg, comments):
+        results[note_url] = (success, msg, len(comments))
+
+    crawler = BatchCommentCrawler(FakeCommentApis(pages=3, fail_note=f'{2:024x}'), '', max_workers=3)
+    stats = crawler.run([_url(n) for n in range(1, 4)], on_note_done)
+    assert stats['notes'] == 3 and stats['failed'] == 1
+    assert results[_url(2)] == (False, 'boom', 10)
+    assert results[_url(1)] == (True, 'success', 30)
+    assert results[_url(3)] == (True, 'success', 30)
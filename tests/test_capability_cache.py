@@ -0,0 +1,23 @@
+from xhs_utils.capability_cache import CapabilityCache
+
+
+def test_entries_expire_after_ttl():
+    cache = CapabilityCache(ttl=100)
+    cache.set('acc', 'user_posted_api', '/api/sns/web/v1/user_posted', now=0)
+    assert cache.get('acc', 'user_posted_api', now=99) == '/api/sns/web/v1/user_posted'
+    assert cache.get('acc', 'user_posted_api', now=100) is None
+    # 过期后重新探测得到的结果重新计时
+    cache.set('acc', 'user_posted_api', '/api/sns/web/v2/user_posted', now=100)
+    assert cache.get('acc', 'user_posted_api', now=150) == '/api/sns/web/v2/user_posted'
+
+
+def test_entries_are_per_account_and_name():
+    cache = CapabilityCache()
+    cache.set('acc1', 'user_posted_api', 'v1')
+    cache.set('acc1', 'xsec_source', 'pc_feed')
+    assert cache.get('acc2', 'user_posted_api') is None
+    assert cache.get('acc1', 'xsec_source') == 'pc_feed'
+    cache.forget('acc1', 'xsec_source')
+    cache.forget('acc1', 'missing')
+    assert cache.get('acc1', 'xsec_source') is None
+    assert cache.get('acc1', 'user_posted_api') == 'v1'
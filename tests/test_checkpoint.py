@@ -0,0 +1,57 @@
+from xhs_utils.checkpoint import CursorCheckpoint
+from xhs_utils.notification_sync import fetch_until_watermark
+
+
+def test_step_saves_every_n_pages(tmp_path):
+    checkpoint = CursorCheckpoint(str(tmp_path / 'checkpoint.db'), every_n_pages=2)
+    checkpoint.step('user_posted', 'u1', 'c1', [1])
+    assert checkpoint.load('user_posted', 'u1') == ('', [])
+    checkpoint.step('user_posted', 'u1', 'c2', [1, 2])
+    assert checkpoint.load('user_posted', 'u1') == ('c2', [1, 2])
+    checkpoint.close()
+
+
+def test_finish_failure_saves_and_success_clears(tmp_path):
+    db_path = str(tmp_path / 'checkpoint.db')
+    checkpoint = CursorCheckpoint(db_path)
+    checkpoint.finish('comment_page', 'n1', False, 'c3', [{'id': 'a'}, {'id': 'b'}])
+    checkpoint.close()
+
+    checkpoint = CursorCheckpoint(db_path)
+    assert checkpoint.load('comment_page', 'n1') == ('c3', [{'id': 'a'}, {'id': 'b'}])
+    checkpoint.finish('comment_page', 'n1', True, 'c4', [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}])
+    assert checkpoint.load('comment_page', 'n1') == ('', [])
+    checkpoint.close()
+
+
+def test_save_rewrites_when_items_shrink(tmp_path):
+    checkpoint = CursorCheckpoint(str(tmp_path / 'checkpoint.db'))
+    checkpoint.save('mentions', 'acc', 'c2', [1, 2, 3])
+    checkpoint.save('mentions', 'acc', 'c1', [9])
+    assert checkpoint.load('mentions', 'acc') == ('c1', [9])
+    checkpoint.clear('mentions', 'acc')
+    assert checkpoint.load('mentions', 'acc') == ('', [])
+    checkpoint.close()
+
+
+def test_notification_fetch_resumes_from_checkpoint(tmp_path):
+    checkpoint = CursorCheckpoint(str(tmp_path / 'checkpoint.db'), every_n_pages=1)
+    key = ('notification_likes', 'acc')
+    cursors = []
+    fail_at = {'2'}
+
+    def page_func(cursor, cookies_str, proxies):
+        cursors.append(cursor)
+        if cursor in fail_at:
+            fail_at.discard(cursor)
+            return False, 'boom', None
+        n = int(cursor or 0)
+        return True, 'success', {'data': {'message_list': [{'id': str(n), 'time': 100 - n}], 'cursor': str(n + 1), 'has_more': n < 3}}
+
+    success, msg, events = fetch_until_watermark(page_func, '', None, None, checkpoint=checkpoint, checkpoint_key=key)
+    assert not success and [e['id'] for e in events] == ['0', '1']
+    success, msg, events = fetch_until_watermark(page_func, '', None, None, checkpoint=checkpoint, checkpoint_key=key)
+    assert success and [e['id'] for e in events] == ['0', '1', '2', '3']
+    assert cursors == ['', '1', '2', '2', '3']
+    assert checkpoint.load(*key) == ('', [])
+    checkpoint.close()
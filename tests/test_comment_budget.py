@@ -0,0 +1,62 @@
+from apis.xhs_pc_apis import XHS_Apis
+from xhs_utils.comment_util import CommentBudget
+
+
+def fake_out_comment_pages(pages):
+    def get_note_out_comment(note_id, cursor, xsec_token, cookies_str, proxies=None):
+        idx = int(cursor or 0)
+        comments = [{'id': f'{idx}-{i}', 'note_id': note_id} for i in range(10)]
+        return True, 'success', {'data': {'comments': comments, 'cursor': str(idx + 1), 'has_more': idx + 1 < pages}}
+    return get_note_out_comment
+
+
+def test_budget_limits():
+    budget = CommentBudget(max_top=2, max_replies=3, max_requests=2)
+    assert budget.take_request() and budget.take_request()
+    assert not budget.take_request()
+    assert budget.take_top() and budget.take_top()
+    assert not budget.take_top() and budget.top_full()
+    assert budget.replies_allowed(2) and not budget.replies_allowed(3)
+    fresh = budget.fresh()
+    assert fresh.requests == 0 and fresh.top_count == 0 and fresh.max_top == 2
+
+
+def test_unlimited_budget():
+    budget = CommentBudget()
+    assert all(budget.take_request() for _ in range(100))
+    assert not budget.top_full()
+    assert budget.replies_allowed(10 ** 6)
+
+
+def test_expired_budget_stops_requests():
+    budget = CommentBudget(deadline_seconds=1)
+    budget._started -= 2
+    assert budget.expired()
+    assert not budget.take_request()
+
+
+def test_all_out_comment_stops_at_budget():
+    xhs_apis = XHS_Apis(response_cache=None)
+    xhs_apis.get_note_out_comment = fake_out_comment_pages(pages=5)
+    budget = CommentBudget(max_top=15)
+    success, msg, comments = xhs_apis.get_note_all_out_comment('n1', 'token', '', budget=budget)
+    assert success
+    assert len(comments) == 15
+    assert budget.requests == 2
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.waits = 0
+
+    def wait(self):
+        self.waits += 1
+
+
+def test_all_out_comment_waits_on_rate_limiter_per_page():
+    xhs_apis = XHS_Apis(response_cache=None)
+    xhs_apis.get_note_out_comment = fake_out_comment_pages(pages=5)
+    limiter = CountingLimiter()
+    success, msg, comments = xhs_apis.get_note_all_out_comment('n1', 'token', '', rate_limiter=limiter)
+    assert success and len(comments) == 50
+    assert limiter.waits == 5
@@ -0,0 +1,84 @@
+import pytest
+
+from xhs_utils.cookie_pool import CookiePool
+
+
+class FakeApis:
+    def __init__(self, valid):
+        self.valid = set(valid)
+        self.calls = []
+
+    def get_user_self_info(self, cookies_str, proxies=None):
+        self.calls.append(cookies_str)
+        if cookies_str in self.valid:
+            return True, 'success', {'data': {'guest': False}}
+        return False, '登录已过期', None
+
+    def get_user_self_info2(self, cookies_str, proxies=None):
+        return self.get_user_self_info(cookies_str, proxies)
+
+
+def test_empty_cookies_rejected():
+    with pytest.raises(ValueError):
+        CookiePool(['', '  '], FakeApis([]))
+
+
+def test_get_switches_after_failures_reach_threshold():
+    apis = FakeApis(['b=2'])
+    pool = CookiePool(['a=1', 'b=2'], apis, failure_threshold=2)
+    assert pool.get() == 'a=1'
+    pool.report_failure('a=1', 'err')
+    assert apis.calls == []
+    pool.report_failure('a=1', 'err')
+    assert apis.calls == ['a=1', 'a=1']
+    assert pool.get() == 'b=2'
+    stats = pool.stats()
+    assert [s['valid'] for s in stats] == [False, True]
+    assert stats[1]['active']
+
+
+def test_report_success_resets_failures():
+    pool = CookiePool(['a=1', 'b=2'], FakeApis(['a=1', 'b=2']), failure_threshold=2)
+    pool.report_failure('a=1')
+    pool.report_success('a=1')
+    pool.report_failure('a=1')
+    assert pool.stats()[0]['failures'] == 1
+    assert pool.get() == 'a=1'
+
+
+def test_guest_session_is_invalid():
+    class GuestApis(FakeApis):
+        def get_user_self_info(self, cookies_str, proxies=None):
+            return True, 'success', {'data': {'guest': True}}
+
+    pool = CookiePool(['a=1'], GuestApis([]))
+    assert pool.probe('a=1') is False
+
+
+def test_keyword_watcher_resolves_cookie_on_every_check():
+    from xhs_utils.watchlist import KeywordWatcher
+
+    class SeenIndex:
+        def known(self, note_ids):
+            return set()
+
+        def mark_seen(self, note_ids):
+            list(note_ids)
+
+    class SearchApis(FakeApis):
+        def __init__(self, valid):
+            super().__init__(valid)
+            self.search_cookies = []
+
+        def search_note(self, query, cookies_str, page, sort_type_choice, proxies=None):
+            self.search_cookies.append(cookies_str)
+            if cookies_str not in self.valid:
+                return False, '登录已过期', None
+            return True, 'success', {'data': {'items': [], 'has_more': False}}
+
+    apis = SearchApis(['b=2'])
+    pool = CookiePool(['a=1', 'b=2'], apis, failure_threshold=1)
+    watcher = KeywordWatcher(apis, [], 'a=1', SeenIndex(), lambda query, notes: None, cookie_pool=pool)
+    watcher.check('咖啡')
+    watcher.check('咖啡')
+    assert apis.search_cookies == ['a=1', 'b=2']
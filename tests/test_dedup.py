@@ -0,0 +1,34 @@
+from xhs_utils.dedup import NoteDeduper, ScalableBloomFilter
+
+
+def test_filter_grows_and_keeps_false_positive_rate(tmp_path):
+    sbf = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    # add() 对误判为已存在的新 key 返回 False，比例同样受 error_rate 约束
+    rejected = sum(not sbf.add(f'note-{i}') for i in range(10000))
+    assert rejected / 10000 <= 0.01
+    assert len(sbf.filters) > 1
+    assert [f.capacity for f in sbf.filters[:3]] == [1000, 2000, 4000]
+    assert all(f'note-{i}' in sbf for i in range(10000))
+    false_positives = sum(f'other-{i}' in sbf for i in range(20000))
+    assert false_positives / 20000 <= 0.01
+
+    path = str(tmp_path / 'dedup.bloom')
+    sbf.save(path)
+    loaded = ScalableBloomFilter.load(path)
+    assert len(loaded) == len(sbf)
+    assert 'note-9999' in loaded
+    assert not loaded.add('note-0')
+
+
+def test_deduper_ignores_xsec_token_and_persists_done(tmp_path):
+    path = str(tmp_path / 'note_dedup.bloom')
+    url = 'https://www.xiaohongshu.com/explore/0123456789abcdef01234567?xsec_token=a'
+    same_note = 'https://www.xiaohongshu.com/explore/0123456789abcdef01234567?xsec_token=b'
+    deduper = NoteDeduper(path, initial_capacity=100)
+    assert deduper.admit(url)
+    assert not deduper.admit(same_note)
+    deduper.mark_done(url)
+    deduper.save()
+
+    assert not NoteDeduper(path, initial_capacity=100).admit(same_note)
+    assert NoteDeduper(None, initial_capacity=100).admit(same_note)
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from apis.xhs_pc_apis import XHS_Apis
+
+
+def _pager(total_pages, page_size=2, empty_from=None, delays=None):
+    requested = []
+    lock = threading.Lock()
+
+    def fetch_page(page):
+        with lock:
+            requested.append(page)
+        if delays:
+            time.sleep(delays.get(page, 0))
+        if page > total_pages or (empty_from is not None and page >= empty_from):
+            return True, 'success', {'data': {'items': [], 'has_more': True}}
+        items = [f'{page}-{i}' for i in range(page_size)]
+        return True, 'success', {'data': {'items': items, 'has_more': page < total_pages}}
+
+    return fetch_page, requested
+
+
+def test_pages_are_merged_in_page_order_across_rounds():
+    # 后发的页先返回，合并结果仍按页码排序
+    fetch_page, requested = _pager(5, delays={1: 0.05, 3: 0.03})
+    success, msg, items = XHS_Apis()._fetch_pages(fetch_page, 'items', require_num=10, page_size=2, max_workers=3)
+    assert success, msg
+    assert items == [f'{page}-{i}' for page in range(1, 6) for i in range(2)]
+    assert sorted(requested) == [1, 2, 3, 4, 5]
+
+
+def test_stops_when_has_more_is_false():
+    fetch_page, requested = _pager(2)
+    success, msg, items = XHS_Apis()._fetch_pages(fetch_page, 'items', require_num=100, page_size=2)
+    assert success, msg
+    assert items == ['1-0', '1-1', '2-0', '2-1']
+    assert requested == [1, 2]
+
+
+def test_stops_at_empty_page():
+    fetch_page, requested = _pager(10, empty_from=3)
+    success, msg, items = XHS_Apis()._fetch_pages(fetch_page, 'items', require_num=100, page_size=2)
+    assert success, msg
+    assert len(items) == 4
+    assert requested == [1, 2, 3]
+
+
+def test_never_requests_more_pages_than_needed_and_trims():
+    fetch_page, requested = _pager(10, page_size=3)
+    success, msg, items = XHS_Apis()._fetch_pages(fetch_page, 'items', require_num=7, page_size=3, max_workers=8)
+    assert success, msg
+    assert sorted(requested) == [1, 2, 3]
+    assert items == ['1-0', '1-1', '1-2', '2-0', '2-1', '2-2', '3-0']
+
+
+def test_failed_page_keeps_collected_items():
+    def fetch_page(page):
+        if page == 2:
+            return False, 'boom', None
+        return True, 'success', {'data': {'items': [page], 'has_more': True}}
+
+    success, msg, items = XHS_Apis()._fetch_pages(fetch_page, 'items', require_num=5, page_size=1)
+    assert not success and msg == 'boom'
+    assert items == [1]
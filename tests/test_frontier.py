@@ -0,0 +1,46 @@
+from xhs_utils.frontier import FAILED, FETCHED, MEDIA_DONE, PENDING, open_frontier
+
+URL = 'https://www.xiaohongshu.com/explore/0123456789abcdef01234567?xsec_token=first&xsec_source=pc_search'
+URL_NEW_TOKEN = 'https://www.xiaohongshu.com/explore/0123456789abcdef01234567?xsec_token=second&xsec_source=pc_search'
+OTHER = 'https://www.xiaohongshu.com/explore/76543210fedcba9876543210?xsec_token=x&xsec_source=pc_search'
+
+
+def test_resume_keeps_progress_across_tokens(tmp_path):
+    db_path = str(tmp_path / 'frontier.db')
+    with open_frontier('search:咖啡', db_path=db_path) as frontier:
+        frontier.add([URL, OTHER])
+        frontier.mark_fetched(URL, {'note_id': '0123456789abcdef01234567'})
+        frontier.mark_media_done(URL)
+        frontier.mark_failed(OTHER, 'boom')
+
+    with open_frontier('search:咖啡', resume=True, db_path=db_path) as frontier:
+        frontier.add([URL_NEW_TOKEN])
+        state, note_info = frontier.get(URL_NEW_TOKEN)
+        assert state == MEDIA_DONE
+        assert note_info == {'note_id': '0123456789abcdef01234567'}
+        assert frontier.get(OTHER)[0] == FAILED
+        assert frontier.counts() == {MEDIA_DONE: 1, FAILED: 1}
+        row = frontier._conn.execute(
+            'SELECT url FROM frontier_notes WHERE job_id = ? AND note_key = ?', ('search:咖啡', '0123456789abcdef01234567')
+        ).fetchone()
+        assert row[0] == URL_NEW_TOKEN
+
+
+def test_without_resume_progress_is_reset(tmp_path):
+    db_path = str(tmp_path / 'frontier.db')
+    with open_frontier('notes:a', db_path=db_path) as frontier:
+        frontier.add([URL])
+        frontier.mark_fetched(URL, {'note_id': '0123456789abcdef01234567'})
+    with open_frontier('notes:a', db_path=db_path) as frontier:
+        assert frontier.get(URL) == (None, None)
+        frontier.add([URL])
+        assert frontier.get(URL)[0] == PENDING
+
+
+def test_jobs_are_isolated(tmp_path):
+    db_path = str(tmp_path / 'frontier.db')
+    with open_frontier('notes:a', db_path=db_path) as a, open_frontier('notes:b', db_path=db_path) as b:
+        a.add([URL])
+        a.mark_fetched(URL, {'note_id': '0123456789abcdef01234567'})
+        assert a.get(URL)[0] == FETCHED
+        assert b.get(URL) == (None, None)
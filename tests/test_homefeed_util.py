@@ -0,0 +1,51 @@
+import threading
+
+from xhs_utils.homefeed_util import parse_channels, sample_homefeed
+
+FEEDS = {
+    'c1': ['a', 'b', 'c', 'd', 'e'],
+    'c2': ['c', 'x', 'a', 'y'],
+}
+
+
+class FakeHomefeedApis:
+    """每个频道按 note_index 每页返回 2 条，记录每个频道收到的 cursor。"""
+
+    def __init__(self, feeds):
+        self.feeds = feeds
+        self.cursors = {}
+        self.lock = threading.Lock()
+
+    def get_homefeed_all_channel(self, cookies_str, proxies=None):
+        return True, 'success', {'data': {'categories': [{'id': channel, 'name': channel} for channel in self.feeds]}}
+
+    def get_homefeed_recommend(self, category, cursor_score, refresh_type, note_index, cookies_str, proxies=None):
+        page = note_index // 20
+        with self.lock:
+            self.cursors.setdefault(category, []).append(cursor_score)
+        note_ids = self.feeds[category][page * 2:page * 2 + 2]
+        items = [{'id': note_id, 'model_type': 'note'} for note_id in note_ids]
+        return True, 'success', {'data': {'items': items, 'cursor_score': f'{category}-{page + 1}'}}
+
+
+def test_parse_channels():
+    res_json = {'data': {'categories': [{'id': 'c1', 'name': '推荐'}, {'name': 'no id'}, {'id': 'c2'}]}}
+    assert parse_channels(res_json) == [{'id': 'c1', 'name': '推荐'}, {'id': 'c2', 'name': 'c2'}]
+
+
+def test_notes_are_deduped_across_channels():
+    apis = FakeHomefeedApis(FEEDS)
+    results = list(sample_homefeed(apis, '', per_channel=10))
+    note_ids = [note['id'] for channel, note in results]
+    assert sorted(note_ids) == ['a', 'b', 'c', 'd', 'e', 'x', 'y']
+    # 每个频道沿自己的 cursor 链翻页
+    assert apis.cursors['c1'] == ['', 'c1-1', 'c1-2', 'c1-3']
+    assert apis.cursors['c2'] == ['', 'c2-1', 'c2-2']
+
+
+def test_per_channel_limit_and_explicit_channels():
+    apis = FakeHomefeedApis(FEEDS)
+    results = list(sample_homefeed(apis, '', per_channel=3, channels=['c1', 'c1']))
+    assert [note['id'] for channel, note in results] == ['a', 'b', 'c']
+    assert {channel for channel, note in results} == {'c1'}
+    assert list(apis.cursors) == ['c1']
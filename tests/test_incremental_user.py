@@ -0,0 +1,50 @@
+from apis.xhs_pc_apis import XHS_Apis
+from main import Data_Spider
+from xhs_utils.seen_index import SeenNoteIndex
+
+USER_URL = 'https://www.xiaohongshu.com/user/profile/5f0000000000000000000001?xsec_token=t&xsec_source=pc_user'
+
+
+def _paged_user_notes(pages, requested):
+    def get_user_note_info(user_id, cursor, cookies_str, xsec_token='', xsec_source='', proxies=None):
+        idx = int(cursor or 0)
+        requested.append(idx)
+        notes = [{'note_id': note_id, 'xsec_token': 't'} for note_id in pages[idx]]
+        return True, 'success', {'data': {'notes': notes, 'cursor': str(idx + 1), 'has_more': idx + 1 < len(pages)}}
+    return get_user_note_info
+
+
+def test_paging_stops_at_a_fully_known_page(tmp_path):
+    seen_index = SeenNoteIndex(str(tmp_path / 'seen.db'))
+    seen_index.mark_seen(['c', 'd', 'e'])
+    requested = []
+    xhs_apis = XHS_Apis(response_cache=None, capability_cache=None)
+    xhs_apis.get_user_note_info = _paged_user_notes([['a', 'b'], ['c', 'd'], ['e']], requested)
+    success, msg, notes = xhs_apis.get_user_all_notes(USER_URL, '', seen_index=seen_index)
+    assert success, msg
+    assert requested == [0, 1]
+    assert [note['note_id'] for note in notes] == ['a', 'b', 'c', 'd']
+
+
+def test_partly_known_page_keeps_paging(tmp_path):
+    seen_index = SeenNoteIndex(str(tmp_path / 'seen.db'))
+    seen_index.mark_seen(['b'])
+    requested = []
+    xhs_apis = XHS_Apis(response_cache=None, capability_cache=None)
+    xhs_apis.get_user_note_info = _paged_user_notes([['a', 'b'], ['c']], requested)
+    success, msg, notes = xhs_apis.get_user_all_notes(USER_URL, '', seen_index=seen_index)
+    assert success and requested == [0, 1]
+    assert len(notes) == 3
+
+
+def test_only_new_notes_reach_spider_some_note(tmp_path, monkeypatch):
+    seen_index = SeenNoteIndex(str(tmp_path / 'seen.db'))
+    seen_index.mark_seen(['c', 'd'])
+    spider = Data_Spider()
+    spider.xhs_apis = XHS_Apis(response_cache=None, capability_cache=None)
+    spider.xhs_apis.get_user_note_info = _paged_user_notes([['a', 'b'], ['c', 'd']], [])
+    received = []
+    monkeypatch.setattr(spider, 'spider_some_note', lambda notes, *args, **kwargs: received.extend(notes))
+    note_list, success, msg = spider.spider_user_all_note(USER_URL, '', {}, 'media', seen_index=seen_index)
+    assert success, msg
+    assert [url.split('/')[-1].split('?')[0] for url in received] == ['a', 'b']
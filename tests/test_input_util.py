@@ -0,0 +1,84 @@
+import io
+import json
+
+from loguru import logger
+
+from xhs_utils import input_util
+from xhs_utils.input_util import iter_note_urls, iter_note_urls_from_text, iter_user_ids, normalize_note_url
+
+NOTE_ID = '0123456789abcdef01234567'
+URL = f'https://www.xiaohongshu.com/explore/{NOTE_ID}?xsec_token=t&xsec_source=pc_user'
+
+
+def test_normalize_note_url():
+    assert normalize_note_url(f'  "{URL}" ') == URL
+    assert normalize_note_url('# comment') is None
+    assert normalize_note_url('') is None
+    assert normalize_note_url('not a link') is None
+    assert normalize_note_url(NOTE_ID) == f'https://www.xiaohongshu.com/explore/{NOTE_ID}'
+
+
+def test_bare_note_id_warns_once(monkeypatch):
+    monkeypatch.setattr(input_util, '_warned_missing_token', False)
+    messages = []
+    sink_id = logger.add(messages.append, level='WARNING')
+    try:
+        urls = list(iter_note_urls_from_text(f'{NOTE_ID}\n\n# skip\n{URL}\r\n{NOTE_ID}'))
+    finally:
+        logger.remove(sink_id)
+    assert urls == [f'https://www.xiaohongshu.com/explore/{NOTE_ID}', URL, f'https://www.xiaohongshu.com/explore/{NOTE_ID}']
+    assert len(messages) == 1
+
+
+def test_txt_file(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_text(f'﻿{URL}\n# comment\n\n{URL}\n', encoding='utf-8')
+    assert list(iter_note_urls(str(path))) == [URL, URL]
+
+
+def test_csv_file_with_and_without_header(tmp_path):
+    with_header = tmp_path / 'with_header.csv'
+    with_header.write_text(f'title,Note_URL\na,{URL}\nb,\n', encoding='utf-8')
+    assert list(iter_note_urls(str(with_header))) == [URL]
+    without_header = tmp_path / 'without_header.csv'
+    without_header.write_text(f'{URL},x\n{URL},y\n', encoding='utf-8')
+    assert list(iter_note_urls(str(without_header))) == [URL, URL]
+
+
+def test_jsonl_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(input_util, '_warned_missing_token', True)
+    path = tmp_path / 'notes.jsonl'
+    lines = [
+        json.dumps({'url': URL}),
+        'not json',
+        json.dumps(URL),
+        json.dumps({'note_id': NOTE_ID, 'xsec_token': 't'}),
+        json.dumps({'note_id': NOTE_ID}),
+        json.dumps([1, 2]),
+    ]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+    assert list(iter_note_urls(str(path))) == [
+        URL,
+        URL,
+        URL,
+        f'https://www.xiaohongshu.com/explore/{NOTE_ID}',
+    ]
+
+
+def test_stdin_is_read_lazily(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO(f'{URL}\nnot a link\n{URL}\n'))
+    urls = iter_note_urls('-')
+    assert next(urls) == URL
+    assert list(urls) == [URL]
+
+
+def test_iter_user_ids(tmp_path):
+    txt = tmp_path / 'users.txt'
+    txt.write_text('u1\n# c\n\n"u2"\n', encoding='utf-8')
+    assert list(iter_user_ids(str(txt))) == ['u1', 'u2']
+    csv_path = tmp_path / 'users.csv'
+    csv_path.write_text('name,user_id\na,u1\nb,u2\n', encoding='utf-8')
+    assert list(iter_user_ids(str(csv_path))) == ['u1', 'u2']
+    jsonl = tmp_path / 'users.jsonl'
+    jsonl.write_text('{"home_url": "https://www.xiaohongshu.com/user/profile/u1"}\n"u2"\nbad\n', encoding='utf-8')
+    assert list(iter_user_ids(str(jsonl))) == ['https://www.xiaohongshu.com/user/profile/u1', 'u2']
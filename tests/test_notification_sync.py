@@ -0,0 +1,82 @@
+from xhs_utils.cookie_util import get_account_key
+from xhs_utils.notification_sync import NotificationStore, fetch_until_watermark, sync_notifications
+
+COOKIES = 'a1=abc; web_session=session'
+
+
+def _pages(event_ids, page_size=2, fail_page=None, requested=None):
+    """event_ids 从新到旧排列，形如 e3 的通知时间为 3，按 cursor 分页。"""
+    def page_func(cursor, cookies_str, proxies=None):
+        page = int(cursor or 0)
+        if requested is not None:
+            requested.append(page)
+        if page == fail_page:
+            return False, 'boom', None
+        chunk = event_ids[page * page_size:(page + 1) * page_size]
+        events = [{'id': event_id, 'time': int(event_id[1:])} for event_id in chunk]
+        return True, 'success', {'data': {'message_list': events, 'cursor': str(page + 1), 'has_more': (page + 1) * page_size < len(event_ids)}}
+    return page_func
+
+
+def test_stops_at_watermark_id():
+    requested = []
+    page_func = _pages(['e6', 'e5', 'e4', 'e3', 'e2', 'e1'], requested=requested)
+    success, msg, events = fetch_until_watermark(page_func, '', 'e3', None)
+    assert success
+    assert [event['id'] for event in events] == ['e6', 'e5', 'e4']
+    assert requested == [0, 1]
+
+
+def test_stops_at_older_time_when_watermark_event_is_gone():
+    page_func = _pages(['e6', 'e5', 'e4', 'e2', 'e1'])
+    # 水位线 e3 已被删除，遇到时间更早的 e2 停止
+    success, msg, events = fetch_until_watermark(page_func, '', 'e3', 3)
+    assert success
+    assert [event['id'] for event in events] == ['e6', 'e5', 'e4']
+
+
+def test_without_watermark_reads_all_history_up_to_max_pages():
+    requested = []
+    page_func = _pages(['e5', 'e4', 'e3', 'e2', 'e1'], requested=requested)
+    success, msg, events = fetch_until_watermark(page_func, '', None, None)
+    assert success and len(events) == 5 and requested == [0, 1, 2]
+    success, msg, events = fetch_until_watermark(_pages(['e5', 'e4', 'e3', 'e2', 'e1']), '', None, None, max_pages=2)
+    assert success and len(events) == 4
+
+
+class FakeNotificationApis:
+    def __init__(self, event_ids, fail_page=None):
+        self.event_ids = event_ids
+        self.fail_page = fail_page
+        self.requested = []
+
+    def get_metions(self, cursor, cookies_str, proxies=None):
+        return _pages(self.event_ids, fail_page=self.fail_page, requested=self.requested)(cursor, cookies_str, proxies)
+
+
+def test_watermark_advances_only_on_success(tmp_path):
+    store = NotificationStore(str(tmp_path / 'notifications.db'))
+    account_key = get_account_key(COOKIES)
+    try:
+        apis = FakeNotificationApis(['e3', 'e2', 'e1'])
+        assert sync_notifications(apis, COOKIES, store, types=['mentions']) == {'mentions': (True, 'success', 3)}
+        assert store.watermark(account_key, 'mentions') == ('e3', 3)
+
+        # 新通知翻页中途失败：不保存，不推进水位线
+        apis = FakeNotificationApis(['e6', 'e5', 'e4', 'e3', 'e2', 'e1'], fail_page=1)
+        assert sync_notifications(apis, COOKIES, store, types=['mentions']) == {'mentions': (False, 'boom', 0)}
+        assert store.watermark(account_key, 'mentions') == ('e3', 3)
+        assert len(store.events(account_key, 'mentions')) == 3
+
+        apis = FakeNotificationApis(['e6', 'e5', 'e4', 'e3', 'e2', 'e1'])
+        assert sync_notifications(apis, COOKIES, store, types=['mentions']) == {'mentions': (True, 'success', 3)}
+        assert store.watermark(account_key, 'mentions')[0] == 'e6'
+        assert apis.requested == [0, 1]
+
+        # 没有新通知时只请求一次，水位线不变
+        apis = FakeNotificationApis(['e6', 'e5', 'e4', 'e3', 'e2', 'e1'])
+        assert sync_notifications(apis, COOKIES, store, types=['mentions']) == {'mentions': (True, 'success', 0)}
+        assert apis.requested == [0]
+        assert store.watermark(account_key, 'mentions')[0] == 'e6'
+    finally:
+        store.close()
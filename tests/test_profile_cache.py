@@ -0,0 +1,73 @@
+import threading
+import time
+
+from xhs_utils.profile_cache import ProfileCache, enrich_note_author
+
+
+def user_data(fans):
+    return {
+        'basic_info': {'nickname': 'n', 'imageb': '', 'red_id': 'r', 'gender': 1, 'ip_location': '', 'desc': ''},
+        'interactions': [{'count': '1'}, {'count': fans}, {'count': '3'}],
+        'tags': [],
+    }
+
+
+class FakeApis:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_user_info(self, user_id, cookies_str, proxies=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            return False, '请求失败', None
+        return True, 'success', {'data': user_data('2')}
+
+
+def test_concurrent_lookups_fetch_once(tmp_path):
+    apis = FakeApis(delay=0.2)
+    cache = ProfileCache(apis, str(tmp_path / 'profiles.db'))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('u1', ''))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert apis.calls == 1
+    assert all(success and user_info['fans'] == '2' for success, msg, user_info in results)
+    cache.close()
+
+
+def test_disk_cache_survives_reopen_and_expires(tmp_path):
+    db_path = str(tmp_path / 'profiles.db')
+    apis = FakeApis()
+    cache = ProfileCache(apis, db_path)
+    assert cache.get('u1', '')[0]
+    cache.close()
+
+    cache = ProfileCache(apis, db_path)
+    assert cache.get('u1', '')[1] == '缓存命中'
+    assert cache.stats['disk'] == 1 and apis.calls == 1
+    cache.close()
+
+    cache = ProfileCache(apis, db_path, ttl=0)
+    assert cache.get('u1', '')[0]
+    assert apis.calls == 2
+    cache.close()
+
+
+def test_failures_are_not_cached_and_enrich_fills_blanks(tmp_path):
+    apis = FakeApis(fail=True)
+    cache = ProfileCache(apis, str(tmp_path / 'profiles.db'))
+    note_info = enrich_note_author({'user_id': 'u1'}, cache, '')
+    assert note_info['author_fans'] == '' and note_info['author_follows'] == ''
+    apis.fail = False
+    note_info = enrich_note_author({'user_id': 'u1'}, cache, '')
+    assert note_info['author_fans'] == '2' and apis.calls == 2
+    assert enrich_note_author(note_info, cache, '') is note_info
+    assert apis.calls == 2
+    cache.close()
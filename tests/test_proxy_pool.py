@@ -0,0 +1,103 @@
+import pytest
+import requests
+
+from xhs_utils.proxy_pool import ProxyPool, build_proxies
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeSession:
+    def __init__(self, status_code=200, error=None):
+        self.status_code = status_code
+        self.error = error
+        self.calls = 0
+
+    def request(self, method, url, proxies=None, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(self.status_code)
+
+    def close(self):
+        pass
+
+
+def make_pool(n=3, **kwargs):
+    pool = ProxyPool([f'http://127.0.0.1:{8000 + i}' for i in range(n)], **kwargs)
+    for entry in pool._entries:
+        entry['session'] = FakeSession()
+    return pool
+
+
+def test_build_proxies():
+    assert build_proxies('') is None
+    assert build_proxies('http://a:1') == {'http': 'http://a:1', 'https': 'http://a:1'}
+    assert isinstance(build_proxies('http://a:1, http://b:1'), ProxyPool)
+
+
+def test_unmeasured_proxies_share_concurrent_requests():
+    pool = make_pool(3)
+    chosen = {pool._choose(acquire=True)['url'] for _ in range(3)}
+    assert len(chosen) == 3
+    assert [s['in_flight'] for s in pool.stats()] == [1, 1, 1]
+
+
+def test_ties_are_broken_randomly():
+    pool = make_pool(3)
+    chosen = {pool._choose()['url'] for _ in range(200)}
+    assert len(chosen) == 3
+
+
+def test_request_releases_in_flight_and_records_rtt():
+    pool = make_pool(2)
+    pool.request('GET', 'https://example.com')
+    stats = pool.stats()
+    assert [s['in_flight'] for s in stats] == [0, 0]
+    assert sum(s['requests'] for s in stats) == 1
+    assert any(s['rtt'] is not None for s in stats)
+
+
+def test_failing_proxy_is_banned():
+    pool = make_pool(1, error_threshold=2)
+    pool._entries[0]['session'] = FakeSession(error=requests.ConnectionError('refused'))
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            pool.request('GET', 'https://example.com')
+    stats = pool.stats()[0]
+    assert stats['in_flight'] == 0
+    assert not stats['healthy']
+
+
+def test_failed_unmeasured_proxy_loses_to_measured_healthy_proxy():
+    pool = make_pool(2, error_threshold=3)
+    dead, alive = pool._entries
+    dead['session'] = FakeSession(error=requests.ConnectionError('refused'))
+    alive['rtt'] = 0.5
+    for _ in range(20):
+        pool.request('GET', 'https://example.com')
+    assert dead['session'].calls <= 1
+    assert alive['session'].calls == 20
+    # 剔除到期后失败记录仍保留在错误率中，不会再次优先选中
+    dead['banned_until'] = 0.0
+    dead['failures'] = 0
+    assert pool._choose() is alive
+
+
+def test_connection_error_retries_once_on_next_proxy():
+    pool = make_pool(2)
+    dead, alive = pool._entries
+    dead['session'] = FakeSession(error=requests.ConnectionError('refused'))
+    alive['session'] = FakeSession()
+    alive['rtt'] = 0.5
+    dead['rtt'] = 0.1
+    response = pool.request('GET', 'https://example.com')
+    assert response.status_code == 200
+    assert dead['session'].calls == 1 and alive['session'].calls == 1
+    assert [s['in_flight'] for s in pool.stats()] == [0, 0]
+
+    alive['session'] = FakeSession(error=requests.ConnectionError('refused'))
+    with pytest.raises(requests.ConnectionError):
+        pool.request('GET', 'https://example.com')
@@ -0,0 +1,65 @@
+import pytest
+
+from xhs_utils.refresh_scheduler import EngagementRefreshScheduler
+
+URL = 'https://www.xiaohongshu.com/explore/0123456789abcdef01234567?xsec_token=a'
+NOTE_ID = '0123456789abcdef01234567'
+
+
+def note_info(liked, collected=0, comment=0, share=0):
+    return {
+        'note_id': NOTE_ID,
+        'liked_count': liked,
+        'collected_count': collected,
+        'comment_count': comment,
+        'share_count': share,
+    }
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = EngagementRefreshScheduler(str(tmp_path / 'engagement.db'), min_interval=60, max_interval=86400)
+    yield scheduler
+    scheduler.close()
+
+
+def test_untracked_counters_are_due_immediately(scheduler):
+    scheduler.track(URL, now=1000)
+    assert scheduler.pop_due(10, now=1000) == [(NOTE_ID, URL)]
+    assert scheduler.pop_due(10, now=1000) == []
+
+
+def test_fast_changing_note_is_refreshed_sooner(scheduler):
+    scheduler.track(URL, note_info(100), now=0)
+    assert scheduler.pop_due(10, now=59) == []
+    assert scheduler.pop_due(10, now=60) == [(NOTE_ID, URL)]
+    # 一小时内计数变化 10%，target_change 为 5%，下次刷新间隔为半小时
+    changed = scheduler.record(NOTE_ID, note_info(110), now=3600)
+    assert changed == {'liked_count': 110}
+    assert scheduler.pop_due(10, now=3600 + 1799) == []
+    assert scheduler.pop_due(10, now=3600 + 1800) == [(NOTE_ID, URL)]
+
+
+def test_unchanged_note_interval_doubles(scheduler):
+    scheduler.track(URL, note_info(100), now=0)
+    assert scheduler.record(NOTE_ID, note_info(100), now=60) == {}
+    assert scheduler.pop_due(10, now=60 + 119) == []
+    assert scheduler.pop_due(10, now=60 + 120) == [(NOTE_ID, URL)]
+    scheduler.record(NOTE_ID, note_info(100), now=180)
+    assert scheduler.pop_due(10, now=180 + 239) == []
+    assert scheduler.pop_due(10, now=180 + 240) == [(NOTE_ID, URL)]
+
+
+def test_failure_retries_after_min_interval_and_schedule_survives_reopen(tmp_path):
+    db_path = str(tmp_path / 'engagement.db')
+    scheduler = EngagementRefreshScheduler(db_path, min_interval=60)
+    scheduler.track(URL, now=0)
+    assert scheduler.pop_due(10, now=0) == [(NOTE_ID, URL)]
+    scheduler.record_failure(NOTE_ID, now=10)
+    scheduler.close()
+
+    scheduler = EngagementRefreshScheduler(db_path, min_interval=60)
+    assert len(scheduler) == 1
+    assert scheduler.pop_due(10, now=69) == []
+    assert scheduler.pop_due(10, now=70) == [(NOTE_ID, URL)]
+    scheduler.close()
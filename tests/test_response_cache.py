@@ -0,0 +1,132 @@
+import json
+import os
+
+import pytest
+
+from xhs_utils.response_cache import CacheMissError, ResponseCache
+
+FEED = '/api/sns/web/v1/feed'
+SEARCH = '/api/sns/web/v1/search/notes'
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.content = json.dumps(payload).encode('utf-8')
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.content)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'response_cache.db'))
+    yield cache
+    cache.close()
+
+
+def test_cache_key_ignores_volatile_fields_and_ordering(cache):
+    a = cache.cache_key('get', '/api/sns/web/v2/comment/page?note_id=n1&cursor=&xsec_token=t1')
+    b = cache.cache_key('GET', '/api/sns/web/v2/comment/page?xsec_token=t2&cursor=&note_id=n1')
+    assert a == b
+    assert a != cache.cache_key('GET', '/api/sns/web/v2/comment/page?note_id=n2&cursor=&xsec_token=t1')
+
+    body = {'keyword': '咖啡', 'page': 1, 'search_id': 's1', 'ext': [{'xsec_token': 't'}]}
+    from_dict = cache.cache_key('POST', SEARCH, body)
+    from_json = cache.cache_key('POST', SEARCH, json.dumps(dict(body, search_id='s2', ext=[{'xsec_token': 'u'}])))
+    assert from_dict == from_json
+    assert from_dict[0] == SEARCH
+    assert from_dict != cache.cache_key('POST', SEARCH, dict(body, page=2))
+
+
+def test_uncacheable_endpoint_has_no_key(cache):
+    assert cache.cache_key('GET', '/api/sns/web/v2/user/me') is None
+
+
+def test_entries_expire_per_endpoint(cache):
+    cache.endpoint_ttls[FEED] = 100
+    cache.put(FEED, 'k', b'{"success": true}', now=0)
+    assert cache.get(FEED, 'k', now=99) == b'{"success": true}'
+    assert cache.get(FEED, 'k', now=100) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'response_cache.db'), max_bytes=2500)
+    for idx, key in enumerate('abc'):
+        if key == 'c':
+            # 访问 a 之后，b 成为最久未访问的条目
+            assert cache.get(FEED, 'a', now=2.5) is not None
+        cache.put(FEED, key, os.urandom(1000), now=idx)
+    assert cache.get(FEED, 'b', now=3) is None
+    assert cache.get(FEED, 'a', now=3) is not None
+    assert cache.get(FEED, 'c', now=3) is not None
+    assert cache.stats['evicted'] == 1
+    cache.close()
+
+    # 重新打开时从数据库恢复总大小，继续按上限淘汰
+    cache = ResponseCache(str(tmp_path / 'response_cache.db'), max_bytes=1500)
+    cache.put(FEED, 'd', os.urandom(100), now=4)
+    assert cache.stats['evicted'] == 1
+    assert cache.get(FEED, 'd', now=4) is not None
+    cache.close()
+
+
+def test_fetch_stores_only_successful_responses(cache):
+    api = '/api/sns/web/v1/user/otherinfo?target_user_id=u1'
+    sent = []
+
+    def send_failure():
+        sent.append('fail')
+        return FakeResponse({'success': False, 'code': -100, 'msg': '登录已过期'})
+
+    def send_success():
+        sent.append('ok')
+        return FakeResponse({'success': True, 'code': 0, 'data': {'n': 1}})
+
+    cache.fetch('GET', api, None, send_failure)
+    cache.fetch('GET', api, None, send_success)
+    response = cache.fetch('GET', api, None, send_success)
+    assert sent == ['fail', 'ok']
+    assert response.json()['data'] == {'n': 1}
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 2
+
+
+def test_cache_only_mode(tmp_path):
+    db_path = str(tmp_path / 'response_cache.db')
+    cache = ResponseCache(db_path)
+    endpoint, key = cache.cache_key('GET', FEED + '?source_note_id=n1')
+    cache.put(endpoint, key, b'{"success": true}', now=0)
+    cache.close()
+
+    cache = ResponseCache(db_path, cache_only=True)
+
+    def send():
+        raise AssertionError('仅缓存模式下不应发送请求')
+
+    assert cache.fetch('GET', FEED + '?source_note_id=n1', None, send).json() == {'success': True}
+    with pytest.raises(CacheMissError):
+        cache.fetch('GET', FEED + '?source_note_id=n2', None, send)
+    # 不可缓存的接口（如 CookiePool 探测用的 selfinfo）照常发送
+    response = cache.fetch('GET', '/api/sns/web/v2/user/me', None, lambda: FakeResponse({'success': True}))
+    assert response.json() == {'success': True}
+    cache.close()
+
+
+def test_user_note_info_falls_back_to_next_variant_on_cache_miss(tmp_path, monkeypatch):
+    from apis import xhs_pc_apis
+    from apis.xhs_pc_apis import XHS_Apis
+    from xhs_utils.capability_cache import CapabilityCache
+
+    monkeypatch.setattr(xhs_pc_apis, 'generate_request_params', lambda cookies_str, api, data='': ({}, {}, data))
+    cache = ResponseCache(str(tmp_path / 'response_cache.db'), cache_only=True)
+    xhs_apis = XHS_Apis(single_flight=None, response_cache=cache, capability_cache=CapabilityCache())
+    first, second = xhs_apis.USER_POSTED_APIS
+    params = {'num': '30', 'cursor': '', 'user_id': 'u1', 'image_formats': 'jpg,webp,avif', 'xsec_token': 't', 'xsec_source': 'pc_feed'}
+    endpoint, key = cache.cache_key('GET', xhs_pc_apis.splice_str(second, params))
+    cache.put(endpoint, key, json.dumps({'success': True, 'msg': '', 'data': {'notes': []}}).encode('utf-8'))
+
+    success, msg, res_json = xhs_apis.get_user_note_info('u1', '', '', 't', 'pc_feed')
+    assert success, msg
+    assert res_json['data'] == {'notes': []}
+    assert cache.stats['misses'] == 1 and cache.stats['hits'] == 1
+    cache.close()
@@ -0,0 +1,146 @@
+import threading
+
+from xhs_utils.search_util import build_search_combos, deep_search_note, expand_keyword_notes, geo_sweep_search_note, parse_suggestions, split_bbox
+
+
+class FakeSearchApis:
+    """search_note 按 (筛选条件, 位置, 页码) 返回预设结果，记录每次请求。"""
+
+    def __init__(self, results, page_size=2):
+        self.results = results
+        self.page_size = page_size
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def search_note(self, query, cookies_str, page=1, sort_type_choice=0, note_type=0, note_time=0, note_range=0, pos_distance=0, geo="", proxies=None):
+        key = self.key(query, sort_type_choice, geo)
+        with self.lock:
+            self.requests.append((key, page))
+        note_ids = self.results(key) if callable(self.results) else self.results.get(key, [])
+        start = (page - 1) * self.page_size
+        items = [{'id': note_id, 'model_type': 'note'} for note_id in note_ids[start:start + self.page_size]]
+        return True, 'success', {'data': {'items': items, 'has_more': start + self.page_size < len(note_ids)}}
+
+    @staticmethod
+    def key(query, sort_type_choice, geo):
+        return sort_type_choice
+
+
+def test_deep_search_dedups_across_combos():
+    apis = FakeSearchApis({0: ['a', 'b', 'c', 'd'], 1: ['e', 'c', 'd', 'f']})
+    success, msg, notes = deep_search_note(apis, '咖啡', 0, '', combos=build_search_combos(sort_types=(0, 1)), max_workers=1)
+    assert success, msg
+    assert [note['id'] for note in notes] == ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+def test_combo_stops_after_idle_pages():
+    # 第二组条件第一页都是已知笔记，idle_pages=1 时翻一页就停止，idle_pages=2 时继续翻到第二页的新笔记
+    apis = FakeSearchApis({0: ['a', 'b', 'c', 'd'], 1: ['a', 'b', 'e', 'f']})
+    success, msg, notes = deep_search_note(apis, '咖啡', 0, '', combos=build_search_combos(sort_types=(0, 1)), max_workers=1, idle_pages=1)
+    assert success and len(notes) == 4
+    assert [page for key, page in apis.requests if key == 1] == [1]
+
+    apis = FakeSearchApis({0: ['a', 'b', 'c', 'd'], 1: ['a', 'b', 'e', 'f']})
+    success, msg, notes = deep_search_note(apis, '咖啡', 0, '', combos=build_search_combos(sort_types=(0, 1)), max_workers=1, idle_pages=2)
+    assert [note['id'] for note in notes] == ['a', 'b', 'c', 'd', 'e', 'f']
+
+
+def test_deep_search_stops_when_require_num_reached():
+    apis = FakeSearchApis({0: ['a', 'b', 'c', 'd'], 1: ['e', 'f'], 2: ['g', 'h']})
+    success, msg, notes = deep_search_note(apis, '咖啡', 3, '', combos=build_search_combos(sort_types=(0, 1, 2)), max_workers=1)
+    assert success
+    assert [note['id'] for note in notes] == ['a', 'b', 'c']
+    assert apis.requests == [(0, 1), (0, 2)]
+
+
+def test_deep_search_fails_only_when_every_combo_fails():
+    class FailingApis(FakeSearchApis):
+        def search_note(self, query, cookies_str, page=1, sort_type_choice=0, *args, **kwargs):
+            if sort_type_choice == 1:
+                return False, 'boom', None
+            return super().search_note(query, cookies_str, page, sort_type_choice, *args, **kwargs)
+
+    apis = FailingApis({0: ['a']})
+    success, msg, notes = deep_search_note(apis, '咖啡', 0, '', combos=build_search_combos(sort_types=(0, 1)), max_workers=2)
+    assert success and msg == 'boom'
+    assert [note['id'] for note in notes] == ['a']
+    success, msg, notes = deep_search_note(apis, '咖啡', 0, '', combos=build_search_combos(sort_types=(1,)))
+    assert not success and notes == []
+
+
+class FakeGeoApis(FakeSearchApis):
+    @staticmethod
+    def key(query, sort_type_choice, geo):
+        return geo['latitude'], geo['longitude']
+
+
+def _geo_results(key):
+    # (1, 1) 附近笔记密集，其余位置各一篇
+    if key == (1.0, 1.0):
+        return [f'dense-{i}' for i in range(10)]
+    return [f'{key[0]},{key[1]}']
+
+
+def test_split_bbox():
+    assert split_bbox((0, 0, 4, 2), 2, 1) == [(0, 0, 2, 2), (2, 0, 4, 2)]
+
+
+def test_geo_sweep_subdivides_dense_cells():
+    apis = FakeGeoApis(_geo_results)
+    success, msg, notes = geo_sweep_search_note(apis, '咖啡', '', (0, 0, 4, 4), rows=2, cols=2, max_depth=1, max_pages=2)
+    assert success, msg
+    points = {key for key, page in apis.requests}
+    assert points == {(1.0, 1.0), (1.0, 3.0), (3.0, 1.0), (3.0, 3.0), (0.5, 0.5), (0.5, 1.5), (1.5, 0.5), (1.5, 1.5)}
+    # 密集格子两页 4 篇，其余 3 个格子和 4 个细分格子各 1 篇
+    assert len(notes) == len({note['id'] for note in notes}) == 4 + 3 + 4
+
+
+def test_geo_sweep_respects_max_depth():
+    apis = FakeGeoApis(_geo_results)
+    success, msg, notes = geo_sweep_search_note(apis, '咖啡', '', (0, 0, 4, 4), rows=2, cols=2, max_depth=0, max_pages=2)
+    assert success
+    assert len({key for key, page in apis.requests}) == 4
+    assert [page for key, page in apis.requests if key == (1.0, 1.0)] == [1, 2]
+
+
+class FakeKeywordApis(FakeSearchApis):
+    SUGGESTIONS = {'咖啡': ['拿铁', '美式'], '拿铁': ['燕麦拿铁', '咖啡'], '美式': ['冰美式'], '燕麦拿铁': ['燕麦']}
+
+    def __init__(self):
+        super().__init__(lambda query: [f'{query}-1', 'shared'])
+        self.suggested = []
+
+    def get_search_keyword(self, word, cookies_str, proxies=None):
+        with self.lock:
+            self.suggested.append(word)
+        return True, 'success', {'data': {'sug_items': [{'text': text} for text in self.SUGGESTIONS.get(word, [])]}}
+
+    @staticmethod
+    def key(query, sort_type_choice, geo):
+        return query
+
+
+def test_parse_suggestions():
+    assert parse_suggestions({'data': {'sug_items': [{'text': ' 拿铁 '}, 'x', {'text': ''}]}}) == ['拿铁', 'x']
+    assert parse_suggestions(None) == []
+
+
+def test_expand_keywords_respects_depth():
+    apis = FakeKeywordApis()
+    results = list(expand_keyword_notes(apis, ['咖啡'], '', max_depth=1, max_workers=1))
+    terms = {key for key, page in apis.requests}
+    assert terms == {'咖啡', '拿铁', '美式'}
+    assert apis.suggested == ['咖啡']
+    # 关键词之间共有的笔记只返回一次
+    assert sorted(note['id'] for term, note in results) == ['shared', '咖啡-1', '拿铁-1', '美式-1']
+
+
+def test_expand_keywords_respects_max_terms_and_dedups_terms():
+    apis = FakeKeywordApis()
+    list(expand_keyword_notes(apis, ['咖啡', '咖啡'], '', max_depth=5, max_terms=100, max_workers=1))
+    searched = [key for key, page in apis.requests if page == 1]
+    assert sorted(searched) == sorted(['咖啡', '拿铁', '美式', '燕麦拿铁', '冰美式', '燕麦'])
+
+    apis = FakeKeywordApis()
+    list(expand_keyword_notes(apis, ['咖啡'], '', max_depth=5, max_terms=2, max_workers=1))
+    assert len({key for key, page in apis.requests}) == 2
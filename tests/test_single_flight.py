@@ -0,0 +1,114 @@
+import threading
+import time
+
+from apis.xhs_pc_apis import XHS_Apis, coalesced
+from xhs_utils.single_flight import SingleFlight
+
+
+def run_concurrently(n, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight(ttl=0)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return True, 'success', {'data': {'items': [1]}}
+
+    results = run_concurrently(5, lambda: flight.do('k', fn))
+    assert len(calls) == 1
+    assert flight.stats['executed'] == 1 and flight.stats['coalesced'] == 4
+    assert all(result == (True, 'success', {'data': {'items': [1]}}) for result in results)
+    # 每个调用方拿到独立的副本
+    results[0][2]['data']['items'].append(2)
+    assert results[1][2]['data']['items'] == [1]
+
+
+def test_successful_results_cached_for_ttl_and_failures_not_cached():
+    flight = SingleFlight(ttl=60, max_entries=2)
+    calls = []
+
+    def ok():
+        calls.append('ok')
+        return True, 'success', {'n': len(calls)}
+
+    assert flight.do('a', ok) == flight.do('a', ok)
+    assert calls == ['ok'] and flight.stats['cached'] == 1
+
+    def fail():
+        calls.append('fail')
+        return False, 'boom', None
+
+    flight.do('b', fail)
+    flight.do('b', fail)
+    assert calls.count('fail') == 2
+
+    flight.do('c', ok)
+    flight.do('d', ok)
+    flight.do('a', ok)
+    assert calls.count('ok') == 4
+
+
+def test_exception_propagates_to_leader_and_followers_get_failure():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fn():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError('boom')
+
+    leader_errors = []
+    follower_result = []
+
+    def lead():
+        try:
+            flight.do('k', fn)
+        except RuntimeError as e:
+            leader_errors.append(str(e))
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=lambda: follower_result.append(flight.do('k', fn)))
+    follower.start()
+    leader.join()
+    follower.join()
+    assert leader_errors == ['boom']
+    assert follower_result == [(False, 'boom', None)]
+
+
+class FakeApis(XHS_Apis):
+    def __init__(self, single_flight):
+        super().__init__(single_flight=single_flight, response_cache=None)
+        self.calls = []
+
+    @coalesced
+    def get_thing(self, note_id, cookies_str, proxies=None):
+        self.calls.append((note_id, cookies_str))
+        time.sleep(0.1)
+        return True, 'success', {'note_id': note_id}
+
+
+def test_coalesced_keys_on_params_and_account_but_not_proxies():
+    apis = FakeApis(SingleFlight(ttl=60))
+    apis.get_thing('n1', 'a1=x', proxies={'http': 'p1'})
+    apis.get_thing('n1', 'a1=x', proxies={'http': 'p2'})
+    apis.get_thing(note_id='n1', cookies_str='a1=x')
+    apis.get_thing('n1', 'a1=y')
+    apis.get_thing('n2', 'a1=x')
+    assert apis.calls == [('n1', 'a1=x'), ('n1', 'a1=y'), ('n2', 'a1=x')]
+
+    apis = FakeApis(None)
+    apis.get_thing('n1', 'a1=x')
+    apis.get_thing('n1', 'a1=x')
+    assert len(apis.calls) == 2
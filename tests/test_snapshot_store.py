@@ -0,0 +1,48 @@
+from xhs_utils.snapshot_store import ADDED, CHANGED, MOVED, REMOVED, SnapshotStore, snapshot_entries
+
+PARAMS = {'query': '咖啡', 'page': 1}
+
+
+def test_snapshot_entries():
+    items = [
+        {'id': 'a', 'model_type': 'note', 'note_card': {'interact_info': {'liked_count': '1', 'other': 'x'}}},
+        {'id': 'q', 'model_type': 'hot_query'},
+        {'id': 'b'},
+    ]
+    assert snapshot_entries(items) == [('a', {'liked_count': '1'}), ('b', {})]
+
+
+def test_record_stores_only_the_delta(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    try:
+        first = store.record('search', PARAMS, [('a', {'liked_count': '1'}), ('b', {'liked_count': '2'}), ('c', {})], ts=100)
+        assert first == {ADDED: 3, REMOVED: 0, MOVED: 0, CHANGED: 0}
+        # 参数的键顺序不影响序列
+        second = store.record('search', {'page': 1, 'query': '咖啡'}, [('b', {'liked_count': '2'}), ('a', {'liked_count': '5'}), ('d', {})], ts=200)
+        assert second == {ADDED: 1, REMOVED: 1, MOVED: 2, CHANGED: 1}
+        unchanged = store.record('search', PARAMS, [('b', {'liked_count': '2'}), ('a', {'liked_count': '5'}), ('d', {})], ts=300)
+        assert unchanged == {ADDED: 0, REMOVED: 0, MOVED: 0, CHANGED: 0}
+        rows = store._conn.execute('SELECT COUNT(*) FROM snapshot_deltas').fetchone()[0]
+        assert rows == 3 + 5
+        assert store.latest('search', PARAMS) == [('b', 1, {'liked_count': '2'}), ('a', 2, {'liked_count': '5'}), ('d', 3, {})]
+        assert store.rank_history('search', PARAMS, 'a') == [(100, 1), (200, 2)]
+        assert store.rank_history('search', PARAMS, 'c') == [(100, 3), (200, None)]
+        assert store.counter_history('search', PARAMS, 'a') == [(100, {'liked_count': '1'}), (200, {'liked_count': '5'})]
+        assert store.new_entrants('search', PARAMS, since=100) == [(200, 'd', 3)]
+        assert store.latest('search', {'query': '其它'}) == []
+    finally:
+        store.close()
+
+
+def test_snapshot_at_replays_deltas(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots.db'))
+    try:
+        store.record('search', PARAMS, [('a', {'liked_count': '1'}), ('b', {}), ('c', {})], ts=100)
+        store.record('search', PARAMS, [('b', {}), ('a', {'liked_count': '5'}), ('d', {})], ts=200)
+        store.record('search', PARAMS, [('c', {}), ('a', {'liked_count': '7'})], ts=300)
+        assert store.snapshot_at('search', PARAMS, 50) == []
+        assert store.snapshot_at('search', PARAMS, 100) == [('a', 1, {'liked_count': '1'}), ('b', 2, {}), ('c', 3, {})]
+        assert store.snapshot_at('search', PARAMS, 250) == [('b', 1, {}), ('a', 2, {'liked_count': '5'}), ('d', 3, {})]
+        assert store.snapshot_at('search', PARAMS, 300) == store.latest('search', PARAMS)
+    finally:
+        store.close()
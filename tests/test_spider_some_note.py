@@ -0,0 +1,40 @@
+from main import Data_Spider
+from xhs_utils.dedup import NoteDeduper
+from xhs_utils.frontier import open_frontier
+
+
+def _url(n):
+    return f'https://www.xiaohongshu.com/explore/{n:024x}?xsec_token=t'
+
+
+def _spider(monkeypatch, fail=()):
+    spider = Data_Spider()
+    requested = []
+
+    def fake_spider_note(note_url, cookies_str, proxies=None, rate_limiter=None):
+        requested.append(note_url)
+        if note_url in fail:
+            return False, 'boom', None
+        return True, 'success', {'note_id': note_url.split('/')[-1].split('?')[0], 'title': ''}
+
+    monkeypatch.setattr(spider, 'spider_note', fake_spider_note)
+    return spider, requested
+
+
+def test_max_notes_counts_only_fetched_notes(monkeypatch):
+    spider, requested = _spider(monkeypatch, fail={_url(2)})
+    notes = [_url(1), _url(1), _url(2), _url(3), _url(4)]
+    spider.spider_some_note(notes, '', {}, '', max_notes=2, deduper=NoteDeduper())
+    # 重复的链接和失败的请求都不占名额
+    assert requested == [_url(1), _url(2), _url(3)]
+
+
+def test_max_notes_skips_resumed_notes(monkeypatch, tmp_path):
+    db_path = str(tmp_path / 'frontier.db')
+    with open_frontier('notes:max', db_path=db_path) as frontier:
+        frontier.add([_url(1)])
+        frontier.mark_fetched(_url(1), {'note_id': f'{1:024x}', 'title': ''})
+    spider, requested = _spider(monkeypatch)
+    with open_frontier('notes:max', resume=True, db_path=db_path) as frontier:
+        spider.spider_some_note(iter([_url(1), _url(2), _url(3)]), '', {}, '', max_notes=1, frontier=frontier)
+    assert requested == [_url(2)]
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import main
+from main import Data_Spider
+
+
+class FakeWriter:
+    def __init__(self, file_path, type='note'):
+        self.rows = []
+        FakeWriter.instance = self
+
+    def append(self, info):
+        self.rows.append(info['user_id'])
+
+    def close(self):
+        pass
+
+
+def _spider(monkeypatch, delays, fail=()):
+    spider = Data_Spider()
+    lock = threading.Lock()
+    state = {'in_flight': 0, 'max_in_flight': 0}
+
+    def fake_spider_user(user_id, cookies_str, proxies=None, rate_limiter=None):
+        with lock:
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        time.sleep(delays.get(user_id, 0))
+        with lock:
+            state['in_flight'] -= 1
+        if user_id in fail:
+            return False, 'boom', None
+        return True, 'success', {'user_id': user_id, 'nickname': user_id}
+
+    monkeypatch.setattr(spider, 'spider_user', fake_spider_user)
+    monkeypatch.setattr(main, 'XlsxStreamWriter', FakeWriter)
+    return spider, state
+
+
+def test_results_are_written_in_input_order(monkeypatch):
+    # 前面的用户返回得慢，输出仍按输入顺序
+    spider, state = _spider(monkeypatch, {'u1': 0.1, 'u2': 0.05}, fail={'u3'})
+    users = ['u1', 'https://www.xiaohongshu.com/user/profile/u2?xsec_token=t', 'u3', 'u4', 'u1', 'u5']
+    count, success, msg = spider.spider_some_user(users, '', {'excel': ''}, 'excel', max_workers=4)
+    assert success and count == 4
+    assert FakeWriter.instance.rows == ['u1', 'u2', 'u4', 'u5']
+    assert state['max_in_flight'] > 1
+
+
+def test_users_are_read_lazily_with_a_bounded_window(monkeypatch):
+    spider, state = _spider(monkeypatch, {})
+    pulled = []
+
+    def users():
+        for n in range(100):
+            pulled.append(n)
+            yield f'u{n}'
+
+    progress = []
+    spider.spider_some_user(users(), '', {'excel': ''}, 'excel', max_workers=2, progress_callback=lambda message: progress.append(len(pulled)))
+    assert len(progress) == 100
+    # 处理第一个用户时最多只读入 max_workers * 2 个用户
+    assert progress[0] <= 4
+    assert state['max_in_flight'] <= 2
+
+
+def test_max_users(monkeypatch):
+    spider, state = _spider(monkeypatch, {})
+    count, success, msg = spider.spider_some_user((f'u{n}' for n in range(10)), '', {'excel': ''}, 'excel', max_users=3)
+    assert count == 3
+    assert FakeWriter.instance.rows == ['u0', 'u1', 'u2']
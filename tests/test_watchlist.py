@@ -0,0 +1,74 @@
+from xhs_utils.seen_index import SeenNoteIndex
+from xhs_utils.watchlist import KeywordWatcher, parse_watchlist, search_new_notes
+
+
+class SearchApis:
+    """按页返回预设的搜索结果（最新在前）。"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def search_note(self, query, cookies_str, page, sort_type_choice, proxies=None):
+        self.requested.append(page)
+        items = [{'id': note_id, 'model_type': 'note', 'xsec_token': 't'} for note_id in self.pages[page - 1]]
+        return True, 'success', {'data': {'items': items, 'has_more': page < len(self.pages)}}
+
+
+def test_parse_watchlist():
+    watchlist = parse_watchlist('咖啡\n# 注释\n\n露营|30\n徒步|abc', default_interval=600)
+    assert watchlist == [
+        {'query': '咖啡', 'interval': 600},
+        {'query': '露营', 'interval': 1800},
+        {'query': '徒步', 'interval': 600},
+    ]
+
+
+def test_search_stops_at_first_seen_note_without_marking(tmp_path):
+    seen_index = SeenNoteIndex(str(tmp_path / 'seen.db'))
+    seen_index.mark_fetched('c')
+    apis = SearchApis([['a', 'b'], ['b', 'c', 'd'], ['e']])
+    success, msg, notes = search_new_notes(apis, '咖啡', '', seen_index)
+    assert success
+    assert [note['id'] for note in notes] == ['a', 'b']
+    assert apis.requested == [1, 2]
+    assert seen_index.known(['a', 'b']) == set()
+
+
+def test_failed_notes_are_retried_until_fetched(tmp_path):
+    seen_index = SeenNoteIndex(str(tmp_path / 'seen.db'))
+    apis = SearchApis([['a', 'b', 'c']])
+    handed = []
+
+    def on_new_notes(query, notes):
+        handed.append([note['id'] for note in notes])
+        # 模拟 spider_some_note：只有详情获取成功的笔记登记到 seen_index
+        for note in notes:
+            if note['id'] != 'b' or len(handed) >= 3:
+                seen_index.mark_fetched(note['id'])
+
+    watcher = KeywordWatcher(apis, [], '', seen_index, on_new_notes)
+    assert watcher.check('咖啡') == 3
+    # 第二次检查：搜索在已获取的 a 处停止，b 作为重试再次交给 on_new_notes
+    assert watcher.check('咖啡') == 1
+    assert watcher.check('咖啡') == 1
+    assert watcher.check('咖啡') == 0
+    assert handed == [['a', 'b', 'c'], ['b'], ['b']]
+
+
+def test_retries_are_capped(tmp_path):
+    seen_index = SeenNoteIndex(str(tmp_path / 'seen.db'))
+    apis = SearchApis([['x', 'a']])
+    handed = []
+
+    def on_new_notes(query, notes):
+        handed.append([note['id'] for note in notes])
+        # a 每次都获取失败
+        for note in notes:
+            if note['id'] != 'a':
+                seen_index.mark_fetched(note['id'])
+
+    watcher = KeywordWatcher(apis, [], '', seen_index, on_new_notes, max_retries=2)
+    for _ in range(5):
+        watcher.check('咖啡')
+    assert handed == [['x', 'a'], ['a'], ['a']]
@@ -0,0 +1,43 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class CapabilityCache:
+    """
+    接口能力缓存：按账号记住某个接口最近一次可用的变体（如 user_posted 走 v2 还是 v1、xsec_source 用哪个值），
+    ttl 秒内后续的翻页和其它用户直接使用可用的变体，不再每页先请求一次失败的变体；过期后重新探测。
+    """
+
+    def __init__(self, ttl: float = 6 * 3600) -> None:
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+    def get(self, account_key: str, name: str, now: float = None) -> Optional[str]:
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self._entries.get((account_key, name))
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[(account_key, name)]
+                return None
+            return entry[0]
+
+    def set(self, account_key: str, name: str, value: str, now: float = None) -> None:
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._entries[(account_key, name)] = (value, now + self.ttl)
+
+    def forget(self, account_key: str, name: str) -> None:
+        with self._lock:
+            self._entries.pop((account_key, name), None)
+
+
+_default = CapabilityCache()
+
+
+def default_capability_cache() -> CapabilityCache:
+    """进程内共享的 CapabilityCache，所有 XHS_Apis 实例默认共用。"""
+    return _default
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+
+
+class CursorCheckpoint:
+    """
+    分页游标断点：按 (endpoint, key) 持久化 cursor 与已获取的数据，每 every_n_pages 页保存一次，
+    分页在中途失败后再次调用会从最后保存的 cursor 继续，而不是从第一页重新翻起。
+    已获取的数据按页追加写入，不会在每次保存时整体重写。
+    """
+
+    def __init__(self, db_path: str = None, every_n_pages: int = 10) -> None:
+        self.db_path = db_path or get_state_path('checkpoint.db')
+        self.every_n_pages = max(int(every_n_pages), 1)
+        self._pages: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS checkpoint ('
+                'endpoint TEXT NOT NULL, key TEXT NOT NULL, cursor TEXT NOT NULL, item_count INTEGER NOT NULL, '
+                'updated_at REAL NOT NULL, PRIMARY KEY (endpoint, key))'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS checkpoint_items ('
+                'endpoint TEXT NOT NULL, key TEXT NOT NULL, seq INTEGER NOT NULL, item TEXT NOT NULL, '
+                'PRIMARY KEY (endpoint, key, seq))'
+            )
+            self._conn.commit()
+
+    def load(self, endpoint: str, key: str) -> Tuple[str, List]:
+        """返回 (cursor, items_so_far)，没有断点时返回 ('', [])。"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT cursor, item_count FROM checkpoint WHERE endpoint = ? AND key = ?', (endpoint, key)
+            ).fetchone()
+            if row is None:
+                return '', []
+            cursor, item_count = row
+            items = [
+                json.loads(item) for (item,) in self._conn.execute(
+                    'SELECT item FROM checkpoint_items WHERE endpoint = ? AND key = ? AND seq < ? ORDER BY seq',
+                    (endpoint, key, item_count),
+                )
+            ]
+        logger.info(f'从断点继续分页: endpoint={endpoint}, key={key}, 已有 {len(items)} 条')
+        return cursor, items
+
+    def step(self, endpoint: str, key: str, cursor: str, items: List) -> None:
+        """每获取一页调用一次，累计满 every_n_pages 页时保存。"""
+        page_key = (endpoint, key)
+        with self._lock:
+            self._pages[page_key] = self._pages.get(page_key, 0) + 1
+            due = self._pages[page_key] % self.every_n_pages == 0
+        if due:
+            self.save(endpoint, key, cursor, items)
+
+    def save(self, endpoint: str, key: str, cursor: str, items: List) -> None:
+        """立即保存断点，只追加上次保存之后新增的数据。"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT item_count FROM checkpoint WHERE endpoint = ? AND key = ?', (endpoint, key)
+            ).fetchone()
+            saved = row[0] if row else 0
+            if saved > len(items):
+                self._conn.execute('DELETE FROM checkpoint_items WHERE endpoint = ? AND key = ?', (endpoint, key))
+                saved = 0
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO checkpoint_items (endpoint, key, seq, item) VALUES (?, ?, ?, ?)',
+                [(endpoint, key, seq, json.dumps(item, ensure_ascii=False)) for seq, item in enumerate(items[saved:], start=saved)],
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO checkpoint (endpoint, key, cursor, item_count, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (endpoint, key, cursor, len(items), time.time()),
+            )
+            self._conn.commit()
+
+    def finish(self, endpoint: str, key: str, success: bool, cursor: str, items: List) -> None:
+        """分页结束时调用：成功则删除断点，失败则立即保存当前进度。"""
+        with self._lock:
+            self._pages.pop((endpoint, key), None)
+        if success:
+            self.clear(endpoint, key)
+        else:
+            self.save(endpoint, key, cursor, items)
+
+    def clear(self, endpoint: str, key: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM checkpoint WHERE endpoint = ? AND key = ?', (endpoint, key))
+            self._conn.execute('DELETE FROM checkpoint_items WHERE endpoint = ? AND key = ?', (endpoint, key))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,228 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from xhs_utils.url_util import parse_note_url
+
+
+class CommentBudget:
+    """
+    单篇笔记的评论爬取预算：一级评论数上限、每条一级评论的回复数上限、请求次数上限与时间上限（秒），
+    任一上限为 0 或 None 表示不限。预算耗尽后分页提前结束，把请求额度留给更多的笔记。
+    同一个预算对象可被并发获取二级评论的多个线程共用。
+    """
+
+    def __init__(self, max_top: int = 0, max_replies: int = 0, max_requests: int = 0, deadline_seconds: float = 0) -> None:
+        self.max_top = max(int(max_top or 0), 0)
+        self.max_replies = max(int(max_replies or 0), 0)
+        self.max_requests = max(int(max_requests or 0), 0)
+        self.deadline_seconds = max(float(deadline_seconds or 0), 0.0)
+        self.requests = 0
+        self.top_count = 0
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+    def fresh(self) -> 'CommentBudget':
+        """按相同的上限为下一篇笔记创建新的预算。"""
+        return CommentBudget(self.max_top, self.max_replies, self.max_requests, self.deadline_seconds)
+
+    def expired(self) -> bool:
+        return bool(self.deadline_seconds) and time.time() - self._started >= self.deadline_seconds
+
+    def take_request(self) -> bool:
+        """申请一次请求额度，请求次数或时间用尽时返回 False。"""
+        with self._lock:
+            if self.expired() or (self.max_requests and self.requests >= self.max_requests):
+                return False
+            self.requests += 1
+            return True
+
+    def take_top(self) -> bool:
+        """申请一条一级评论，达到上限时返回 False。"""
+        with self._lock:
+            if self.max_top and self.top_count >= self.max_top:
+                return False
+            self.top_count += 1
+            return True
+
+    def top_full(self) -> bool:
+        with self._lock:
+            return bool(self.max_top) and self.top_count >= self.max_top
+
+    def replies_allowed(self, count: int) -> bool:
+        """某条一级评论已取得 count 条回复时，是否还能继续取。"""
+        return not self.max_replies or count < self.max_replies
+
+
+class _NoteCommentJob:
+    """一篇笔记的评论翻页状态：一级评论按 cursor 顺序翻页，各条一级评论的二级评论互相独立翻页。"""
+
+    def __init__(self, note_url: str, budget: CommentBudget = None) -> None:
+        self.note_url = note_url
+        self.note_id, kv_dist = parse_note_url(note_url)
+        self.xsec_token = kv_dist.get('xsec_token', '')
+        self.budget = budget
+        self.cursor = ''
+        self.comments: List[dict] = []
+        self.replies: Dict[str, List[dict]] = {}
+        self.top_done = False
+        self.pending = 0
+        self.success = True
+        self.msg = 'success'
+
+    @property
+    def finished(self) -> bool:
+        return self.pending == 0 and (self.top_done or not self.success)
+
+    def assemble(self) -> List[dict]:
+        """把各线程取到的二级评论拼回一级评论，结构与 get_note_all_comment 的返回一致。"""
+        max_replies = self.budget.max_replies if self.budget is not None else 0
+        for comment in self.comments:
+            sub_comments = list(comment.get('sub_comments') or []) + self.replies.get(comment['id'], [])
+            comment['sub_comments'] = sub_comments[:max_replies] if max_replies else sub_comments
+        return self.comments
+
+
+class BatchCommentCrawler:
+    """
+    多篇笔记的评论批量爬取：把每一页评论请求作为一个调度单位，在多篇笔记之间交错翻页，
+    全局最多 max_workers 个请求同时进行，同时处理的笔记数不超过 max_active_notes，笔记链接按需从输入中读取。
+    某个请求变慢只占用一个线程，其它笔记的翻页照常进行，总耗时取决于请求总数与限速，而不是各篇笔记串行耗时之和。
+    传入 checkpoint（CursorCheckpoint）时每篇笔记的一级评论进度按 ("comment_page", note_id) 保存，失败后再次运行从断点继续。
+    """
+
+    def __init__(self, xhs_apis, cookies_str: str, proxies=None, rate_limiter=None, max_workers: int = 8, max_active_notes: int = None, checkpoint=None, budget: CommentBudget = None) -> None:
+        self.xhs_apis = xhs_apis
+        self.cookies_str = cookies_str
+        self.proxies = proxies
+        self.rate_limiter = rate_limiter
+        self.max_workers = max(int(max_workers), 1)
+        self.max_active_notes = max(int(max_active_notes or self.max_workers * 2), 1)
+        self.checkpoint = checkpoint
+        self.budget = budget
+
+    def run(self, note_urls: Iterable[str], on_note_done: Callable[[str, bool, str, List[dict]], None] = None) -> Dict[str, int]:
+        """
+        爬取 note_urls 中每篇笔记的全部评论，每篇笔记完成时在调用线程中回调 on_note_done(note_url, success, msg, comments)
+        :return: {'notes': 笔记数, 'failed': 失败笔记数, 'comments': 一级评论数, 'requests': 请求数}
+        """
+        stats = {'notes': 0, 'failed': 0, 'comments': 0, 'requests': 0}
+        url_iter = iter(note_urls)
+        exhausted = False
+        active: List[_NoteCommentJob] = []
+        ready: Deque[Tuple[_NoteCommentJob, Optional[dict], str]] = deque()
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                while not exhausted and len(active) < self.max_active_notes:
+                    note_url = next(url_iter, None)
+                    if note_url is None:
+                        exhausted = True
+                        break
+                    active.append(self._open_job(note_url, ready))
+                while ready and len(in_flight) < self.max_workers:
+                    job, comment, cursor = ready.popleft()
+                    if not job.success:
+                        job.pending -= 1
+                        continue
+                    if job.budget is not None and not job.budget.take_request():
+                        job.pending -= 1
+                        if comment is None:
+                            job.top_done = True
+                        continue
+                    future = executor.submit(self._fetch_page, job, comment, cursor)
+                    in_flight[future] = (job, comment)
+                    stats['requests'] += 1
+                for job in [job for job in active if job.finished]:
+                    active.remove(job)
+                    self._close_job(job, stats, on_note_done)
+                if not in_flight:
+                    if exhausted and not active and not ready:
+                        break
+                    continue
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, comment = in_flight.pop(future)
+                    job.pending -= 1
+                    try:
+                        success, msg, res_json = future.result()
+                        if not success:
+                            raise Exception(msg)
+                        self._handle_page(job, comment, res_json["data"], ready)
+                    except Exception as e:
+                        if job.success:
+                            job.success, job.msg = False, str(e)
+        return stats
+
+    def _open_job(self, note_url: str, ready: Deque) -> _NoteCommentJob:
+        job = _NoteCommentJob(note_url, self.budget.fresh() if self.budget is not None else None)
+        if self.checkpoint is not None:
+            job.cursor, job.comments = self.checkpoint.load("comment_page", job.note_id)
+            if job.budget is not None:
+                job.comments = [comment for comment in job.comments if job.budget.take_top()]
+        job.pending += 1
+        ready.append((job, None, job.cursor))
+        for comment in job.comments:
+            self._schedule_replies(job, comment, ready)
+        return job
+
+    def _fetch_page(self, job: _NoteCommentJob, comment: Optional[dict], cursor: str):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        if comment is None:
+            return self.xhs_apis.get_note_out_comment(job.note_id, cursor, job.xsec_token, self.cookies_str, self.proxies)
+        return self.xhs_apis.get_note_inner_comment(comment, cursor, job.xsec_token, self.cookies_str, self.proxies)
+
+    def _handle_page(self, job: _NoteCommentJob, comment: Optional[dict], data: dict, ready: Deque) -> None:
+        has_more = 'cursor' in data and data.get('has_more')
+        if comment is None:
+            comments = data.get('comments') or []
+            if job.budget is not None:
+                comments = [item for item in comments if job.budget.take_top()]
+            job.comments.extend(comments)
+            job.cursor = str(data.get('cursor', job.cursor))
+            if self.checkpoint is not None:
+                self.checkpoint.step("comment_page", job.note_id, job.cursor, job.comments)
+            for item in comments:
+                self._schedule_replies(job, item, ready)
+            if has_more and job.comments and not (job.budget is not None and job.budget.top_full()):
+                job.pending += 1
+                ready.append((job, None, job.cursor))
+            else:
+                job.top_done = True
+        else:
+            replies = job.replies.setdefault(comment['id'], [])
+            replies.extend(data.get('comments') or [])
+            if has_more and self._replies_allowed(job, comment):
+                job.pending += 1
+                ready.append((job, comment, str(data['cursor'])))
+
+    def _schedule_replies(self, job: _NoteCommentJob, comment: dict, ready: Deque) -> None:
+        if not comment.get('sub_comment_has_more') or not self._replies_allowed(job, comment):
+            return
+        job.pending += 1
+        ready.append((job, comment, comment['sub_comment_cursor']))
+
+    @staticmethod
+    def _replies_allowed(job: _NoteCommentJob, comment: dict) -> bool:
+        if job.budget is None:
+            return True
+        count = len(comment.get('sub_comments') or []) + len(job.replies.get(comment['id'], []))
+        return job.budget.replies_allowed(count)
+
+    def _close_job(self, job: _NoteCommentJob, stats: Dict[str, int], on_note_done) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.finish("comment_page", job.note_id, job.success, job.cursor, job.comments)
+        comments = job.assemble()
+        stats['notes'] += 1
+        stats['comments'] += len(comments)
+        if not job.success:
+            stats['failed'] += 1
+        logger.info(f'笔记 {job.note_id} 评论爬取完成: {job.success}, 一级评论 {len(comments)} 条, msg: {job.msg}')
+        if on_note_done is not None:
+            on_note_done(job.note_url, job.success, job.msg, comments)
@@ -1,4 +1,6 @@
 import os
+import re
+import sqlite3
 from loguru import logger
 from dotenv import load_dotenv
 
@@ -7,6 +9,17 @@ def load_env():
     cookies_str = os.getenv('COOKIES')
     return cookies_str
 
+def load_cookies_list():
+    """
+    读取 .env 中配置的全部 Cookies：COOKIES 以及 COOKIES_1、COOKIES_2 ... 形式的备用账号
+    """
+    load_dotenv()
+    cookies_list = [os.getenv('COOKIES') or '']
+    extra_keys = [key for key in os.environ if re.fullmatch(r'COOKIES_\d+', key)]
+    for key in sorted(extra_keys, key=lambda k: int(k.split('_')[1])):
+        cookies_list.append(os.getenv(key) or '')
+    return [cookies for cookies in cookies_list if cookies.strip()]
+
 def init():
     media_base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../datas/media_datas'))
     excel_base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../datas/excel_datas'))
@@ -20,3 +33,22 @@ def init():
         'excel': excel_base_path,
     }
     return cookies_str, base_path
+
+def get_state_path(file_name):
+    """
+    断点续爬、索引等状态文件统一保存在 datas/state_datas 下
+    """
+    state_base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../datas/state_datas'))
+    if not os.path.exists(state_base_path):
+        os.makedirs(state_base_path)
+        logger.info(f'创建目录 {state_base_path}')
+    return os.path.join(state_base_path, file_name)
+
+def open_sqlite(db_path):
+    """
+    打开状态数据库：允许跨线程使用（调用方自行加锁），启用 WAL 以便崩溃后数据仍然完整
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
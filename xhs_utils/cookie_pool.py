@@ -0,0 +1,158 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+class CookiePool:
+    """
+    多账号 Cookies 池：后台定期调用 get_user_self_info / get_user_self_info2 探测每个 Cookies 的有效性与延迟，
+    运行中的任务每次请求前通过 get() 取当前可用的 Cookies，失效的 Cookies 会被立即换下，无需重启任务。
+    """
+
+    def __init__(self, cookies_list: List[str], xhs_apis=None, probe_interval: float = 300.0, failure_threshold: int = 3, proxies: dict = None) -> None:
+        cookies_list = [c.strip() for c in cookies_list if c and c.strip()]
+        if not cookies_list:
+            raise ValueError('cookies_list 不能为空')
+        if xhs_apis is None:
+            from apis.xhs_pc_apis import XHS_Apis
+            xhs_apis = XHS_Apis()
+        self.xhs_apis = xhs_apis
+        self.probe_interval = max(float(probe_interval), 10.0)
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.proxies = proxies
+        self._entries: List[Dict[str, object]] = [
+            {
+                'cookies': cookies,
+                'valid': True,
+                'latency': None,
+                'last_check': 0.0,
+                'failures': 0,
+                'msg': '',
+            }
+            for cookies in dict.fromkeys(cookies_list)
+        ]
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> str:
+        """返回当前可用的 Cookies；当前 Cookies 失效时切换到下一个有效的 Cookies。"""
+        with self._lock:
+            entry = self._entries[self._active]
+            if not entry['valid']:
+                for offset in range(1, len(self._entries)):
+                    idx = (self._active + offset) % len(self._entries)
+                    if self._entries[idx]['valid']:
+                        logger.warning(f'Cookies #{self._active} 已失效，切换到 Cookies #{idx}')
+                        self._active = idx
+                        entry = self._entries[idx]
+                        break
+                else:
+                    logger.error('Cookies 池中没有可用的 Cookies，继续使用当前 Cookies')
+            return entry['cookies']
+
+    def report_success(self, cookies_str: str) -> None:
+        with self._lock:
+            entry = self._find(cookies_str)
+            if entry is not None:
+                entry['failures'] = 0
+
+    def report_failure(self, cookies_str: str, msg='') -> None:
+        """记录一次业务请求失败，连续失败达到阈值时唤醒后台探测，由探测结果决定是否换下该 Cookies。"""
+        with self._lock:
+            entry = self._find(cookies_str)
+            if entry is None:
+                return
+            entry['failures'] += 1
+            entry['msg'] = str(msg)
+            reached = entry['failures'] >= self.failure_threshold
+        if reached:
+            if self._thread is not None and self._thread.is_alive():
+                self._wake.set()
+            else:
+                self.probe(cookies_str)
+
+    def probe(self, cookies_str: str) -> bool:
+        """调用 get_user_self_info（失败时再试 get_user_self_info2）探测 Cookies 是否仍然有效。"""
+        start = time.time()
+        success, msg, res_json = self.xhs_apis.get_user_self_info(cookies_str, self.proxies)
+        if not success or self._is_guest(res_json):
+            success, msg, res_json = self.xhs_apis.get_user_self_info2(cookies_str, self.proxies)
+        valid = bool(success) and not self._is_guest(res_json)
+        latency = time.time() - start
+        with self._lock:
+            entry = self._find(cookies_str)
+            if entry is not None:
+                if entry['valid'] and not valid:
+                    logger.warning(f'Cookies 探测失效: msg={msg}')
+                elif not entry['valid'] and valid:
+                    logger.info('Cookies 探测恢复有效')
+                entry['valid'] = valid
+                entry['latency'] = latency
+                entry['last_check'] = time.time()
+                entry['msg'] = '' if valid else str(msg)
+                if valid:
+                    entry['failures'] = 0
+        return valid
+
+    def probe_all(self) -> None:
+        with self._lock:
+            cookies_list = [entry['cookies'] for entry in self._entries]
+        for cookies_str in cookies_list:
+            if self._stop.is_set():
+                break
+            try:
+                self.probe(cookies_str)
+            except Exception as e:
+                logger.error(f'Cookies 探测异常: {e}')
+
+    def start(self) -> None:
+        """启动后台探测线程。"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> List[Dict[str, object]]:
+        """返回每个 Cookies 的探测状态（不含 Cookies 原文）。"""
+        with self._lock:
+            return [
+                {
+                    'index': idx,
+                    'active': idx == self._active,
+                    'valid': entry['valid'],
+                    'latency': entry['latency'],
+                    'last_check': entry['last_check'],
+                    'failures': entry['failures'],
+                    'msg': entry['msg'],
+                }
+                for idx, entry in enumerate(self._entries)
+            ]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.probe_all()
+            self._wake.wait(self.probe_interval)
+            self._wake.clear()
+
+    def _find(self, cookies_str: str) -> Optional[Dict[str, object]]:
+        for entry in self._entries:
+            if entry['cookies'] == cookies_str:
+                return entry
+        return None
+
+    @staticmethod
+    def _is_guest(res_json) -> bool:
+        try:
+            return bool(res_json.get('data', {}).get('guest', False))
+        except Exception:
+            return False
@@ -1,6 +1,17 @@
+import hashlib
+
+
 def trans_cookies(cookies_str):
     if '; ' in cookies_str:
         ck = {i.split('=')[0]: '='.join(i.split('=')[1:]) for i in cookies_str.split('; ')}
     else:
         ck = {i.split('=')[0]: '='.join(i.split('=')[1:]) for i in cookies_str.split(';')}
     return ck
+
+def get_account_key(cookies_str):
+    """
+    由 cookies 得到账号标识（web_session 优先，其次 a1）的摘要，用于按账号区分的本地状态，避免明文保存 cookies
+    """
+    ck = trans_cookies(cookies_str or '')
+    raw = ck.get('web_session') or ck.get('a1') or cookies_str or ''
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
@@ -3,9 +3,9 @@ import os
 import re
 import time
 import openpyxl
-import requests
 from loguru import logger
 from retry import retry
+from xhs_utils.proxy_pool import send_request
 
 
 def norm_str(str):
@@ -23,6 +23,23 @@ def timestamp_to_str(timestamp):
     dt = time.strftime("%Y-%m-%d %H:%M:%S", time_local)
     return dt
 
+def parse_count(value):
+    """
+    把互动计数转换为整数：接口返回的计数可能是 "1.2万"、"3千"、"10+" 这样的字符串，无法解析时返回 0
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value or '').strip().replace(',', '').rstrip('+')
+    multiplier = 1
+    if text.endswith('万') or text.lower().endswith('w'):
+        multiplier, text = 10000, text[:-1]
+    elif text.endswith('千') or text.lower().endswith('k'):
+        multiplier, text = 1000, text[:-1]
+    try:
+        return int(float(text) * multiplier)
+    except ValueError:
+        return 0
+
 def handle_user_info(data, user_id):
     home_url = f'https://www.xiaohongshu.com/user/profile/{user_id}'
     nickname = data['basic_info']['nickname']
@@ -175,15 +192,20 @@ def handle_comment_info(data):
         'ip_location': ip_location,
         'pictures': pictures,
     }
-def save_to_xlsx(datas, file_path, type='note'):
-    wb = openpyxl.Workbook()
-    ws = wb.active
+def get_xlsx_headers(type='note'):
     if type == 'note':
-        headers = ['笔记id', '笔记url', '笔记类型', '用户id', '用户主页url', '昵称', '头像url', '标题', '描述', '点赞数量', '收藏数量', '评论数量', '分享数量', '视频封面url', '视频地址url', '图片地址url列表', '标签', '上传时间', 'ip归属地']
+        return ['笔记id', '笔记url', '笔记类型', '用户id', '用户主页url', '昵称', '头像url', '标题', '描述', '点赞数量', '收藏数量', '评论数量', '分享数量', '视频封面url', '视频地址url', '图片地址url列表', '标签', '上传时间', 'ip归属地']
+    elif type == 'note_author':
+        return get_xlsx_headers('note') + ['作者关注数量', '作者粉丝数量', '作者获赞和收藏数量']
     elif type == 'user':
-        headers = ['用户id', '用户主页url', '用户名', '头像url', '小红书号', '性别', 'ip地址', '介绍', '关注数量', '粉丝数量', '作品被赞和收藏数量', '标签']
+        return ['用户id', '用户主页url', '用户名', '头像url', '小红书号', '性别', 'ip地址', '介绍', '关注数量', '粉丝数量', '作品被赞和收藏数量', '标签']
     else:
-        headers = ['笔记id', '笔记url', '评论id', '用户id', '用户主页url', '昵称', '头像url', '评论内容', '评论标签', '点赞数量', '上传时间', 'ip归属地', '图片地址url列表']
+        return ['笔记id', '笔记url', '评论id', '用户id', '用户主页url', '昵称', '头像url', '评论内容', '评论标签', '点赞数量', '上传时间', 'ip归属地', '图片地址url列表']
+
+def save_to_xlsx(datas, file_path, type='note'):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    headers = get_xlsx_headers(type)
     ws.append(headers)
     for data in datas:
         data = {k: norm_text(str(v)) for k, v in data.items()}
@@ -191,13 +213,39 @@ def save_to_xlsx(datas, file_path, type='note'):
     wb.save(file_path)
     logger.info(f'数据保存至 {file_path}')
 
-def download_media(path, name, url, type):
+class XlsxStreamWriter:
+    """
+    逐行写入 Excel（openpyxl write_only 模式），行数据随写随落盘，内存占用不随行数增长
+    """
+
+    def __init__(self, file_path, type='note'):
+        self.file_path = file_path
+        self.count = 0
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.ws = self.wb.create_sheet()
+        self.ws.append(get_xlsx_headers(type))
+
+    def append(self, data):
+        self.ws.append([norm_text(str(v)) for v in data.values()])
+        self.count += 1
+
+    def close(self):
+        self.wb.save(self.file_path)
+        logger.info(f'数据保存至 {self.file_path}，共 {self.count} 条')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def download_media(path, name, url, type, proxies=None):
     if type == 'image':
-        content = requests.get(url).content
+        content = send_request('GET', url, proxies=proxies).content
         with open(path + '/' + name + '.jpg', mode="wb") as f:
             f.write(content)
     elif type == 'video':
-        res = requests.get(url, stream=True)
+        res = send_request('GET', url, proxies=proxies, stream=True)
         size = 0
         chunk_size = 1024 * 1024
         with open(path + '/' + name + '.mp4', mode="wb") as f:
@@ -247,7 +295,7 @@ def save_note_detail(note, path):
 
 
 @retry(tries=3, delay=1)
-def download_note(note_info, path, save_choice):
+def download_note(note_info, path, save_choice, proxies=None):
     note_id = note_info['note_id']
     user_id = note_info['user_id']
     title = note_info['title']
@@ -264,10 +312,20 @@ def download_note(note_info, path, save_choice):
     save_note_detail(note_info, save_path)
     if note_type == '图集' and save_choice in ['media', 'media-image', 'all']:
         for img_index, img_url in enumerate(note_info['image_list']):
-            download_media(save_path, f'image_{img_index}', img_url, 'image')
+            download_media(save_path, f'image_{img_index}', img_url, 'image', proxies)
     elif note_type == '视频' and save_choice in ['media', 'media-video', 'all']:
-        download_media(save_path, 'cover', note_info['video_cover'], 'image')
-        download_media(save_path, 'video', note_info['video_addr'], 'video')
+        download_media(save_path, 'cover', note_info['video_cover'], 'image', proxies)
+        download_media(save_path, 'video', note_info['video_addr'], 'video', proxies)
+    return save_path
+
+def download_user(user_info, path):
+    user_id = user_info['user_id']
+    nickname = norm_str(user_info['nickname'])[:20]
+    save_path = f'{path}/{nickname}_{user_id}'
+    check_and_create_path(save_path)
+    with open(f'{save_path}/user_info.json', mode='w', encoding='utf-8') as f:
+        f.write(json.dumps(user_info) + '\n')
+    save_user_detail(user_info, save_path)
     return save_path
 
 
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+from typing import List
+
+from loguru import logger
+
+from xhs_utils.common_util import get_state_path
+from xhs_utils.url_util import get_note_key
+
+
+class BloomFilter:
+    """固定容量的布隆过滤器，位数组保存在 bytearray 中。"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: bytearray = None, count: int = 0) -> None:
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = min(max(float(error_rate), 1e-9), 0.5)
+        self.num_bits = max(int(-self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / self.capacity * math.log(2))), 1)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    可扩容的布隆过滤器：当前过滤器写满后追加一个容量翻倍、误判率更低的过滤器，
+    总误判率始终不超过 error_rate，内存只随实际数据量增长。
+    """
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 0.001, growth: int = 2, tightening: float = 0.9) -> None:
+        self.initial_capacity = max(int(initial_capacity), 1)
+        self.error_rate = error_rate
+        self.growth = max(int(growth), 2)
+        self.tightening = tightening
+        self.filters: List[BloomFilter] = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return any(key in f for f in reversed(self.filters))
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    def add(self, key: str) -> bool:
+        """添加 key，返回 True 表示此前不存在。"""
+        with self._lock:
+            if any(key in f for f in reversed(self.filters)):
+                return False
+            if not self.filters or self.filters[-1].is_full:
+                idx = len(self.filters)
+                self.filters.append(BloomFilter(
+                    self.initial_capacity * (self.growth ** idx),
+                    self.error_rate * (1 - self.tightening) * (self.tightening ** idx),
+                ))
+            self.filters[-1].add(key)
+            return True
+
+    def save(self, path: str) -> None:
+        """写入临时文件后替换，避免保存中途崩溃损坏原文件。"""
+        with self._lock:
+            header = json.dumps({
+                'initial_capacity': self.initial_capacity,
+                'error_rate': self.error_rate,
+                'growth': self.growth,
+                'tightening': self.tightening,
+                'filters': [{'capacity': f.capacity, 'error_rate': f.error_rate, 'count': f.count} for f in self.filters],
+            }).encode('utf-8')
+            tmp_path = path + '.tmp'
+            with open(tmp_path, mode='wb') as f:
+                f.write(struct.pack('<I', len(header)))
+                f.write(header)
+                for bloom in self.filters:
+                    f.write(bloom.bits)
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ScalableBloomFilter':
+        with open(path, mode='rb') as f:
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+            sbf = cls(header['initial_capacity'], header['error_rate'], header['growth'], header['tightening'])
+            for meta in header['filters']:
+                bloom = BloomFilter(meta['capacity'], meta['error_rate'], count=meta['count'])
+                bloom.bits = bytearray(f.read(len(bloom.bits)))
+                sbf.filters.append(bloom)
+        return sbf
+
+
+class NoteDeduper:
+    """
+    笔记去重：按 note_id（忽略 xsec_token）在入口处丢弃重复的笔记链接，在签名和请求之前就省掉重复工作。
+    run 过滤器只在本次运行内去重；传入 persist_path 时，已成功处理的笔记写入持久化过滤器，跨运行也不会重复处理。
+    """
+
+    def __init__(self, persist_path: str = None, initial_capacity: int = 100000, error_rate: float = 0.001) -> None:
+        self.persist_path = persist_path
+        self._run = ScalableBloomFilter(initial_capacity, error_rate)
+        self._done = None
+        if persist_path:
+            if os.path.exists(persist_path):
+                try:
+                    self._done = ScalableBloomFilter.load(persist_path)
+                    logger.info(f'加载笔记去重记录 {persist_path}: 约 {len(self._done)} 条')
+                except Exception as e:
+                    logger.error(f'笔记去重记录读取失败，将重新记录: {e}')
+            if self._done is None:
+                self._done = ScalableBloomFilter(initial_capacity, error_rate)
+
+    def admit(self, url: str) -> bool:
+        """判断笔记链接是否需要处理：本次运行或以往运行中已处理过的笔记返回 False。"""
+        key = get_note_key(url)
+        if self._done is not None and key in self._done:
+            return False
+        return self._run.add(key)
+
+    def mark_done(self, url: str) -> None:
+        if self._done is not None:
+            self._done.add(get_note_key(url))
+
+    def save(self) -> None:
+        if self._done is not None and self.persist_path:
+            self._done.save(self.persist_path)
+
+
+def open_note_deduper(across_runs: bool = False) -> NoteDeduper:
+    """
+    创建笔记去重器：across_runs 为 True 时去重记录保存在 datas/state_datas/note_dedup.bloom 中跨运行生效
+    """
+    return NoteDeduper(get_state_path('note_dedup.bloom') if across_runs else None)
@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+from xhs_utils.url_util import get_note_key
+
+PENDING = 'pending'
+FETCHED = 'fetched'
+MEDIA_DONE = 'media_done'
+FAILED = 'failed'
+
+
+class CrawlFrontier:
+    """
+    持久化的爬取队列（SQLite 日志）：记录每篇笔记在某个任务中的状态 pending / fetched / media_done / failed，
+    任务崩溃或窗口关闭后可以从断点继续，已完成的笔记不会重复请求。
+    记录按 note_id（get_note_key）区分，用户和搜索任务每次运行拿到的 xsec_token 不同也能匹配上次的进度，
+    最近一次的完整链接另存在 url 列。可以用 with 语句打开，退出时关闭数据库连接。
+    """
+
+    def __init__(self, job_id: str, db_path: str = None) -> None:
+        self.job_id = job_id
+        self.db_path = db_path or get_state_path('frontier.db')
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS frontier_notes ('
+                'job_id TEXT NOT NULL, note_key TEXT NOT NULL, url TEXT NOT NULL, state TEXT NOT NULL, note_info TEXT, msg TEXT, '
+                'attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, PRIMARY KEY (job_id, note_key))'
+            )
+            self._conn.commit()
+
+    def __enter__(self) -> 'CrawlFrontier':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def add(self, urls: Iterable[str]) -> None:
+        """登记待爬取的笔记，已登记的笔记保持原状态，只更新为最新的链接。"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO frontier_notes (job_id, note_key, url, state, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (job_id, note_key) DO UPDATE SET url = excluded.url',
+                [(self.job_id, get_note_key(url), url, PENDING, now) for url in urls],
+            )
+            self._conn.commit()
+
+    def get(self, url: str) -> Tuple[Optional[str], Optional[dict]]:
+        """返回 (状态, 已保存的笔记信息)，未登记的笔记返回 (None, None)。"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT state, note_info FROM frontier_notes WHERE job_id = ? AND note_key = ?', (self.job_id, get_note_key(url))
+            ).fetchone()
+        if row is None:
+            return None, None
+        state, note_info = row
+        return state, json.loads(note_info) if note_info else None
+
+    def mark_fetched(self, url: str, note_info: dict) -> None:
+        self._update(url, FETCHED, note_info=json.dumps(note_info, ensure_ascii=False))
+
+    def mark_media_done(self, url: str) -> None:
+        self._update(url, MEDIA_DONE)
+
+    def mark_failed(self, url: str, msg) -> None:
+        self._update(url, FAILED, msg=str(msg))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT state, COUNT(*) FROM frontier_notes WHERE job_id = ? GROUP BY state', (self.job_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def reset(self) -> None:
+        """清空本任务的记录，重新开始。"""
+        with self._lock:
+            self._conn.execute('DELETE FROM frontier_notes WHERE job_id = ?', (self.job_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _update(self, url: str, state: str, note_info: str = None, msg: str = None) -> None:
+        # 仅请求详情（成功或失败）计入尝试次数，下载完成不计
+        attempts = 0 if state == MEDIA_DONE else 1
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO frontier_notes (job_id, note_key, url, state, note_info, msg, attempts, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (job_id, note_key) DO UPDATE SET url = excluded.url, state = excluded.state, '
+                'note_info = COALESCE(excluded.note_info, frontier_notes.note_info), msg = excluded.msg, '
+                'attempts = frontier_notes.attempts + excluded.attempts, updated_at = excluded.updated_at',
+                (self.job_id, get_note_key(url), url, state, note_info, msg, attempts, time.time()),
+            )
+            self._conn.commit()
+
+
+def open_frontier(job_id: str, resume: bool = False, db_path: str = None) -> CrawlFrontier:
+    """
+    打开某个任务的爬取队列：resume 为 True 时沿用上次的进度，否则清空后重新记录
+    用完需要 close()，或者写成 with open_frontier(...) as frontier:
+    """
+    frontier = CrawlFrontier(job_id, db_path)
+    if resume:
+        counts = frontier.counts()
+        if counts:
+            logger.info(f'断点续爬 {job_id}: {counts}')
+    else:
+        frontier.reset()
+    return frontier
@@ -0,0 +1,94 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from loguru import logger
+
+from xhs_utils.search_util import SearchCollector
+from xhs_utils.snapshot_store import snapshot_entries
+
+
+def parse_channels(res_json: dict) -> List[Dict[str, str]]:
+    """从 get_homefeed_all_channel 的返回中取出频道列表 [{'id': ..., 'name': ...}]。"""
+    data = (res_json or {}).get('data') or {}
+    channels = []
+    for item in data.get('categories') or []:
+        if item.get('id'):
+            channels.append({'id': item['id'], 'name': item.get('name', item['id'])})
+    return channels
+
+
+def _sample_channel(xhs_apis, channel: str, per_channel: int, cookies_str: str, collector: SearchCollector, out: queue.Queue, stop: threading.Event, proxies=None, rate_limiter=None, snapshot_store=None) -> Tuple[bool, str, int]:
+    """沿一个频道自己的 cursor_score / note_index 链翻页，每页的新笔记放入 out，返回 (success, msg, 获取条数)。"""
+    cursor_score, refresh_type, note_index = "", 1, 0
+    fetched = 0
+    channel_items = []
+    success, msg = True, 'success'
+    try:
+        while fetched < per_channel and not stop.is_set():
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = xhs_apis.get_homefeed_recommend(channel, cursor_score, refresh_type, note_index, cookies_str, proxies)
+            if not success:
+                raise Exception(msg)
+            items = res_json["data"].get("items") or []
+            if not items:
+                break
+            items = items[:per_channel - fetched]
+            fetched += len(items)
+            if snapshot_store is not None:
+                channel_items.extend(items)
+            new_notes = collector.add(items)
+            if new_notes:
+                out.put((channel, new_notes))
+            cursor_score = res_json["data"].get("cursor_score", "")
+            refresh_type = 3
+            note_index += 20
+        if snapshot_store is not None and not stop.is_set():
+            snapshot_store.record('homefeed', {'channel': channel}, snapshot_entries(channel_items))
+    except Exception as e:
+        success = False
+        msg = str(e)
+    return success, msg, fetched
+
+
+def sample_homefeed(xhs_apis, cookies_str: str, per_channel: int = 100, channels: Iterable[str] = None, max_workers: int = 8, proxies=None, rate_limiter=None, snapshot_store=None) -> Iterator[Tuple[str, dict]]:
+    """
+    主页推荐多频道并发采样：每个频道沿自己的 cursor 链翻页到 per_channel 条，频道之间并发进行，
+    笔记跨频道按 id 去重，以生成器形式边获取边返回 (频道 id, 笔记)，总耗时接近单个频道的耗时
+    :param channels: 需要采样的频道 id，默认通过 get_homefeed_all_channel 获取全部频道
+    :param max_workers: 同时采样的频道数
+    :param snapshot_store: 可选的 SnapshotStore，每个频道采样完成后按 ('homefeed', {'channel': 频道 id}) 保存一次快照
+    """
+    if channels is None:
+        success, msg, res_json = xhs_apis.get_homefeed_all_channel(cookies_str, proxies)
+        if not success:
+            raise Exception(msg)
+        channels = [channel['id'] for channel in parse_channels(res_json)]
+    channels = list(dict.fromkeys(channels))
+    collector = SearchCollector()
+    out: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1))
+    futures = {
+        executor.submit(_sample_channel, xhs_apis, channel, per_channel, cookies_str, collector, out, stop, proxies, rate_limiter, snapshot_store): channel
+        for channel in channels
+    }
+    try:
+        while True:
+            try:
+                channel, notes = out.get(timeout=0.2)
+            except queue.Empty:
+                if all(future.done() for future in futures) and out.empty():
+                    break
+                continue
+            for note in notes:
+                yield channel, note
+        for future, channel in futures.items():
+            success, msg, fetched = future.result()
+            logger.info(f'主页频道 {channel} 采样: 获取 {fetched} 条, {success}, msg: {msg}')
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    logger.info(f'主页采样完成: {len(channels)} 个频道，去重后共 {len(collector.notes)} 篇笔记')
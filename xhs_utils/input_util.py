@@ -0,0 +1,166 @@
+import csv
+import json
+import os
+import re
+import sys
+from typing import Iterable, Iterator, Optional
+
+from loguru import logger
+
+NOTE_ID_RE = re.compile(r'^[0-9a-f]{24}$')
+URL_COLUMNS = ('note_url', 'url', '笔记url', 'link')
+USER_COLUMNS = ('user_id', 'home_url', 'user_url', 'url', '用户id', '用户主页url')
+
+_warned_missing_token = False
+
+
+def _warn_missing_token() -> None:
+    """纯 note_id 补全的链接没有 xsec_token，接口通常会拒绝；只提示一次，避免大文件刷屏。"""
+    global _warned_missing_token
+    if not _warned_missing_token:
+        _warned_missing_token = True
+        logger.warning('输入中包含不带 xsec_token 的纯 note_id，获取笔记详情可能失败，请尽量提供完整的笔记链接')
+
+
+def normalize_note_url(raw: str) -> Optional[str]:
+    """
+    规范化一条输入：去除空白、跳过空行和 # 注释；纯 note_id 补全为笔记链接（不含 xsec_token，会提示一次警告）；其它非链接内容返回 None
+    """
+    value = (raw or '').strip().strip('"\'')
+    if not value or value.startswith('#'):
+        return None
+    if NOTE_ID_RE.match(value):
+        _warn_missing_token()
+        return f'https://www.xiaohongshu.com/explore/{value}'
+    if value.startswith('http://') or value.startswith('https://'):
+        return value
+    return None
+
+
+def _iter_text(f) -> Iterator[str]:
+    for line in f:
+        yield line
+
+
+def _iter_csv(f) -> Iterator[str]:
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    lowered = [col.strip().lower() for col in header]
+    url_idx = next((lowered.index(col) for col in URL_COLUMNS if col in lowered), None)
+    if url_idx is None:
+        # 没有表头时第一行也是数据，取第一列
+        url_idx = 0
+        yield header[0] if header else ''
+    for row in reader:
+        if len(row) > url_idx:
+            yield row[url_idx]
+
+
+def _iter_jsonl(f) -> Iterator[str]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            logger.warning(f'JSONL 第 {line_no} 行解析失败，已跳过')
+            continue
+        if isinstance(item, str):
+            yield item
+            continue
+        if not isinstance(item, dict):
+            continue
+        url = next((item[col] for col in URL_COLUMNS if item.get(col)), None)
+        if url is None and item.get('note_id'):
+            url = f"https://www.xiaohongshu.com/explore/{item['note_id']}"
+            if item.get('xsec_token'):
+                url += f"?xsec_token={item['xsec_token']}&xsec_source={item.get('xsec_source', 'pc_user')}"
+            else:
+                _warn_missing_token()
+        if url:
+            yield url
+
+
+def iter_note_urls(source: str) -> Iterator[str]:
+    """
+    从文件（.txt / .csv / .jsonl）或标准输入（source 为 '-'）流式读取笔记链接，逐条规范化后产出，
+    文件只在迭代时打开并按行读取，百万行输入也能立即开始处理且内存占用恒定
+    """
+    if source == '-':
+        raw_iter: Iterable[str] = _iter_text(sys.stdin)
+        yield from _normalized(raw_iter)
+        return
+    ext = os.path.splitext(source)[1].lower()
+    with open(source, mode='r', encoding='utf-8-sig', newline='') as f:
+        if ext == '.csv':
+            raw_iter = _iter_csv(f)
+        elif ext in ('.jsonl', '.ndjson'):
+            raw_iter = _iter_jsonl(f)
+        else:
+            raw_iter = _iter_text(f)
+        yield from _normalized(raw_iter)
+
+
+def iter_note_urls_from_text(text: str) -> Iterator[str]:
+    """从多行文本（如 GUI 输入框或配置中的 note_urls）惰性切分并规范化笔记链接。"""
+    yield from _normalized(match.group(0) for match in re.finditer(r'[^\r\n]+', text or ''))
+
+
+def _normalized(raw_iter: Iterable[str]) -> Iterator[str]:
+    for raw in raw_iter:
+        url = normalize_note_url(raw)
+        if url is not None:
+            yield url
+
+
+def iter_user_ids(source: str) -> Iterator[str]:
+    """
+    与 iter_note_urls 相同，从文件或标准输入流式读取用户，每行（或 csv 的 user_id / home_url 列、jsonl 的同名字段）
+    一个 user_id 或用户主页链接，跳过空行和 # 注释
+    """
+    if source == '-':
+        yield from _user_lines(_iter_text(sys.stdin))
+        return
+    ext = os.path.splitext(source)[1].lower()
+    with open(source, mode='r', encoding='utf-8-sig', newline='') as f:
+        if ext == '.csv':
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            lowered = [col.strip().lower() for col in header]
+            idx = next((lowered.index(col) for col in USER_COLUMNS if col in lowered), None)
+            if idx is None:
+                idx = 0
+                yield from _user_lines(header[:1])
+            yield from _user_lines(row[idx] for row in reader if len(row) > idx)
+        elif ext in ('.jsonl', '.ndjson'):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(item, dict):
+                    item = next((item[col] for col in USER_COLUMNS if item.get(col)), '')
+                if isinstance(item, str):
+                    yield from _user_lines([item])
+        else:
+            yield from _user_lines(_iter_text(f))
+
+
+def iter_user_ids_from_text(text: str) -> Iterator[str]:
+    """从多行文本（如配置中的 user_ids）惰性切分用户。"""
+    yield from _user_lines(match.group(0) for match in re.finditer(r'[^\r\n]+', text or ''))
+
+
+def _user_lines(raw_iter: Iterable[str]) -> Iterator[str]:
+    for raw in raw_iter:
+        value = (raw or '').strip().strip('"\'')
+        if value and not value.startswith('#'):
+            yield value
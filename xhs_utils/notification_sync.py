@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+from xhs_utils.cookie_util import get_account_key
+
+# 通知类型 -> XHS_Apis 中按 cursor 获取一页的方法名
+NOTIFICATION_TYPES = {
+    'mentions': 'get_metions',
+    'likes': 'get_likesAndcollects',
+    'connections': 'get_new_connections',
+}
+
+
+class NotificationStore:
+    """
+    消息通知的本地存储：按 (账号, 类型) 保存水位线（已同步的最新一条通知的 id 与时间）和通知事件。
+    """
+
+    def __init__(self, db_path: str = None) -> None:
+        self.db_path = db_path or get_state_path('notifications.db')
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        with self._lock:
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS notification_watermarks ('
+                'account_key TEXT NOT NULL, type TEXT NOT NULL, last_id TEXT NOT NULL, last_time REAL, '
+                'updated_at REAL NOT NULL, PRIMARY KEY (account_key, type));'
+                'CREATE TABLE IF NOT EXISTS notification_events ('
+                'account_key TEXT NOT NULL, type TEXT NOT NULL, event_id TEXT NOT NULL, time REAL, payload TEXT NOT NULL, '
+                'synced_at REAL NOT NULL, PRIMARY KEY (account_key, type, event_id));'
+                'CREATE INDEX IF NOT EXISTS idx_notification_events_time ON notification_events (account_key, type, time);'
+            )
+            self._conn.commit()
+
+    def watermark(self, account_key: str, type: str) -> Tuple[Optional[str], Optional[float]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT last_id, last_time FROM notification_watermarks WHERE account_key = ? AND type = ?', (account_key, type)
+            ).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def append(self, account_key: str, type: str, events: List[dict]) -> int:
+        """
+        追加新通知（已存在的忽略），并把水位线推进到 events 中最新的一条，返回实际新增的条数
+        :param events: 按时间从新到旧排列的通知
+        """
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO notification_events (account_key, type, event_id, time, payload, synced_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (account_key, type, str(event['id']), event.get('time'), json.dumps(event, ensure_ascii=False), now)
+                    for event in events
+                ],
+            )
+            added = self._conn.total_changes - before
+            if events:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO notification_watermarks (account_key, type, last_id, last_time, updated_at) VALUES (?, ?, ?, ?, ?)',
+                    (account_key, type, str(events[0]['id']), events[0].get('time'), now),
+                )
+            self._conn.commit()
+        return added
+
+    def events(self, account_key: str, type: str, since: float = None) -> List[dict]:
+        """本地保存的通知，按时间从新到旧；since 只返回该时间之后的通知。"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT payload FROM notification_events WHERE account_key = ? AND type = ? AND (? IS NULL OR time > ?) ORDER BY time DESC',
+                (account_key, type, since, since),
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_until_watermark(page_func, cookies_str: str, last_id: Optional[str], last_time: Optional[float], proxies=None, rate_limiter=None, max_pages: int = 0, checkpoint=None, checkpoint_key: Tuple[str, str] = None) -> Tuple[bool, str, List[dict]]:
+    """
+    从最新的通知开始翻页，遇到水位线（id 相同或时间更早）即停止，返回水位线之后的新通知（从新到旧）
+    没有水位线时翻完全部历史，max_pages 大于 0 时最多翻 max_pages 页
+    传入 checkpoint（CursorCheckpoint）和 checkpoint_key（endpoint, key）时定期保存 cursor，翻页中途失败后再次调用从断点继续
+    """
+    cursor = ''
+    new_events = []
+    if checkpoint is not None:
+        cursor, new_events = checkpoint.load(*checkpoint_key)
+    pages = 0
+    success, msg = True, 'success'
+    try:
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = page_func(cursor, cookies_str, proxies)
+            if not success:
+                raise Exception(msg)
+            pages += 1
+            reached = False
+            for event in res_json["data"].get("message_list") or []:
+                event_time = event.get('time')
+                if last_id is not None and (str(event.get('id')) == last_id or (last_time is not None and event_time is not None and event_time < last_time)):
+                    reached = True
+                    break
+                new_events.append(event)
+            if reached or 'cursor' not in res_json["data"] or not res_json["data"].get("has_more"):
+                break
+            if max_pages and pages >= max_pages:
+                break
+            cursor = str(res_json["data"]["cursor"])
+            if checkpoint is not None:
+                checkpoint.step(*checkpoint_key, cursor, new_events)
+    except Exception as e:
+        success = False
+        msg = str(e)
+    if checkpoint is not None:
+        checkpoint.finish(*checkpoint_key, success, cursor, new_events)
+    return success, msg, new_events
+
+
+def sync_notifications(xhs_apis, cookies_str: str, store: NotificationStore, types: Iterable[str] = None, proxies=None, rate_limiter=None, max_pages: int = 0, checkpoint=None) -> Dict[str, Tuple[bool, str, int]]:
+    """
+    增量同步消息通知：每种类型只获取上次同步的水位线之后的新通知并追加到本地存储，
+    没有新通知时每种类型只需一次请求；获取失败时不推进水位线，下次重新获取
+    :param types: 需要同步的类型，默认 mentions / likes / connections
+    :param checkpoint: 可选的 CursorCheckpoint，首次同步翻完全部历史时中途失败，下次从断点继续
+    :return: {类型: (success, msg, 新增条数)}
+    """
+    account_key = get_account_key(cookies_str)
+    result = {}
+    for type in types or NOTIFICATION_TYPES:
+        page_func = getattr(xhs_apis, NOTIFICATION_TYPES[type])
+        last_id, last_time = store.watermark(account_key, type)
+        success, msg, events = fetch_until_watermark(
+            page_func, cookies_str, last_id, last_time, proxies, rate_limiter, max_pages,
+            checkpoint=checkpoint, checkpoint_key=(f'notification_{type}', account_key),
+        )
+        added = store.append(account_key, type, events) if success else 0
+        logger.info(f'同步通知 {type}: 新增 {added} 条, {success}, msg: {msg}')
+        result[type] = (success, msg, added)
+    return result
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+from xhs_utils.data_util import handle_user_info
+
+# 作者信息补充到笔记中的字段：笔记字段名 -> handle_user_info 的字段名
+AUTHOR_FIELDS = {
+    'author_follows': 'follows',
+    'author_fans': 'fans',
+    'author_interaction': 'interaction',
+}
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Tuple[bool, str, Optional[dict]] = (False, '请求未完成', None)
+
+
+class ProfileCache:
+    """
+    用户信息缓存：get_user_info 之前先查内存 LRU，再查 SQLite 中 ttl 秒内获取过的结果，都没有时才请求接口。
+    同一用户同时只有一个请求在途，其它线程等待它的结果；获取失败的结果不缓存。
+    """
+
+    def __init__(self, xhs_apis, db_path: str = None, ttl: float = 86400, max_memory: int = 1024) -> None:
+        self.xhs_apis = xhs_apis
+        self.db_path = db_path or get_state_path('profiles.db')
+        self.ttl = float(ttl)
+        self.max_memory = max(int(max_memory), 1)
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, Tuple[float, dict]]' = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._conn = open_sqlite(self.db_path)
+        self.stats = {'memory': 0, 'disk': 0, 'fetched': 0, 'waited': 0}
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS user_profiles ('
+                'user_id TEXT PRIMARY KEY, payload TEXT NOT NULL, fetched_at REAL NOT NULL)'
+            )
+            self._conn.commit()
+
+    def _remember(self, user_id: str, fetched_at: float, user_info: dict) -> None:
+        self._memory[user_id] = (fetched_at, user_info)
+        self._memory.move_to_end(user_id)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, user_id: str, now: float) -> Optional[dict]:
+        """在锁内调用：依次查内存和 SQLite，命中且未过期时返回用户信息。"""
+        cached = self._memory.get(user_id)
+        if cached is not None and now - cached[0] < self.ttl:
+            self._memory.move_to_end(user_id)
+            self.stats['memory'] += 1
+            return cached[1]
+        row = self._conn.execute(
+            'SELECT payload, fetched_at FROM user_profiles WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if row is not None and now - row[1] < self.ttl:
+            user_info = json.loads(row[0])
+            self._remember(user_id, row[1], user_info)
+            self.stats['disk'] += 1
+            return user_info
+        return None
+
+    def get(self, user_id: str, cookies_str: str, proxies=None, rate_limiter=None) -> Tuple[bool, str, Optional[dict]]:
+        """
+        获取用户信息（handle_user_info 的结果），ttl 内每个用户最多请求一次
+        :return: success, msg, user_info
+        """
+        with self._lock:
+            user_info = self._lookup(user_id, time.time())
+            if user_info is not None:
+                return True, '缓存命中', user_info
+            flight = self._flights.get(user_id)
+            leader = flight is None
+            if leader:
+                flight = self._flights[user_id] = _Flight()
+            else:
+                self.stats['waited'] += 1
+        if not leader:
+            flight.done.wait()
+            return flight.result
+        try:
+            flight.result = self._fetch(user_id, cookies_str, proxies, rate_limiter)
+        finally:
+            with self._lock:
+                self._flights.pop(user_id, None)
+            flight.done.set()
+        return flight.result
+
+    def _fetch(self, user_id: str, cookies_str: str, proxies=None, rate_limiter=None) -> Tuple[bool, str, Optional[dict]]:
+        user_info = None
+        try:
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = self.xhs_apis.get_user_info(user_id, cookies_str, proxies)
+            if success:
+                data = (res_json or {}).get('data') or {}
+                if not data.get('basic_info'):
+                    success, msg = False, '用户信息为空，可能用户不存在或权限受限'
+                else:
+                    user_info = handle_user_info(data, user_id)
+        except Exception as e:
+            success = False
+            msg = str(e)
+        if success:
+            now = time.time()
+            with self._lock:
+                self.stats['fetched'] += 1
+                self._remember(user_id, now, user_info)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO user_profiles (user_id, payload, fetched_at) VALUES (?, ?, ?)',
+                    (user_id, json.dumps(user_info, ensure_ascii=False), now),
+                )
+                self._conn.commit()
+        else:
+            logger.warning(f'获取用户信息失败 {user_id}: {msg}')
+        return success, msg, user_info
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def enrich_note_author(note_info: dict, profile_cache: ProfileCache, cookies_str: str, proxies=None, rate_limiter=None) -> dict:
+    """
+    把作者的关注数、粉丝数、获赞和收藏数补充到 handle_note_info 的结果中（author_follows / author_fans / author_interaction），
+    获取失败时这些字段为空字符串，保证 Excel 列对齐；已补充过的笔记不再请求
+    """
+    if all(key in note_info for key in AUTHOR_FIELDS):
+        return note_info
+    success, msg, user_info = profile_cache.get(note_info['user_id'], cookies_str, proxies, rate_limiter)
+    for key, user_key in AUTHOR_FIELDS.items():
+        note_info[key] = user_info[user_key] if success and user_info else ''
+    return note_info
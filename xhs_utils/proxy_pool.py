@@ -0,0 +1,172 @@
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+
+# 未测速但失败过的代理的代价（秒），按错误率与连续失败次数放大，保证排在已测速的健康代理之后
+UNMEASURED_FAILURE_COST = 10.0
+
+
+class ProxyPool:
+    """
+    代理池：按代理统计 RTT 与错误率，每次请求路由到当前得分最优的健康代理；
+    得分按在途请求数加权，得分相同时随机选择，并发请求会分散到多个代理上。
+    每个代理持有独立的 requests.Session（各自的 keep-alive 连接池），连续失败的代理按指数退避暂时剔除。
+    可直接作为 XHS_Apis 各接口与 download_media 的 proxies 参数传入。
+    """
+
+    def __init__(self, proxy_urls: List[str], pool_maxsize: int = 10, error_threshold: int = 3, base_backoff: float = 30.0, max_backoff: float = 600.0, ewma_alpha: float = 0.3) -> None:
+        proxy_urls = [p.strip() for p in proxy_urls if p and p.strip()]
+        if not proxy_urls:
+            raise ValueError('proxy_urls 不能为空')
+        self.pool_maxsize = max(int(pool_maxsize), 1)
+        self.error_threshold = max(int(error_threshold), 1)
+        self.base_backoff = max(float(base_backoff), 1.0)
+        self.max_backoff = max(float(max_backoff), self.base_backoff)
+        self.ewma_alpha = min(max(float(ewma_alpha), 0.01), 1.0)
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, object]] = [
+            {
+                'url': url,
+                'proxies': {'http': url, 'https': url},
+                'session': self._build_session(),
+                'rtt': None,
+                'error_rate': 0.0,
+                'requests': 0,
+                'failures': 0,
+                'evictions': 0,
+                'in_flight': 0,
+                'banned_until': 0.0,
+            }
+            for url in dict.fromkeys(proxy_urls)
+        ]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """通过当前最优代理发送请求，并记录 RTT 与成败；连接异常时换下一个健康代理重试一次。"""
+        kwargs.pop('proxies', None)
+        entry = self._choose(acquire=True)
+        try:
+            return self._send(entry, method, url, **kwargs)
+        except requests.RequestException:
+            retry_entry = self._choose(acquire=True, exclude=entry)
+            if retry_entry is None:
+                raise
+        return self._send(retry_entry, method, url, **kwargs)
+
+    def _send(self, entry: Dict[str, object], method: str, url: str, **kwargs) -> requests.Response:
+        """通过指定代理发送请求（entry 已由 _choose 计入在途请求），结束后减回在途请求数。"""
+        start = time.time()
+        try:
+            response = entry['session'].request(method, url, proxies=entry['proxies'], **kwargs)
+        except requests.RequestException as e:
+            self._record(entry, time.time() - start, False, str(e))
+            raise
+        finally:
+            with self._lock:
+                entry['in_flight'] -= 1
+        ok = response.status_code < 500 and response.status_code not in (407, 429)
+        self._record(entry, time.time() - start, ok, f'status={response.status_code}')
+        return response
+
+    def as_dict(self) -> Dict[str, str]:
+        """返回当前最优代理的 requests 风格 proxies 字典，供无法走代理池的场景（如 Selenium）使用。"""
+        return dict(self._choose()['proxies'])
+
+    def stats(self) -> List[Dict[str, object]]:
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'url': entry['url'],
+                    'rtt': entry['rtt'],
+                    'error_rate': entry['error_rate'],
+                    'requests': entry['requests'],
+                    'in_flight': entry['in_flight'],
+                    'healthy': entry['banned_until'] <= now,
+                    'banned_until': entry['banned_until'],
+                }
+                for entry in self._entries
+            ]
+
+    def close(self) -> None:
+        with self._lock:
+            for entry in self._entries:
+                entry['session'].close()
+
+    def _choose(self, acquire: bool = False, exclude: Dict[str, object] = None) -> Optional[Dict[str, object]]:
+        """
+        选择代理；acquire 为 True 时计入在途请求，调用方请求结束后负责减回
+        传入 exclude 时只在其它健康代理中选择，没有可选的代理时返回 None
+        """
+        now = time.time()
+        with self._lock:
+            healthy = [entry for entry in self._entries if entry['banned_until'] <= now and entry is not exclude]
+            if not healthy and exclude is not None:
+                return None
+            if not healthy:
+                # 全部被剔除时选择最早解禁的代理，避免任务直接中断
+                entry = min(self._entries, key=lambda entry: entry['banned_until'])
+            else:
+                entry = min(healthy, key=lambda entry: (self._score(entry), entry['in_flight'], random.random()))
+            if acquire:
+                entry['in_flight'] += 1
+            return entry
+
+    @staticmethod
+    def _score(entry: Dict[str, object]) -> float:
+        # 未测速且没有失败过的代理得分为 0，优先探索；失败过的按错误率与连续失败次数计较大的代价
+        # 在途请求越多得分越高
+        if entry['rtt'] is None:
+            return UNMEASURED_FAILURE_COST * (entry['error_rate'] + entry['failures']) * (1 + entry['in_flight'])
+        return entry['rtt'] * (1.0 + 4.0 * entry['error_rate']) * (1 + entry['in_flight'])
+
+    def _record(self, entry: Dict[str, object], rtt: float, ok: bool, msg: str) -> None:
+        alpha = self.ewma_alpha
+        with self._lock:
+            entry['requests'] += 1
+            entry['error_rate'] = (1 - alpha) * entry['error_rate'] + alpha * (0.0 if ok else 1.0)
+            if ok:
+                entry['rtt'] = rtt if entry['rtt'] is None else (1 - alpha) * entry['rtt'] + alpha * rtt
+                entry['failures'] = 0
+                entry['evictions'] = 0
+                return
+            entry['failures'] += 1
+            if entry['failures'] >= self.error_threshold:
+                backoff = min(self.base_backoff * (2 ** entry['evictions']), self.max_backoff)
+                entry['evictions'] += 1
+                entry['failures'] = 0
+                entry['banned_until'] = time.time() + backoff
+                logger.warning(f"代理 {entry['url']} 连续失败，剔除 {backoff:.0f} 秒: {msg}")
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_maxsize, pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+
+def send_request(method: str, url: str, proxies=None, **kwargs) -> requests.Response:
+    """
+    统一的请求入口：proxies 为 ProxyPool 时走代理池，否则与 requests.request 行为一致
+    """
+    if isinstance(proxies, ProxyPool):
+        return proxies.request(method, url, **kwargs)
+    return requests.request(method, url, proxies=proxies, **kwargs)
+
+
+def build_proxies(raw: str):
+    """
+    解析代理配置：空为 None，单个代理为 requests 风格字典，多个代理（逗号/空白分隔）为 ProxyPool
+    """
+    proxy_urls = [p for p in re.split(r'[\s,;]+', (raw or '').strip()) if p]
+    if not proxy_urls:
+        return None
+    if len(proxy_urls) == 1:
+        return {'http': proxy_urls[0], 'https': proxy_urls[0]}
+    return ProxyPool(proxy_urls)
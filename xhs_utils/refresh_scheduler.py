@@ -0,0 +1,176 @@
+import heapq
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+from xhs_utils.data_util import parse_count
+from xhs_utils.url_util import parse_note_url
+
+REFRESH_COUNTERS = ('liked_count', 'collected_count', 'comment_count', 'share_count')
+
+
+def _upload_ts(note_info: dict) -> Optional[float]:
+    try:
+        return time.mktime(time.strptime(note_info['upload_time'], "%Y-%m-%d %H:%M:%S"))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class EngagementRefreshScheduler:
+    """
+    已爬取笔记的互动数据刷新调度：根据每篇笔记以往几次刷新估计计数的变化速度（每小时的相对变化，指数平滑），
+    变化越快下次刷新越早，计数不再变化的笔记刷新间隔逐次加倍；还没有刷新记录的笔记按发布时长估计，新笔记先刷新。
+    待刷新的笔记放在按到期时间排序的优先队列中，每轮只取最早到期的若干篇，只保存发生变化的计数。
+    """
+
+    def __init__(self, db_path: str = None, min_interval: float = 3600, max_interval: float = 7 * 86400, target_change: float = 0.05, age_factor: float = 0.1, ewma_alpha: float = 0.5) -> None:
+        self.db_path = db_path or get_state_path('engagement.db')
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.target_change = float(target_change)
+        self.age_factor = float(age_factor)
+        self.ewma_alpha = float(ewma_alpha)
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        with self._lock:
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS engagement_notes ('
+                'note_id TEXT PRIMARY KEY, note_url TEXT NOT NULL, upload_ts REAL, counters TEXT NOT NULL, '
+                'rate REAL, interval REAL, last_fetch REAL, next_due REAL NOT NULL);'
+                'CREATE TABLE IF NOT EXISTS engagement_history ('
+                'note_id TEXT NOT NULL, ts REAL NOT NULL, counters TEXT NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS idx_engagement_history ON engagement_history (note_id, ts);'
+            )
+            self._conn.commit()
+            for note_id, next_due in self._conn.execute('SELECT note_id, next_due FROM engagement_notes'):
+                self._due[note_id] = next_due
+                self._heap.append((next_due, note_id))
+            heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def _schedule(self, note_id: str, next_due: float) -> None:
+        self._due[note_id] = next_due
+        heapq.heappush(self._heap, (next_due, note_id))
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _age_interval(self, upload_ts: Optional[float], now: float) -> float:
+        if upload_ts is None:
+            return self.min_interval
+        return self._clamp((now - upload_ts) * self.age_factor)
+
+    def track(self, note_url: str, note_info: dict = None, now: float = None) -> None:
+        """
+        登记需要跟踪的笔记，已登记的笔记不变
+        :param note_info: handle_note_info 的结果，提供时作为计数的基线并按发布时长安排首次刷新，否则立即到期
+        """
+        now = now if now is not None else time.time()
+        note_id = note_info['note_id'] if note_info else parse_note_url(note_url)[0]
+        with self._lock:
+            if note_id in self._due:
+                return
+            if note_info:
+                upload_ts = _upload_ts(note_info)
+                counters = {key: parse_count(note_info.get(key)) for key in REFRESH_COUNTERS}
+                interval = self._age_interval(upload_ts, now)
+                self._conn.execute(
+                    'INSERT INTO engagement_notes (note_id, note_url, upload_ts, counters, interval, last_fetch, next_due) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (note_id, note_url, upload_ts, json.dumps(counters), interval, now, now + interval),
+                )
+                self._conn.execute(
+                    'INSERT INTO engagement_history (note_id, ts, counters) VALUES (?, ?, ?)', (note_id, now, json.dumps(counters))
+                )
+                next_due = now + interval
+            else:
+                self._conn.execute(
+                    'INSERT INTO engagement_notes (note_id, note_url, counters, next_due) VALUES (?, ?, ?, ?)',
+                    (note_id, note_url, '{}', now),
+                )
+                next_due = now
+            self._conn.commit()
+            self._schedule(note_id, next_due)
+
+    def pop_due(self, limit: int, now: float = None) -> List[Tuple[str, str]]:
+        """取出最多 limit 篇已到期的笔记 [(note_id, note_url)]，按到期时间从早到晚。"""
+        now = now if now is not None else time.time()
+        picked = []
+        with self._lock:
+            while self._heap and len(picked) < limit and self._heap[0][0] <= now:
+                next_due, note_id = heapq.heappop(self._heap)
+                if self._due.get(note_id) != next_due:
+                    continue
+                picked.append(note_id)
+            rows = {}
+            for start in range(0, len(picked), 500):
+                batch = picked[start:start + 500]
+                rows.update(self._conn.execute(
+                    f'SELECT note_id, note_url FROM engagement_notes WHERE note_id IN ({",".join("?" * len(batch))})', batch
+                ).fetchall())
+        return [(note_id, rows[note_id]) for note_id in picked if note_id in rows]
+
+    def record(self, note_id: str, note_info: dict, now: float = None) -> Dict[str, int]:
+        """
+        保存一次刷新结果，更新变化速度并安排下次刷新
+        :return: 发生变化的计数 {计数名: 新值}
+        """
+        now = now if now is not None else time.time()
+        counters = {key: parse_count(note_info.get(key)) for key in REFRESH_COUNTERS}
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT upload_ts, counters, rate, interval, last_fetch FROM engagement_notes WHERE note_id = ?', (note_id,)
+            ).fetchone()
+            if row is None:
+                return {}
+            upload_ts, old_counters, rate, interval, last_fetch = row
+            upload_ts = upload_ts if upload_ts is not None else _upload_ts(note_info)
+            old_counters = json.loads(old_counters)
+            changed = {key: value for key, value in counters.items() if old_counters.get(key) != value}
+            if old_counters and last_fetch is not None and now > last_fetch:
+                hours = (now - last_fetch) / 3600
+                delta = sum(abs(counters[key] - old_counters.get(key, 0)) for key in REFRESH_COUNTERS)
+                sample = delta / max(sum(old_counters.values()), 10) / hours
+                rate = sample if rate is None else self.ewma_alpha * sample + (1 - self.ewma_alpha) * rate
+                if rate > 0:
+                    interval = self._clamp(self.target_change / rate * 3600)
+                else:
+                    interval = self._clamp((interval or self.min_interval) * 2)
+            else:
+                interval = self._age_interval(upload_ts, now)
+            self._conn.execute(
+                'UPDATE engagement_notes SET upload_ts = ?, counters = ?, rate = ?, interval = ?, last_fetch = ?, next_due = ? WHERE note_id = ?',
+                (upload_ts, json.dumps(counters), rate, interval, now, now + interval, note_id),
+            )
+            if changed:
+                self._conn.execute(
+                    'INSERT INTO engagement_history (note_id, ts, counters) VALUES (?, ?, ?)', (note_id, now, json.dumps(changed))
+                )
+            self._conn.commit()
+            self._schedule(note_id, now + interval)
+        return changed
+
+    def record_failure(self, note_id: str, now: float = None) -> None:
+        """刷新失败的笔记在 min_interval 后重试。"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._conn.execute('UPDATE engagement_notes SET next_due = ? WHERE note_id = ?', (now + self.min_interval, note_id))
+            self._conn.commit()
+            self._schedule(note_id, now + self.min_interval)
+
+    def history(self, note_id: str) -> List[Tuple[float, Dict[str, int]]]:
+        """计数变化历史 [(ts, 变化了的计数)]，首条为登记时的完整计数。"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT ts, counters FROM engagement_history WHERE note_id = ? ORDER BY ts', (note_id,)
+            ).fetchall()
+        return [(ts, json.loads(counters)) for ts, counters in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+
+# 各接口响应的缓存时间（秒），不在表中的接口（主页推荐、消息通知、自己的账号信息等）不缓存
+DEFAULT_ENDPOINT_TTLS = {
+    '/api/sns/web/v1/feed': 7 * 86400,
+    '/api/sns/web/v1/user/otherinfo': 86400,
+    '/api/sns/web/v2/user_posted': 3600,
+    '/api/sns/web/v1/user_posted': 3600,
+    '/api/sns/web/v1/search/notes': 3600,
+    '/api/sns/web/v1/search/usersearch': 3600,
+    '/api/sns/web/v1/search/recommend': 86400,
+    '/api/sns/web/v2/comment/page': 3600,
+    '/api/sns/web/v2/comment/sub/page': 3600,
+}
+
+# 每次请求都会变化、但不影响结果的参数，不参与缓存键
+VOLATILE_FIELDS = ('search_id', 'xsec_token', 'xsec_source')
+
+
+class CacheMissError(Exception):
+    """仅缓存模式下请求的响应不在缓存中。"""
+
+
+class CachedResponse:
+    """缓存命中时代替 requests.Response 返回，提供接口方法用到的 status_code / content / text / json()。"""
+
+    def __init__(self, content: bytes, status_code: int = 200) -> None:
+        self.content = content
+        self.status_code = status_code
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def _strip_volatile(value, volatile: Iterable[str]):
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v, volatile) for k, v in value.items() if k not in volatile}
+    if isinstance(value, list):
+        return [_strip_volatile(v, volatile) for v in value]
+    return value
+
+
+class ResponseCache:
+    """
+    edith 接口响应的磁盘缓存：键为 请求方法 + 接口路径 + 规范化的查询参数和请求体（去掉签名无关的易变字段，不含请求头），
+    响应 JSON 经 zlib 压缩后存入 SQLite，按接口分别设置过期时间，总大小超过 max_bytes 时淘汰最久未访问的条目。
+    只缓存成功的响应；cache_only 为 True 时可缓存接口不发送请求，命中即返回（忽略过期时间），未命中抛出 CacheMissError，用于离线重新处理；
+    不可缓存的接口（账号信息、消息通知等，如 CookiePool 的探测请求）在仅缓存模式下照常发送。
+    """
+
+    def __init__(self, db_path: str = None, endpoint_ttls: Dict[str, float] = None, max_bytes: int = 512 * 1024 * 1024, cache_only: bool = False, volatile_fields: Iterable[str] = VOLATILE_FIELDS) -> None:
+        self.db_path = db_path or get_state_path('response_cache.db')
+        self.endpoint_ttls = dict(DEFAULT_ENDPOINT_TTLS if endpoint_ttls is None else endpoint_ttls)
+        self.max_bytes = int(max_bytes)
+        self.cache_only = bool(cache_only)
+        self.volatile_fields = frozenset(volatile_fields)
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        with self._lock:
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS response_cache ('
+                'cache_key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, payload BLOB NOT NULL, size INTEGER NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache (accessed_at);'
+            )
+            self._conn.commit()
+            self._total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+
+    def cache_key(self, method: str, api: str, data=None) -> Optional[tuple]:
+        """返回 (接口路径, 缓存键)，接口不在 endpoint_ttls 中时返回 None。"""
+        parts = urllib.parse.urlsplit(api)
+        if parts.path not in self.endpoint_ttls:
+            return None
+        query = sorted(
+            (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k not in self.volatile_fields
+        )
+        body = data
+        if isinstance(data, (str, bytes)) and data:
+            try:
+                body = json.loads(data)
+            except ValueError:
+                body = data.decode('utf-8', 'replace') if isinstance(data, bytes) else data
+        body = _strip_volatile(body, self.volatile_fields)
+        raw = json.dumps([method.upper(), parts.path, query, body], ensure_ascii=False, sort_keys=True, default=str)
+        return parts.path, hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, key: str, now: float = None) -> Optional[bytes]:
+        now = now if now is not None else time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT payload, created_at FROM response_cache WHERE cache_key = ?', (key,)).fetchone()
+            if row is None or (not self.cache_only and now - row[1] >= self.endpoint_ttls[endpoint]):
+                return None
+            self._conn.execute('UPDATE response_cache SET accessed_at = ? WHERE cache_key = ?', (now, key))
+            self._conn.commit()
+        return zlib.decompress(row[0])
+
+    def put(self, endpoint: str, key: str, content: bytes, now: float = None) -> None:
+        now = now if now is not None else time.time()
+        payload = zlib.compress(content)
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM response_cache WHERE cache_key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO response_cache (cache_key, endpoint, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, endpoint, payload, len(payload), now, now),
+            )
+            self._total += len(payload) - (old[0] if old else 0)
+            self.stats['stored'] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """在锁内调用：按最久未访问淘汰，直到总大小不超过 max_bytes。"""
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                'SELECT cache_key, size FROM response_cache ORDER BY accessed_at LIMIT 100'
+            ).fetchall()
+            if not rows:
+                self._total = 0
+                break
+            for key, size in rows:
+                self._conn.execute('DELETE FROM response_cache WHERE cache_key = ?', (key,))
+                self._total -= size
+                self.stats['evicted'] += 1
+                if self._total <= self.max_bytes:
+                    break
+
+    def fetch(self, method: str, api: str, data, send: Callable[[], object]):
+        """
+        _request 的缓存入口：命中直接返回 CachedResponse，否则调用 send() 发送请求，成功的 JSON 响应写入缓存
+        """
+        cache_key = self.cache_key(method, api, data)
+        if cache_key is None:
+            return send()
+        endpoint, key = cache_key
+        content = self.get(endpoint, key)
+        with self._lock:
+            self.stats['hits' if content is not None else 'misses'] += 1
+        if content is not None:
+            return CachedResponse(content)
+        if self.cache_only:
+            raise CacheMissError(f'仅缓存模式下未命中: {api}')
+        response = send()
+        try:
+            if response.status_code == 200:
+                res_json = response.json()
+                if res_json.get('success') or res_json.get('code') == 0:
+                    self.put(endpoint, key, response.content)
+        except Exception as e:
+            logger.debug(f'响应未写入缓存 {api}: {e}')
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM response_cache')
+            self._conn.commit()
+            self._total = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
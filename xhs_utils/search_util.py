@@ -0,0 +1,243 @@
+import itertools
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from loguru import logger
+
+
+def build_search_combos(sort_types: Iterable[int] = (0, 1, 2, 3, 4), note_types: Iterable[int] = (0,), note_times: Iterable[int] = (0,), note_ranges: Iterable[int] = (0,)) -> List[Dict[str, int]]:
+    """
+    生成搜索筛选条件组合（笛卡尔积），各取值含义与 XHS_Apis.search_note 的参数一致
+    """
+    return [
+        {'sort_type_choice': sort_type, 'note_type': note_type, 'note_time': note_time, 'note_range': note_range}
+        for sort_type, note_type, note_time, note_range in itertools.product(sort_types, note_types, note_times, note_ranges)
+    ]
+
+
+# 默认的深度搜索组合：5 种排序 × 4 种发布时间
+DEFAULT_DEEP_SEARCH_COMBOS = build_search_combos(note_times=(0, 1, 2, 3))
+
+
+class SearchCollector:
+    """
+    线程安全的搜索结果收集器：只保留 model_type 为 note 的结果并按笔记 id 去重，
+    凑够 require_num（0 表示不限）后 full 为 True，各路搜索据此提前停止。
+    """
+
+    def __init__(self, require_num: int = 0, on_new: Callable[[dict], None] = None) -> None:
+        self.require_num = max(int(require_num or 0), 0)
+        self.on_new = on_new
+        self.notes: List[dict] = []
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    @property
+    def full(self) -> bool:
+        return bool(self.require_num) and len(self.notes) >= self.require_num
+
+    def add(self, items: Iterable[dict]) -> List[dict]:
+        """加入一页搜索结果，返回其中的新笔记。"""
+        new_notes = []
+        with self._lock:
+            for item in items:
+                if item.get('model_type', 'note') != 'note' or not item.get('id') or item['id'] in self._seen:
+                    continue
+                if self.full:
+                    break
+                self._seen.add(item['id'])
+                self.notes.append(item)
+                new_notes.append(item)
+        if self.on_new is not None:
+            for note in new_notes:
+                self.on_new(note)
+        return new_notes
+
+
+def search_pages(xhs_apis, query: str, cookies_str: str, collector: SearchCollector, filters: Dict[str, int] = None, pos_distance=0, geo="", proxies=None, rate_limiter=None, max_pages: int = 0, idle_pages: int = 1):
+    """
+    按一组筛选条件逐页搜索并把结果交给 collector，直到没有更多结果、连续 idle_pages 页没有新笔记、
+    翻满 max_pages 页（0 表示不限）或 collector 已满
+    :return: success, msg, {'pages': 请求页数, 'items': 返回条数, 'new': 新笔记数, 'notes': 新笔记, 'has_more': 最后一页是否还有更多}
+    """
+    filters = filters or {}
+    stats = {'pages': 0, 'items': 0, 'new': 0, 'notes': [], 'has_more': False}
+    success, msg = True, 'success'
+    idle = 0
+    page = 1
+    try:
+        while not collector.full and (not max_pages or page <= max_pages):
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = xhs_apis.search_note(
+                query, cookies_str, page, filters.get('sort_type_choice', 0), filters.get('note_type', 0),
+                filters.get('note_time', 0), filters.get('note_range', 0), pos_distance, geo, proxies,
+            )
+            if not success:
+                raise Exception(msg)
+            stats['pages'] += 1
+            items = res_json["data"].get("items") or []
+            stats['has_more'] = bool(res_json["data"].get("has_more")) and bool(items)
+            stats['items'] += len(items)
+            new_notes = collector.add(items)
+            stats['new'] += len(new_notes)
+            stats['notes'].extend(new_notes)
+            idle = 0 if new_notes else idle + 1
+            if not stats['has_more'] or idle >= max(int(idle_pages), 1):
+                break
+            page += 1
+    except Exception as e:
+        success = False
+        msg = str(e)
+    return success, msg, stats
+
+
+def deep_search_note(xhs_apis, query: str, require_num: int, cookies_str: str, combos: List[Dict[str, int]] = None, max_workers: int = 4, idle_pages: int = 1, max_pages: int = 0, pos_distance=0, geo="", proxies=None, rate_limiter=None, on_new: Callable[[dict], None] = None):
+    """
+    深度搜索：同一关键词在多组排序/类型/时间/范围筛选条件下并发搜索，结果边返回边按笔记 id 去重，
+    某组条件连续 idle_pages 页没有新笔记即停止，凑够 require_num 后全部停止
+    :param combos: 筛选条件组合，默认 DEFAULT_DEEP_SEARCH_COMBOS，可用 build_search_combos 生成
+    :param max_workers: 同时进行的筛选条件组合数
+    :param on_new: 每发现一篇新笔记时的回调（在搜索线程中调用）
+    :return: success, msg, note_list（按发现顺序）
+    """
+    combos = combos or DEFAULT_DEEP_SEARCH_COMBOS
+    collector = SearchCollector(require_num, on_new)
+    success, msg = True, 'success'
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as executor:
+        futures = [
+            executor.submit(search_pages, xhs_apis, query, cookies_str, collector, combo, pos_distance, geo, proxies, rate_limiter, max_pages, idle_pages)
+            for combo in combos
+        ]
+        for combo, future in zip(combos, futures):
+            combo_success, combo_msg, stats = future.result()
+            logger.info(f'深度搜索 {query} {combo}: 请求 {stats["pages"]} 页, 新笔记 {stats["new"]} 条, {combo_msg}')
+            if not combo_success:
+                failed += 1
+                msg = combo_msg
+    if failed == len(combos):
+        success = False
+    logger.info(f'深度搜索 {query} 完成: {len(combos)} 组条件（失败 {failed} 组），共 {len(collector.notes)} 篇笔记')
+    return success, msg, collector.notes
+
+
+def split_bbox(bbox: Tuple[float, float, float, float], rows: int, cols: int) -> List[Tuple[float, float, float, float]]:
+    """把 (min_lat, min_lng, max_lat, max_lng) 范围等分为 rows × cols 个格子。"""
+    min_lat, min_lng, max_lat, max_lng = bbox
+    lat_step = (max_lat - min_lat) / max(int(rows), 1)
+    lng_step = (max_lng - min_lng) / max(int(cols), 1)
+    return [
+        (min_lat + r * lat_step, min_lng + c * lng_step, min_lat + (r + 1) * lat_step, min_lng + (c + 1) * lng_step)
+        for r in range(max(int(rows), 1)) for c in range(max(int(cols), 1))
+    ]
+
+
+def geo_sweep_search_note(xhs_apis, query: str, cookies_str: str, bbox: Tuple[float, float, float, float], rows: int = 4, cols: int = 4, max_depth: int = 2, max_pages: int = 5, require_num: int = 0, filters: Dict[str, int] = None, max_workers: int = 4, proxies=None, rate_limiter=None, on_new: Callable[[dict], None] = None):
+    """
+    区域网格搜索：把经纬度范围切成 rows × cols 个格子，在每个格子中心并发执行“附近”搜索（pos_distance=2），
+    结果跨格子按笔记 id 去重。某个格子翻满 max_pages 页仍有更多结果说明该处笔记密集，
+    将其四等分继续搜索，最多细分 max_depth 层
+    :param bbox: (min_lat, min_lng, max_lat, max_lng)
+    :param require_num: 需要的笔记数量，0 表示不限
+    :return: success, msg, note_list（按发现顺序）
+    """
+    collector = SearchCollector(require_num, on_new)
+    success, msg = True, 'success'
+    points = failed = 0
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as executor:
+        def submit(cell, depth):
+            lat = (cell[0] + cell[2]) / 2
+            lng = (cell[1] + cell[3]) / 2
+            geo = {'latitude': round(lat, 6), 'longitude': round(lng, 6)}
+            future = executor.submit(search_pages, xhs_apis, query, cookies_str, collector, filters, 2, geo, proxies, rate_limiter, max_pages, 2)
+            in_flight[future] = (cell, depth, geo)
+
+        for cell in split_bbox(bbox, rows, cols):
+            submit(cell, 0)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                cell, depth, geo = in_flight.pop(future)
+                point_success, point_msg, stats = future.result()
+                points += 1
+                if not point_success:
+                    failed += 1
+                    msg = point_msg
+                    continue
+                dense = bool(max_pages) and stats['has_more'] and stats['pages'] >= max_pages
+                logger.info(f'区域搜索 {query} {geo}: 请求 {stats["pages"]} 页, 新笔记 {stats["new"]} 条{", 结果密集，继续细分" if dense and depth < max_depth else ""}')
+                if dense and depth < max_depth and not collector.full:
+                    for sub_cell in split_bbox(cell, 2, 2):
+                        submit(sub_cell, depth + 1)
+    if points and failed == points:
+        success = False
+    logger.info(f'区域搜索 {query} 完成: 搜索 {points} 个位置（失败 {failed} 个），共 {len(collector.notes)} 篇笔记')
+    return success, msg, collector.notes
+
+
+def parse_suggestions(res_json: dict) -> List[str]:
+    """从 get_search_keyword 的返回中取出联想词文本。"""
+    data = (res_json or {}).get('data') or {}
+    words = []
+    for item in data.get('sug_items') or []:
+        text = (item.get('text') if isinstance(item, dict) else item) or ''
+        if text.strip():
+            words.append(text.strip())
+    return words
+
+
+def expand_keyword_notes(xhs_apis, seeds: Iterable[str], cookies_str: str, max_depth: int = 2, max_terms: int = 50, require_num: int = 0, max_pages: int = 3, filters: Dict[str, int] = None, max_workers: int = 4, proxies=None, rate_limiter=None) -> Iterator[Tuple[str, dict]]:
+    """
+    关键词扩展搜索：从种子词出发按广度优先获取联想词（get_search_keyword），每个关键词搜索 max_pages 页，
+    联想与搜索在同一线程池中并发进行，关键词与笔记都全局去重。
+    以生成器形式边搜索边返回 (关键词, 笔记)，可直接接入笔记下载流程
+    :param max_depth: 联想的最大层数，种子词为第 0 层
+    :param max_terms: 最多搜索的关键词数量
+    :param require_num: 需要的笔记数量，0 表示不限
+    """
+    collector = SearchCollector(require_num)
+    terms = set()
+    in_flight = {}
+    executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1))
+
+    def suggest_task(term):
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        return xhs_apis.get_search_keyword(term, cookies_str, proxies)
+
+    def schedule(term, depth):
+        term = term.strip()
+        if not term or term in terms or len(terms) >= max_terms or collector.full:
+            return
+        terms.add(term)
+        in_flight[executor.submit(search_pages, xhs_apis, term, cookies_str, collector, filters, 0, "", proxies, rate_limiter, max_pages, 1)] = ('search', term, depth)
+        if depth < max_depth:
+            in_flight[executor.submit(suggest_task, term)] = ('suggest', term, depth)
+
+    try:
+        for seed in seeds:
+            schedule(seed, 0)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, term, depth = in_flight.pop(future)
+                if kind == 'suggest':
+                    success, msg, res_json = future.result()
+                    if not success:
+                        logger.warning(f'获取联想词失败 {term}: {msg}')
+                        continue
+                    suggestions = parse_suggestions(res_json)
+                    logger.info(f'关键词 {term} 的联想词: {suggestions}')
+                    for suggestion in suggestions:
+                        schedule(suggestion, depth + 1)
+                else:
+                    success, msg, stats = future.result()
+                    logger.info(f'扩展搜索 {term}（第 {depth} 层）: 请求 {stats["pages"]} 页, 新笔记 {stats["new"]} 条, {msg}')
+                    for note in stats['notes']:
+                        yield term, note
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    logger.info(f'关键词扩展完成: 搜索 {len(terms)} 个关键词，共 {len(collector.notes)} 篇笔记')
@@ -0,0 +1,70 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+
+
+class SeenNoteIndex:
+    """
+    已爬取笔记索引：note_id -> (first_seen, last_fetched)，持久化在 SQLite 中。
+    增量模式下翻页遇到整页都已知的笔记即停止，只把新笔记交给后续的详情爬取。
+    """
+
+    def __init__(self, db_path: str = None) -> None:
+        self.db_path = db_path or get_state_path('seen_notes.db')
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS seen_notes ('
+                'note_id TEXT PRIMARY KEY, first_seen REAL NOT NULL, last_fetched REAL)'
+            )
+            self._conn.commit()
+
+    def __contains__(self, note_id: str) -> bool:
+        return bool(self.known([note_id]))
+
+    def known(self, note_ids: Iterable[str]) -> Set[str]:
+        """返回 note_ids 中已在索引里的部分。"""
+        note_ids = list(dict.fromkeys(note_ids))
+        found = set()
+        with self._lock:
+            # SQLite 单条语句的参数个数有限，分批查询
+            for start in range(0, len(note_ids), 500):
+                batch = note_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f'SELECT note_id FROM seen_notes WHERE note_id IN ({",".join("?" * len(batch))})', batch
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def mark_seen(self, note_ids: Iterable[str]) -> None:
+        """登记笔记（不更新 last_fetched），已登记的笔记保持原来的 first_seen。"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO seen_notes (note_id, first_seen) VALUES (?, ?)',
+                [(note_id, now) for note_id in note_ids],
+            )
+            self._conn.commit()
+
+    def mark_fetched(self, note_id: str) -> None:
+        """记录一次成功的详情爬取，首次出现的笔记同时写入 first_seen。"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO seen_notes (note_id, first_seen, last_fetched) VALUES (?, ?, ?) '
+                'ON CONFLICT (note_id) DO UPDATE SET last_fetched = excluded.last_fetched',
+                (note_id, now, now),
+            )
+            self._conn.commit()
+
+    def get(self, note_id: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT first_seen, last_fetched FROM seen_notes WHERE note_id = ?', (note_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'first_seen': row[0], 'last_fetched': row[1]}
@@ -6,6 +6,7 @@ from typing import List, Set, Dict, Any
 from loguru import logger
 
 from xhs_utils.cookie_util import trans_cookies
+from xhs_utils.proxy_pool import ProxyPool
 
 
 def _build_chrome_driver(proxies: dict | None = None):
@@ -36,6 +37,9 @@ def _build_chrome_driver(proxies: dict | None = None):
     if headless_flag != "0":
         options.add_argument("--headless=new")
 
+    if isinstance(proxies, ProxyPool):
+        # 浏览器无法按请求切换代理，取代理池当前最优的代理
+        proxies = proxies.as_dict()
     if proxies and isinstance(proxies, dict):
         http_proxy = proxies.get("http") or proxies.get("https")
         if http_proxy:
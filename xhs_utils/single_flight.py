@@ -0,0 +1,75 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = (False, '请求未完成', None)
+
+
+class SingleFlight:
+    """
+    相同请求合并：同一个 key 同时只执行一次，后到的调用等待并共享第一个调用的结果；
+    成功的结果再保留 ttl 秒，期间的相同调用直接返回，不再签名和请求。
+    结果为接口的 (success, msg, res_json)，共享给其它调用方的是深拷贝，调用方修改 res_json 互不影响。
+    """
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 1024) -> None:
+        self.ttl = float(ttl)
+        self.max_entries = max(int(max_entries), 1)
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._results: 'OrderedDict[Hashable, Tuple[float, tuple]]' = OrderedDict()
+        self.stats = {'executed': 0, 'coalesced': 0, 'cached': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], tuple]) -> tuple:
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                if now - cached[0] < self.ttl:
+                    self.stats['cached'] += 1
+                    return copy.deepcopy(cached[1])
+                del self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executed'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        if not leader:
+            call.done.wait()
+            return copy.deepcopy(call.result)
+        try:
+            result = fn()
+            # 保存副本：领头的调用方拿到原始结果后可能修改它
+            call.result = copy.deepcopy(result)
+        except Exception as e:
+            call.result = (False, str(e), None)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                if call.result[0] and self.ttl > 0:
+                    self._results[key] = (time.time(), call.result)
+                    while len(self._results) > self.max_entries:
+                        self._results.popitem(last=False)
+            call.done.set()
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+_default = SingleFlight()
+
+
+def default_single_flight() -> SingleFlight:
+    """进程内共享的 SingleFlight，所有 XHS_Apis 实例默认共用，跨任务合并相同请求。"""
+    return _default
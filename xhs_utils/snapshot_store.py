@@ -0,0 +1,195 @@
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from xhs_utils.common_util import get_state_path, open_sqlite
+
+ADDED = 'added'
+REMOVED = 'removed'
+MOVED = 'moved'
+CHANGED = 'changed'
+
+COUNTER_KEYS = ('liked_count', 'collected_count', 'comment_count', 'shared_count')
+
+
+def snapshot_entries(items: Iterable[dict]) -> List[Tuple[str, Dict[str, str]]]:
+    """从搜索或主页推荐的结果中取出 (note_id, 互动计数)，顺序即排名。"""
+    entries = []
+    for item in items:
+        if not item.get('id') or item.get('model_type', 'note') != 'note':
+            continue
+        interact_info = (item.get('note_card') or {}).get('interact_info') or {}
+        entries.append((item['id'], {key: interact_info[key] for key in COUNTER_KEYS if key in interact_info}))
+    return entries
+
+
+class SnapshotStore:
+    """
+    榜单快照时间序列：按 (source, params) 区分序列，每次快照只保存与上一次相比的变化——
+    新进入/掉出的笔记、排名变化以及变化了的互动计数，另维护每个序列的最新状态用于计算下一次的差异。
+    变化记录按 (序列, 笔记) 和 (序列, 类型, 时间) 建索引，查询某篇笔记的排名历史或某时刻之后新上榜的笔记
+    不需要回放全部快照。
+    """
+
+    def __init__(self, db_path: str = None) -> None:
+        self.db_path = db_path or get_state_path('snapshots.db')
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(self.db_path)
+        with self._lock:
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS snapshot_series ('
+                'series_id INTEGER PRIMARY KEY, source TEXT NOT NULL, params TEXT NOT NULL, UNIQUE (source, params));'
+                'CREATE TABLE IF NOT EXISTS snapshots ('
+                'snapshot_id INTEGER PRIMARY KEY, series_id INTEGER NOT NULL, ts REAL NOT NULL, size INTEGER NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS idx_snapshots_series ON snapshots (series_id, ts);'
+                'CREATE TABLE IF NOT EXISTS snapshot_deltas ('
+                'snapshot_id INTEGER NOT NULL, series_id INTEGER NOT NULL, ts REAL NOT NULL, note_id TEXT NOT NULL, '
+                'kind TEXT NOT NULL, rank INTEGER, counters TEXT);'
+                'CREATE INDEX IF NOT EXISTS idx_deltas_note ON snapshot_deltas (series_id, note_id, ts);'
+                'CREATE INDEX IF NOT EXISTS idx_deltas_kind ON snapshot_deltas (series_id, kind, ts);'
+                'CREATE TABLE IF NOT EXISTS snapshot_current ('
+                'series_id INTEGER NOT NULL, note_id TEXT NOT NULL, rank INTEGER NOT NULL, counters TEXT NOT NULL, '
+                'PRIMARY KEY (series_id, note_id));'
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _params_key(params: Optional[dict]) -> str:
+        return json.dumps(params or {}, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+    def _series_id(self, source: str, params: Optional[dict], create: bool = False) -> Optional[int]:
+        key = self._params_key(params)
+        row = self._conn.execute(
+            'SELECT series_id FROM snapshot_series WHERE source = ? AND params = ?', (source, key)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        return self._conn.execute('INSERT INTO snapshot_series (source, params) VALUES (?, ?)', (source, key)).lastrowid
+
+    def record(self, source: str, params: Optional[dict], entries: Iterable[Tuple[str, Dict[str, str]]], ts: float = None) -> Dict[str, int]:
+        """
+        保存一次快照
+        :param entries: 按排名排列的 (note_id, 互动计数)，可用 snapshot_entries 从接口结果生成
+        :return: 各类变化的数量 {'added', 'removed', 'moved', 'changed'}
+        """
+        ts = ts if ts is not None else time.time()
+        current = {}
+        for note_id, counters in entries:
+            if note_id not in current:
+                current[note_id] = (len(current) + 1, counters or {})
+        stats = {ADDED: 0, REMOVED: 0, MOVED: 0, CHANGED: 0}
+        with self._lock:
+            series_id = self._series_id(source, params, create=True)
+            previous = {
+                note_id: (rank, json.loads(counters))
+                for note_id, rank, counters in self._conn.execute(
+                    'SELECT note_id, rank, counters FROM snapshot_current WHERE series_id = ?', (series_id,)
+                )
+            }
+            snapshot_id = self._conn.execute(
+                'INSERT INTO snapshots (series_id, ts, size) VALUES (?, ?, ?)', (series_id, ts, len(current))
+            ).lastrowid
+            deltas = []
+            for note_id, (rank, counters) in current.items():
+                if note_id not in previous:
+                    deltas.append((note_id, ADDED, rank, counters))
+                    continue
+                old_rank, old_counters = previous[note_id]
+                if rank != old_rank:
+                    deltas.append((note_id, MOVED, rank, None))
+                changed = {key: value for key, value in counters.items() if old_counters.get(key) != value}
+                if changed:
+                    deltas.append((note_id, CHANGED, None, changed))
+            for note_id in previous.keys() - current.keys():
+                deltas.append((note_id, REMOVED, None, None))
+            for _, kind, _, _ in deltas:
+                stats[kind] += 1
+            self._conn.executemany(
+                'INSERT INTO snapshot_deltas (snapshot_id, series_id, ts, note_id, kind, rank, counters) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (snapshot_id, series_id, ts, note_id, kind, rank, json.dumps(counters, ensure_ascii=False) if counters is not None else None)
+                    for note_id, kind, rank, counters in deltas
+                ],
+            )
+            self._conn.execute('DELETE FROM snapshot_current WHERE series_id = ?', (series_id,))
+            self._conn.executemany(
+                'INSERT INTO snapshot_current (series_id, note_id, rank, counters) VALUES (?, ?, ?, ?)',
+                [(series_id, note_id, rank, json.dumps(counters, ensure_ascii=False)) for note_id, (rank, counters) in current.items()],
+            )
+            self._conn.commit()
+        return stats
+
+    def latest(self, source: str, params: Optional[dict]) -> List[Tuple[str, int, Dict[str, str]]]:
+        """最新一次快照：[(note_id, rank, counters)]，按排名排序。"""
+        with self._lock:
+            series_id = self._series_id(source, params)
+            if series_id is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT note_id, rank, counters FROM snapshot_current WHERE series_id = ? ORDER BY rank', (series_id,)
+            ).fetchall()
+        return [(note_id, rank, json.loads(counters)) for note_id, rank, counters in rows]
+
+    def rank_history(self, source: str, params: Optional[dict], note_id: str) -> List[Tuple[float, Optional[int]]]:
+        """笔记的排名变化历史 [(ts, rank)]，rank 为 None 表示该时刻掉出榜单，两次变化之间排名不变。"""
+        with self._lock:
+            series_id = self._series_id(source, params)
+            if series_id is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT ts, kind, rank FROM snapshot_deltas WHERE series_id = ? AND note_id = ? AND kind != ? ORDER BY ts',
+                (series_id, note_id, CHANGED),
+            ).fetchall()
+        return [(ts, None if kind == REMOVED else rank) for ts, kind, rank in rows]
+
+    def counter_history(self, source: str, params: Optional[dict], note_id: str) -> List[Tuple[float, Dict[str, str]]]:
+        """笔记互动计数的变化历史 [(ts, 变化了的计数)]，首条为上榜时的完整计数。"""
+        with self._lock:
+            series_id = self._series_id(source, params)
+            if series_id is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT ts, counters FROM snapshot_deltas WHERE series_id = ? AND note_id = ? AND kind IN (?, ?) ORDER BY ts',
+                (series_id, note_id, ADDED, CHANGED),
+            ).fetchall()
+        return [(ts, json.loads(counters)) for ts, counters in rows if counters]
+
+    def new_entrants(self, source: str, params: Optional[dict], since: float) -> List[Tuple[float, str, int]]:
+        """since 之后新上榜（含掉出后重新上榜）的笔记 [(ts, note_id, rank)]。"""
+        with self._lock:
+            series_id = self._series_id(source, params)
+            if series_id is None:
+                return []
+            return self._conn.execute(
+                'SELECT ts, note_id, rank FROM snapshot_deltas WHERE series_id = ? AND kind = ? AND ts > ? ORDER BY ts, rank',
+                (series_id, ADDED, since),
+            ).fetchall()
+
+    def snapshot_at(self, source: str, params: Optional[dict], ts: float) -> List[Tuple[str, int, Dict[str, str]]]:
+        """回放变化记录，还原 ts 时刻（含）之前最后一次快照的内容 [(note_id, rank, counters)]。"""
+        state: Dict[str, Tuple[int, Dict[str, str]]] = {}
+        with self._lock:
+            series_id = self._series_id(source, params)
+            if series_id is None:
+                return []
+            rows = self._conn.execute(
+                'SELECT note_id, kind, rank, counters FROM snapshot_deltas WHERE series_id = ? AND ts <= ? ORDER BY ts, rowid',
+                (series_id, ts),
+            ).fetchall()
+        for note_id, kind, rank, counters in rows:
+            if kind == ADDED:
+                state[note_id] = (rank, json.loads(counters))
+            elif kind == REMOVED:
+                state.pop(note_id, None)
+            elif kind == MOVED:
+                state[note_id] = (rank, state[note_id][1])
+            else:
+                state[note_id] = (state[note_id][0], {**state[note_id][1], **json.loads(counters)})
+        return sorted(((note_id, rank, counters) for note_id, (rank, counters) in state.items()), key=lambda row: row[1])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,36 @@
+import urllib.parse
+
+
+def parse_note_url(url):
+    """
+    解析笔记链接，返回 (note_id, query 参数字典)，与 get_note_info 的解析方式一致
+    :param url: 笔记链接，例如 https://www.xiaohongshu.com/explore/<note_id>?xsec_token=...&xsec_source=pc_user
+    """
+    url_parse = urllib.parse.urlparse(url)
+    note_id = url_parse.path.split("/")[-1]
+    kv_dist = {}
+    if url_parse.query:
+        for kv in url_parse.query.split("&"):
+            if "=" in kv:
+                key, value = kv.split("=", 1)
+                kv_dist[key] = value
+    return note_id, kv_dist
+
+
+def parse_user_id(value):
+    """
+    从用户主页链接（https://www.xiaohongshu.com/user/profile/<user_id>?xsec_token=...）中取出 user_id，传入的本身是 user_id 时原样返回
+    """
+    value = (value or '').strip()
+    if '/' not in value:
+        return value
+    return urllib.parse.urlparse(value).path.rstrip('/').split('/')[-1]
+
+
+def get_note_key(url):
+    """
+    笔记的规范化去重键：只取 note_id，忽略每次都会变化的 xsec_token 等参数；无法解析时退回原始链接
+    """
+    url = (url or '').strip()
+    note_id, _ = parse_note_url(url)
+    return note_id or url
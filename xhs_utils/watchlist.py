@@ -0,0 +1,152 @@
+import heapq
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+
+def parse_watchlist(raw: str, default_interval: float = 3600) -> List[Dict]:
+    """
+    解析关键词监控列表：每行一个关键词，可写成 "关键词|间隔分钟" 单独指定该关键词的检查间隔
+    :return: [{'query': 关键词, 'interval': 间隔秒数}]
+    """
+    watchlist = []
+    for line in (raw or '').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        query, _, minutes = line.partition('|')
+        try:
+            interval = float(minutes) * 60 if minutes.strip() else default_interval
+        except ValueError:
+            interval = default_interval
+        watchlist.append({'query': query.strip(), 'interval': max(interval, 60)})
+    return watchlist
+
+
+def search_new_notes(xhs_apis, query: str, cookies_str: str, seen_index, max_pages: int = 10, proxies=None, rate_limiter=None) -> Tuple[bool, str, List[dict]]:
+    """
+    按“最新”排序（sort_type_choice=1）搜索关键词，遇到第一篇已见过的笔记即停止翻页，返回此前没见过的新笔记（按 id 去重）
+    这里不登记 seen_index：新笔记由后续的详情爬取成功后登记（spider_some_note 的 mark_fetched），获取失败的笔记不会被当作已见过
+    :param seen_index: SeenNoteIndex
+    :param max_pages: 首次监控（还没有见过的笔记）时最多翻的页数
+    """
+    new_notes = []
+    new_ids = set()
+    success, msg = True, 'success'
+    try:
+        for page in range(1, max(int(max_pages), 1) + 1):
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            success, msg, res_json = xhs_apis.search_note(query, cookies_str, page, 1, proxies=proxies)
+            if not success:
+                raise Exception(msg)
+            notes = [item for item in res_json["data"].get("items") or [] if item.get('model_type') == 'note' and item.get('id')]
+            known = seen_index.known(note['id'] for note in notes)
+            reached_seen = False
+            for note in notes:
+                if note['id'] in known:
+                    reached_seen = True
+                    break
+                if note['id'] not in new_ids:
+                    new_ids.add(note['id'])
+                    new_notes.append(note)
+            if reached_seen or not res_json["data"].get("has_more"):
+                break
+    except Exception as e:
+        success = False
+        msg = str(e)
+    return success, msg, new_notes
+
+
+class KeywordWatcher:
+    """
+    关键词监控：按各自的间隔反复检查监控列表中的关键词，每次只把新出现的笔记交给 on_new_notes 处理。
+    每次的检查时间加入 ±jitter 比例的随机抖动，首次检查也在一个间隔内随机错开，避免多个关键词同时请求。
+    提供 cookie_pool 时每次检查都从池中取当前可用的 Cookies，长时间运行中失效的 Cookies 会被换下。
+    on_new_notes 处理后仍未登记到 seen_index 的笔记（详情获取失败）在之后的检查中重新交给 on_new_notes，最多 max_retries 次；
+    因为翻页遇到已见过的笔记即停止，这些笔记不会再从搜索结果中出现，需要单独记住。
+    """
+
+    def __init__(self, xhs_apis, watchlist: List[Dict], cookies_str: str, seen_index, on_new_notes: Callable[[str, List[dict]], None], jitter: float = 0.2, max_pages: int = 10, proxies=None, rate_limiter=None, cookie_pool=None, max_retries: int = 3) -> None:
+        self.xhs_apis = xhs_apis
+        self.watchlist = watchlist
+        self.cookies_str = cookies_str
+        self.seen_index = seen_index
+        self.on_new_notes = on_new_notes
+        self.jitter = min(max(float(jitter), 0.0), 1.0)
+        self.max_pages = max_pages
+        self.proxies = proxies
+        self.rate_limiter = rate_limiter
+        self.cookie_pool = cookie_pool
+        self.max_retries = max(int(max_retries), 0)
+        # 关键词 -> {note_id: (搜索结果中的笔记, 已处理次数)}
+        self._retry: Dict[str, Dict[str, Tuple[dict, int]]] = {}
+        self._stop = threading.Event()
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def check(self, query: str) -> int:
+        """检查一次关键词，返回交给 on_new_notes 的笔记数量（新笔记加上需要重试的笔记）。"""
+        cookies_str = self.cookie_pool.get() if self.cookie_pool is not None else self.cookies_str
+        success, msg, new_notes = search_new_notes(
+            self.xhs_apis, query, cookies_str, self.seen_index, self.max_pages, self.proxies, self.rate_limiter,
+        )
+        if self.cookie_pool is not None:
+            if success:
+                self.cookie_pool.report_success(cookies_str)
+            else:
+                self.cookie_pool.report_failure(cookies_str, msg)
+        logger.info(f'监控关键词 {query}: 新笔记 {len(new_notes)} 篇, {success}, msg: {msg}')
+        retry = self._retry.pop(query, {})
+        if retry:
+            fetched = self.seen_index.known(retry)
+            new_ids = {note['id'] for note in new_notes}
+            new_notes = new_notes + [note for note_id, (note, _) in retry.items() if note_id not in fetched and note_id not in new_ids]
+        if not new_notes:
+            return 0
+        try:
+            self.on_new_notes(query, new_notes)
+        finally:
+            fetched = self.seen_index.known(note['id'] for note in new_notes)
+            pending = {}
+            for note in new_notes:
+                if note['id'] in fetched:
+                    continue
+                attempts = retry.get(note['id'], (note, 0))[1] + 1
+                if attempts <= self.max_retries:
+                    pending[note['id']] = (note, attempts)
+                else:
+                    logger.warning(f'监控关键词 {query}: 笔记 {note["id"]} 连续 {attempts} 次获取失败，不再重试')
+            if pending:
+                self._retry[query] = pending
+        return len(new_notes)
+
+    def run(self, max_cycles: int = None) -> None:
+        """持续运行直到 stop() 被调用；max_cycles 限制总检查次数（用于一次性运行）。"""
+        now = time.time()
+        queue = [
+            (now + random.uniform(0, entry['interval'] * self.jitter), idx)
+            for idx, entry in enumerate(self.watchlist)
+        ]
+        heapq.heapify(queue)
+        cycles = 0
+        while queue and not self._stop.is_set():
+            next_run, idx = heapq.heappop(queue)
+            if self._stop.wait(max(next_run - time.time(), 0)):
+                break
+            entry = self.watchlist[idx]
+            try:
+                self.check(entry['query'])
+            except Exception as e:
+                logger.error(f'监控关键词 {entry["query"]} 处理失败: {e}')
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+            heapq.heappush(queue, (time.time() + self._jittered(entry['interval']), idx))
+
+    def stop(self) -> None:
+        self._stop.set()